@@ -2,6 +2,7 @@
 import json
 import os
 import base64
+import threading
 from pathlib import Path
 from typing import Dict, Optional, Tuple, List
 from cryptography.fernet import Fernet
@@ -19,6 +20,15 @@ def get_config_path(portable: bool = False) -> Path:
         return config_dir / "birthday_reminder_config.json"
 
 
+# Encryption keys by key file path, loaded or derived once per process
+_encryption_keys: Dict[str, bytes] = {}
+
+# Decrypted SMTP settings by config path, with the file signature they were read at
+_settings_cache: Dict[str, Tuple[Tuple, Dict]] = {}
+_settings_cache_lock = threading.Lock()
+_settings_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
 def get_encryption_key(portable: bool = False) -> bytes:
     """
     Get or generate encryption key for OAuth2 refresh tokens.
@@ -26,10 +36,16 @@ def get_encryption_key(portable: bool = False) -> bytes:
     """
     key_file = get_config_path(portable).parent / ".oauth_key"
     
+    cached = _encryption_keys.get(str(key_file))
+    if cached:
+        return cached
+    
     if key_file.exists():
         # Load existing key
         with open(key_file, "rb") as f:
-            return f.read()
+            key = f.read()
+        _encryption_keys[str(key_file)] = key
+        return key
     else:
         # Generate new key using machine-specific identifier
         machine_id = os.environ.get("BIRTHDAY_REMINDER_MACHINE_ID", "default")
@@ -48,6 +64,7 @@ def get_encryption_key(portable: bool = False) -> bytes:
         with open(key_file, "wb") as f:
             f.write(key)
         
+        _encryption_keys[str(key_file)] = key
         return key
 
 
@@ -96,6 +113,7 @@ def save_config(config: Dict, portable: bool = False) -> None:
     
     with open(config_path, "w", encoding="utf-8") as f:
         json.dump(config, f, indent=2, ensure_ascii=False)
+    invalidate_settings_cache(portable)
 
 
 def reset_config(portable: bool = False) -> None:
@@ -103,6 +121,39 @@ def reset_config(portable: bool = False) -> None:
     config_path = get_config_path(portable)
     if config_path.exists():
         config_path.unlink()
+    invalidate_settings_cache(portable)
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Get (mtime_ns, inode, size) for a file, or None if it doesn't exist."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+def _settings_signature(portable: bool) -> Tuple:
+    """Signature of every file get_smtp_settings reads, to detect changes by other processes."""
+    return (
+        _file_signature(get_config_path(portable)),
+        _file_signature(Path(__file__).parent / "data" / "smtp.json"),
+    )
+
+
+def invalidate_settings_cache(portable: Optional[bool] = None) -> None:
+    """Drop cached SMTP settings for one mode, or for both if portable is None."""
+    modes = [False, True] if portable is None else [portable]
+    with _settings_cache_lock:
+        for mode in modes:
+            if _settings_cache.pop(str(get_config_path(mode)), None) is not None:
+                _settings_cache_stats["invalidations"] += 1
+
+
+def get_settings_cache_stats() -> Dict:
+    """Get SMTP settings cache hit/miss/invalidation counters."""
+    with _settings_cache_lock:
+        return dict(_settings_cache_stats)
 
 
 def decrypt_password(encrypted_password: str, key: str, iv: str) -> Optional[str]:
@@ -162,7 +213,33 @@ def get_old_smtp_settings(portable: bool = False) -> Optional[Dict]:
 
 
 def get_smtp_settings(portable: bool = False) -> Dict:
-    """Get SMTP settings from config, with fallback to old format."""
+    """
+    Get SMTP settings from config, with fallback to old format.
+    
+    The decrypted settings are cached in memory and reused until the config
+    file's mtime, inode or size changes (e.g. written by another worker
+    process) or the settings are saved or reset in this process. Each call
+    returns a fresh copy, so callers may modify it.
+    """
+    key = str(get_config_path(portable))
+    signature = _settings_signature(portable)
+    with _settings_cache_lock:
+        cached = _settings_cache.get(key)
+        if cached and cached[0] == signature:
+            _settings_cache_stats["hits"] += 1
+            return dict(cached[1])
+        _settings_cache_stats["misses"] += 1
+    
+    # Store under the signature taken before reading, so a write that
+    # races with the read shows up as a miss next time
+    smtp_settings = _read_smtp_settings(portable)
+    with _settings_cache_lock:
+        _settings_cache[key] = (signature, dict(smtp_settings))
+    return smtp_settings
+
+
+def _read_smtp_settings(portable: bool) -> Dict:
+    """Read and decrypt SMTP settings from disk, migrating the old format if found."""
     # First try new format
     config = load_config(portable)
     smtp_settings = config.get("smtp", {})
@@ -186,6 +263,26 @@ def get_smtp_settings(portable: bool = False) -> Dict:
     return smtp_settings
 
 
+def check_config(portable: bool = False) -> None:
+    """
+    Check that the config file (if any) parses and its secrets can be decrypted.
+    
+    Raises:
+        ValueError: If the config is unreadable or the refresh token can't be decrypted
+    """
+    config_path = get_config_path(portable)
+    if config_path.exists():
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            raise ValueError(f"Config file is unreadable: {e}")
+    
+    # get_smtp_settings only keeps the encrypted token if decryption failed
+    if get_smtp_settings(portable).get("googleRefreshTokenEncrypted"):
+        raise ValueError("OAuth2 refresh token can't be decrypted with the current key")
+
+
 def save_smtp_settings(smtp_settings: Dict, portable: bool = False) -> None:
     """Save SMTP settings to config. Encrypts refresh token if present."""
     # Create a copy to avoid modifying the original
@@ -1,13 +1,29 @@
 """Core business logic for birthday reminder application."""
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import codecs
+import csv
+import io
 import json
+import base64
 import zipfile
 import shutil
 import os
+import re
+import sqlite3
+import time
+from array import array
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 
+from db import get_connection, read_snapshot
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; compute_ages_bulk falls back to pure Python
+    np = None
+
 
 def get_db_path(portable: bool = False) -> Path:
     """Get the database path based on portable mode."""
@@ -19,19 +35,164 @@ def get_db_path(portable: bool = False) -> Path:
         return db_dir / "birthdays.db"
 
 
+# Schema migrations, applied in order. PRAGMA user_version records the
+# highest version applied to a database file.
+SCHEMA_MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS birthdays (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            birthday TEXT NOT NULL,
+            photo TEXT,
+            gender TEXT
+        )
+        """,
+    ]),
+    (2, [
+        # Older versions stored dates as strptime accepted them (1990-1-5);
+        # zero-pad those first so month_day below is always MM-DD
+        """
+        UPDATE birthdays
+        SET birthday = substr(birthday, 1, 5)
+            || printf('%02d', CAST(substr(birthday, 6, instr(substr(birthday, 6), '-') - 1) AS INTEGER))
+            || '-'
+            || printf('%02d', CAST(substr(birthday, 6 + instr(substr(birthday, 6), '-')) AS INTEGER))
+        WHERE birthday GLOB '[0-9][0-9][0-9][0-9]-[0-9]-[0-9]'
+            OR birthday GLOB '[0-9][0-9][0-9][0-9]-[0-9]-[0-9][0-9]'
+            OR birthday GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9]'
+        """,
+        # Indexed MM-DD key so date lookups are index range scans instead
+        # of evaluating strftime() on every row
+        """
+        ALTER TABLE birthdays ADD COLUMN month_day TEXT
+            GENERATED ALWAYS AS (substr(birthday, 6, 5)) VIRTUAL
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_birthdays_month_day ON birthdays (month_day)",
+    ]),
+    (3, [
+        # Keyset pagination walks (birthday, id); id is the rowid, which
+        # SQLite stores in every index entry
+        "CREATE INDEX IF NOT EXISTS idx_birthdays_birthday ON birthdays (birthday)",
+    ]),
+    (4, [
+        # Short-lived OAuth flow state, shared by all server worker processes
+        """
+        CREATE TABLE IF NOT EXISTS oauth_states (
+            state TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """,
+    ]),
+    (5, [
+        # Durable queue of outgoing emails, drained by outbox.OutboxWorker
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject TEXT,
+            message BLOB,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_outbox_status_due ON outbox (status, next_attempt_at)",
+    ]),
+    (6, [
+        # Change counter per table, bumped in the same transaction as each
+        # mutation; the server turns it into ETags for conditional GETs
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO data_versions (name, version) VALUES ('birthdays', 0)",
+    ]),
+]
+
+# Columns returned by birthday queries (excludes derived columns like month_day)
+BIRTHDAY_COLUMNS = "id, name, birthday, photo, gender"
+
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+
+def get_schema_version(db_path: Path) -> int:
+    """Get the schema version recorded in the database file."""
+    with get_connection(db_path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
 def init_database(db_path: Path) -> None:
-    """Initialize database tables if they don't exist."""
-    with sqlite3.connect(str(db_path)) as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS birthdays (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                birthday TEXT NOT NULL,
-                photo TEXT,
-                gender TEXT
-            )
-        """)
-        conn.commit()
+    """Create or migrate database tables. A no-op when the schema is current."""
+    with get_connection(db_path) as conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
+        # Take the write lock before re-checking so concurrent workers
+        # don't apply the same migration twice
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target_version, statements in SCHEMA_MIGRATIONS:
+            if target_version <= version:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target_version}")
+
+
+def check_database(db_path: Path, write_timeout: float = 1.0) -> None:
+    """
+    Check that the database can be read and written and its schema is current.
+    
+    Under WAL a read succeeds even while another connection holds the write
+    lock, so the write lock is also taken (BEGIN IMMEDIATE) and released
+    again at once, waiting at most write_timeout seconds for it.
+    
+    Raises:
+        sqlite3.Error: If the database can't be opened or queried
+        RuntimeError: If the schema is older than this version of the app,
+            or the write lock isn't released within write_timeout
+    """
+    with get_connection(db_path) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            raise RuntimeError(f"Database schema version {version}, expected {SCHEMA_VERSION}")
+        conn.execute("SELECT 1 FROM birthdays LIMIT 1").fetchall()
+        
+        busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+        conn.execute(f"PRAGMA busy_timeout = {int(write_timeout * 1000)}")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.rollback()
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                raise RuntimeError(f"Database is locked for writing: {e}")
+            raise
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+
+
+# Accepts what datetime.strptime(..., "%Y-%m-%d") does; the calendar check is
+# done by hand because strptime costs several microseconds per call
+_BIRTHDAY_PATTERN = re.compile(r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})")
+
+_DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def normalize_birthday(birthday: str) -> str:
+    """Validate a YYYY-MM-DD birthday and return it zero-padded."""
+    match = _BIRTHDAY_PATTERN.fullmatch(birthday) if isinstance(birthday, str) else None
+    if match:
+        year, month, day = int(match[1]), int(match[2]), int(match[3])
+        if year >= 1 and 1 <= month <= 12 and 1 <= day <= _DAYS_IN_MONTH[month]:
+            if month != 2 or day != 29 or is_leap_year(year):
+                return f"{year:04d}-{month:02d}-{day:02d}"
+    raise ValueError("Invalid date format. Use YYYY-MM-DD")
 
 
 def calculate_age(birthday: str) -> int:
@@ -47,6 +208,161 @@ def calculate_age(birthday: str) -> int:
         return 0
 
 
+def is_leap_year(year: int) -> bool:
+    """Check if a year has a February 29."""
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _next_occurrence(month: int, day: int, start: date) -> date:
+    """
+    Get the next date on or after start with the given month and day.
+    February 29 falls on February 28 in non-leap years.
+    """
+    for year in (start.year, start.year + 1):
+        if month == 2 and day == 29 and not is_leap_year(year):
+            target = date(year, 2, 28)
+        else:
+            target = date(year, month, day)
+        if target >= start:
+            return target
+    return target
+
+
+# Below this many rows NumPy's setup cost outweighs the vectorized pass
+NUMPY_MIN_ROWS = 256
+
+
+@lru_cache(maxsize=4)
+def _days_until_table(today: date) -> Tuple[int, ...]:
+    """
+    Build a lookup of days until the next occurrence, indexed by month * 100 + day.
+    Keys that are not a calendar day (e.g. 02-30) map to -1.
+    """
+    table = [-1] * 1232
+    day_of_year = date(2000, 1, 1)  # Leap year, so 02-29 gets an entry
+    while day_of_year.year == 2000:
+        target = _next_occurrence(day_of_year.month, day_of_year.day, today)
+        table[day_of_year.month * 100 + day_of_year.day] = (target - today).days
+        day_of_year += timedelta(days=1)
+    return tuple(table)
+
+
+def compute_ages_bulk(
+    birthdays: List[str],
+    today: Optional[date] = None,
+    use_numpy: Optional[bool] = None
+) -> Tuple[List[int], List[int]]:
+    """
+    Compute age and days until next birthday for many birthdays at once.
+    
+    Dates are parsed once into integer year/month/day arrays and compared
+    against a single "today" snapshot. Uses NumPy when installed, otherwise
+    a pure-Python pass over array('i') columns.
+    
+    Args:
+        birthdays: Birthday strings (YYYY-MM-DD)
+        today: Reference date (defaults to today)
+        use_numpy: Force (True) or disable (False) the NumPy path. By default
+            NumPy is used when installed and there are at least NUMPY_MIN_ROWS
+    
+    Returns:
+        Tuple of (ages, days_until). Unparseable dates get age 0 (like
+        calculate_age) and days_until -1.
+    """
+    if today is None:
+        today = datetime.now().date()
+    if use_numpy is None:
+        use_numpy = np is not None and len(birthdays) >= NUMPY_MIN_ROWS
+    
+    table = _days_until_table(today)
+    today_key = today.month * 100 + today.day
+    birthdays = _pad_birthdays(birthdays)
+    
+    if use_numpy:
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        try:
+            return _compute_ages_numpy(birthdays, today.year, today_key, table)
+        except UnicodeEncodeError:
+            pass  # Non-ASCII input can't be viewed as bytes; parse row by row
+    
+    years = array("i", bytes(4 * len(birthdays)))
+    keys = array("i", bytes(4 * len(birthdays)))
+    for i, birthday in enumerate(birthdays):
+        # Same digits-and-dashes check as the NumPy path (int() would also accept spaces)
+        match = _FIXED_WIDTH_DATE.fullmatch(birthday)
+        if match:
+            years[i] = int(match[1])
+            keys[i] = int(match[2]) * 100 + int(match[3])
+        # Otherwise key 0, which is never a valid month-day
+    
+    ages = []
+    days_until = []
+    for year, key in zip(years, keys):
+        if key < 101 or key > 1231 or table[key] < 0:
+            ages.append(0)
+            days_until.append(-1)
+            continue
+        ages.append(today.year - year - (today_key < key))
+        days_until.append(table[key])
+    return ages, days_until
+
+
+_FIXED_WIDTH_DATE = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})")
+
+
+def _pad_birthdays(birthdays: List[str]) -> List[str]:
+    """
+    Zero-pad legacy dates (e.g. 1990-1-5) so both compute_ages_bulk paths
+    read fixed-width YYYY-MM-DD; other values not 10 characters long can't
+    be parsed and become "". Returns birthdays itself if nothing changed.
+    """
+    padded = birthdays
+    for i, birthday in enumerate(birthdays):
+        if isinstance(birthday, str) and len(birthday) == 10:
+            continue
+        if padded is birthdays:
+            padded = list(birthdays)
+        try:
+            padded[i] = normalize_birthday(birthday)
+        except ValueError:
+            padded[i] = ""
+    return padded
+
+
+def _compute_ages_numpy(
+    birthdays: List[str],
+    today_year: int,
+    today_key: int,
+    table: Tuple[int, ...]
+) -> Tuple[List[int], List[int]]:
+    """NumPy implementation of compute_ages_bulk."""
+    if not birthdays:
+        return [], []
+    
+    # View fixed-width YYYY-MM-DD strings as a (rows, 10) matrix of digits
+    raw = np.array(birthdays, dtype="S10")
+    chars = raw.view(np.uint8).reshape(len(birthdays), 10)
+    digits = chars.astype(np.int32) - ord("0")
+    
+    digit_cols = [0, 1, 2, 3, 5, 6, 8, 9]
+    valid = (
+        np.all((digits[:, digit_cols] >= 0) & (digits[:, digit_cols] <= 9), axis=1)
+        & (chars[:, 4] == ord("-"))
+        & (chars[:, 7] == ord("-"))
+    )
+    
+    years = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    keys = digits[:, 5] * 1000 + digits[:, 6] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    keys = np.where(valid & (keys >= 101) & (keys <= 1231), keys, 0)
+    
+    days_until = np.asarray(table, dtype=np.int32)[keys]
+    valid = days_until >= 0
+    ages = np.where(valid, today_year - years - (today_key < keys), 0)
+    
+    return ages.tolist(), days_until.tolist()
+
+
 def format_birthday_date(birthday: str) -> str:
     """Format birthday string for display."""
     try:
@@ -56,38 +372,302 @@ def format_birthday_date(birthday: str) -> str:
         return birthday
 
 
+def _observed_month_day_range(start: date, end: date) -> Tuple[str, str]:
+    """
+    Get the MM-DD range covering start..end for a month_day query.
+    Extends a range ending on February 28 of a non-leap year to include
+    February 29 birthdays, which are observed that day.
+    """
+    end_md = end.strftime("%m-%d")
+    if end_md == "02-28" and not is_leap_year(end.year):
+        end_md = "02-29"
+    return start.strftime("%m-%d"), end_md
+
+
 def get_todays_birthdays(db_path: Path) -> List[Dict]:
     """Get all birthdays that occur today."""
-    today = datetime.now()
-    formatted_today = today.strftime("%m-%d")
+    today = datetime.now().date()
+    start_md, end_md = _observed_month_day_range(today, today)
+    return get_birthdays_by_month_day(db_path, start_md, end_md)
+
+
+def _rows_with_ages(rows) -> List[Dict]:
+    """Convert database rows to dicts with an "age" computed in one bulk pass."""
+    birthdays = [dict(row) for row in rows]
+    ages, _ = compute_ages_bulk([bday["birthday"] for bday in birthdays])
+    for bday, age in zip(birthdays, ages):
+        bday["age"] = age
+    return birthdays
+
+
+def get_birthdays_by_month_day(db_path: Path, start: str, end: str) -> List[Dict]:
+    """
+    Get birthdays whose month and day fall within an MM-DD range.
+    
+    Args:
+        db_path: Path to the database
+        start: First MM-DD in the range (inclusive)
+        end: Last MM-DD in the range (inclusive). If earlier than start,
+            the range wraps past December 31 into January.
+    
+    Returns:
+        Birthdays ordered by their next occurrence within the range
+    """
+    if start <= end:
+        where = "month_day BETWEEN ? AND ?"
+    else:
+        where = "(month_day >= ? OR month_day <= ?)"
     
-    birthdays = []
-    with sqlite3.connect(str(db_path)) as conn:
-        conn.row_factory = sqlite3.Row
+    with get_connection(db_path) as conn:
         cursor = conn.execute(
-            "SELECT * FROM birthdays WHERE strftime('%m-%d', birthday) = ?",
-            (formatted_today,)
+            f"SELECT {BIRTHDAY_COLUMNS} FROM birthdays WHERE {where} "
+            "ORDER BY month_day < ?, month_day, birthday",
+            (start, end, start)
         )
-        for row in cursor.fetchall():
-            birthday_dict = dict(row)
-            birthday_dict["age"] = calculate_age(birthday_dict["birthday"])
-            birthdays.append(birthday_dict)
+        return _rows_with_ages(cursor.fetchall())
+
+
+def get_upcoming_birthdays(db_path: Path, start: date, days: int) -> List[Dict]:
+    """
+    Get birthdays occurring within a window of days, soonest first.
     
-    return birthdays
+    The window runs from start to start + days (inclusive) and may wrap
+    from December into January. Only matching rows are read, via the
+    month_day index.
+    
+    Args:
+        db_path: Path to the database
+        start: First day of the window
+        days: Number of days after start to include
+    
+    Returns:
+        Birthdays with "days_until" and "target_date" (YYYY-MM-DD) of their
+        next occurrence, sorted by days_until
+    """
+    if days < 0:
+        return []
+    
+    end = start + timedelta(days=days)
+    if days >= 365:
+        # Window covers the whole calendar: every birthday occurs once
+        start_md, end_md = "01-01", "12-31"
+    else:
+        start_md, end_md = _observed_month_day_range(start, end)
+    candidates = get_birthdays_by_month_day(db_path, start_md, end_md)
+    _, days_until = compute_ages_bulk([bday["birthday"] for bday in candidates], today=start)
+    
+    upcoming = []
+    for bday, until in zip(candidates, days_until):
+        if until < 0 or until > days:
+            continue  # Unparseable legacy row, or next occurrence past the window
+        bday["days_until"] = until
+        bday["target_date"] = (start + timedelta(days=until)).strftime("%Y-%m-%d")
+        upcoming.append(bday)
+    
+    upcoming.sort(key=lambda x: x["days_until"])
+    return upcoming
 
 
 def get_all_birthdays(db_path: Path) -> List[Dict]:
     """Get all birthdays from database."""
-    birthdays = []
-    with sqlite3.connect(str(db_path)) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.execute("SELECT * FROM birthdays ORDER BY birthday")
-        for row in cursor.fetchall():
-            birthday_dict = dict(row)
-            birthday_dict["age"] = calculate_age(birthday_dict["birthday"])
-            birthdays.append(birthday_dict)
+    with get_connection(db_path) as conn:
+        cursor = conn.execute(f"SELECT {BIRTHDAY_COLUMNS} FROM birthdays ORDER BY birthday")
+        return _rows_with_ages(cursor.fetchall())
+
+
+# Rows read per query by iter_birthdays
+ITER_BATCH_SIZE = 1000
+
+
+def _iter_birthdays_snapshot(db_path: Path, batch_size: int) -> Iterator:
+    """Yield the snapshot's data version, then every birthday dict."""
+    with read_snapshot(db_path) as conn:
+        row = conn.execute("SELECT version FROM data_versions WHERE name = 'birthdays'").fetchone()
+        yield row["version"] if row else 0
+        cursor = conn.execute(f"SELECT {BIRTHDAY_COLUMNS} FROM birthdays ORDER BY birthday, id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from _rows_with_ages(rows)
+
+
+def open_birthdays_snapshot(db_path: Path, batch_size: int = ITER_BATCH_SIZE) -> Tuple[int, Iterator[Dict]]:
+    """
+    Start reading all birthdays, with ages, from one read snapshot.
     
-    return birthdays
+    Args:
+        db_path: Path to the database
+        batch_size: Rows fetched (and given ages) at a time
+    
+    Returns:
+        Tuple of (data version of the snapshot, iterator of birthday dicts
+        ordered by (birthday, id)). The iterator holds a dedicated
+        connection until it is exhausted or closed.
+    """
+    rows = _iter_birthdays_snapshot(db_path, batch_size)
+    version = next(rows)
+    return version, rows
+
+
+def iter_birthdays(db_path: Path, batch_size: int = ITER_BATCH_SIZE) -> Iterator[Dict]:
+    """
+    Yield all birthdays, with ages, ordered by (birthday, id).
+    
+    All rows come from one read transaction on a dedicated (unpooled)
+    connection, so the result is consistent even if birthdays change while
+    a slow consumer (such as a streamed HTTP response) is reading it, and
+    no pool slot is pinned meanwhile. Memory stays bounded by one batch
+    regardless of table size.
+    
+    Args:
+        db_path: Path to the database
+        batch_size: Rows fetched (and given ages) at a time
+    
+    Yields:
+        JSON-serializable birthday dicts, as returned by get_all_birthdays
+    """
+    rows = _iter_birthdays_snapshot(db_path, batch_size)
+    next(rows)  # Skip the data version
+    yield from rows
+
+
+# Page size bounds for get_birthdays_page
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_page_cursor(birthday: str, birthday_id: int) -> str:
+    """Encode a (birthday, id) keyset position as an opaque cursor string."""
+    return base64.urlsafe_b64encode(f"{birthday}|{birthday_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_page_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a cursor from encode_page_cursor. Raises ValueError if malformed."""
+    try:
+        birthday, birthday_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return birthday, int(birthday_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _birthday_filters(
+    month: Optional[int],
+    gender: Optional[str],
+    name_prefix: Optional[str]
+) -> Tuple[List[str], List]:
+    """
+    Build WHERE conditions and parameters for the birthday list filters.
+    
+    Raises:
+        ValueError: If month is out of range
+    """
+    conditions = []
+    params: List = []
+    
+    if month is not None:
+        if month < 1 or month > 12:
+            raise ValueError("month must be between 1 and 12")
+        conditions.append("month_day BETWEEN ? AND ?")
+        params.extend([f"{month:02d}-01", f"{month:02d}-31"])
+    
+    if gender:
+        conditions.append("gender = ?")
+        params.append(gender)
+    
+    if name_prefix:
+        escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append("name LIKE ? ESCAPE '\\'")
+        params.append(f"{escaped}%")
+    
+    return conditions, params
+
+
+def count_birthdays(
+    db_path: Path,
+    month: Optional[int] = None,
+    gender: Optional[str] = None,
+    name_prefix: Optional[str] = None
+) -> int:
+    """
+    Count the birthdays matching the same filters as get_birthdays_page.
+    
+    Raises:
+        ValueError: If month is out of range
+    """
+    conditions, params = _birthday_filters(month, gender, name_prefix)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_connection(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM birthdays {where}", params).fetchone()[0]
+
+
+def get_birthdays_page(
+    db_path: Path,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    month: Optional[int] = None,
+    gender: Optional[str] = None,
+    name_prefix: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Get one page of birthdays ordered by (birthday, id), using keyset pagination.
+    
+    Args:
+        db_path: Path to the database
+        limit: Maximum rows to return (1 to MAX_PAGE_SIZE)
+        after: Cursor from a previous page; rows after it are returned
+        month: Only birthdays in this month (1-12)
+        gender: Only birthdays with this gender
+        name_prefix: Only names starting with this text (case-insensitive)
+    
+    Returns:
+        Tuple of (birthdays, next_cursor). next_cursor is None on the last page.
+    
+    Raises:
+        ValueError: If limit, month or the cursor is invalid
+    """
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    
+    conditions, params = _birthday_filters(month, gender, name_prefix)
+    if after:
+        conditions.insert(0, "(birthday, id) > (?, ?)")
+        params[:0] = decode_page_cursor(after)
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    with get_connection(db_path) as conn:
+        # Fetch one extra row to learn whether another page exists
+        cursor = conn.execute(
+            f"SELECT {BIRTHDAY_COLUMNS} FROM birthdays {where} ORDER BY birthday, id LIMIT ?",
+            (*params, limit + 1)
+        )
+        rows = cursor.fetchall()
+    
+    birthdays = _rows_with_ages(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        last = birthdays[-1]
+        next_cursor = encode_page_cursor(last["birthday"], last["id"])
+    
+    return birthdays, next_cursor
+
+
+def _bump_data_version(conn, name: str = "birthdays") -> None:
+    """Increment a table's change counter inside the caller's write transaction."""
+    conn.execute("UPDATE data_versions SET version = version + 1 WHERE name = ?", (name,))
+
+
+def get_data_version(db_path: Path, name: str = "birthdays") -> int:
+    """
+    Get a table's change counter.
+    
+    The counter increases with every committed add, update, delete or
+    import, in any process sharing the database file.
+    """
+    with get_connection(db_path) as conn:
+        row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+        return row["version"] if row else 0
 
 
 def add_birthday(
@@ -105,21 +685,183 @@ def add_birthday(
     if not name or not birthday:
         raise ValueError("Name and birthday are required")
     
-    # Validate date format
-    try:
-        datetime.strptime(birthday, "%Y-%m-%d")
-    except ValueError:
-        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    # Validate date format (stored zero-padded so month_day is always MM-DD)
+    birthday = normalize_birthday(birthday)
     
-    with sqlite3.connect(str(db_path)) as conn:
+    with get_connection(db_path, write=True) as conn:
         cursor = conn.execute(
             "INSERT INTO birthdays (name, birthday, photo, gender) VALUES (?, ?, ?, ?)",
             (name, birthday, photo, gender)
         )
-        conn.commit()
+        _bump_data_version(conn)
         return cursor.lastrowid
 
 
+# Bytes read from an uploaded file per decoding step
+UPLOAD_READ_SIZE = 64 * 1024
+
+
+def iter_text_lines(stream, encoding: str = "utf-8-sig", chunk_size: int = UPLOAD_READ_SIZE) -> Iterator[str]:
+    """
+    Decode a binary stream incrementally and yield its lines.
+    
+    Only one chunk and a partial line are held in memory at a time. Line
+    endings are translated to "\\n" and kept, as csv.reader expects, so
+    quoted fields that span lines still parse.
+    
+    Args:
+        stream: Binary file object (e.g. an uploaded file's stream)
+        encoding: Text encoding; the default also strips a UTF-8 BOM
+        chunk_size: Bytes read per step
+    
+    Yields:
+        Lines of text, each ending in "\\n" except possibly the last
+    
+    Raises:
+        UnicodeDecodeError: If the stream isn't valid in the encoding
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    carry_cr = False
+    while True:
+        data = stream.read(chunk_size)
+        text = decoder.decode(data, final=not data)
+        if carry_cr:
+            text = "\r" + text
+        # A trailing \r may be the first half of a \r\n split across chunks
+        carry_cr = bool(data) and text.endswith("\r")
+        if carry_cr:
+            text = text[:-1]
+        
+        lines = (pending + text.replace("\r\n", "\n").replace("\r", "\n")).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+        if not data:
+            break
+    if pending:
+        yield pending
+
+
+def iter_csv_birthdays(stream) -> Iterator[Dict]:
+    """
+    Parse an uploaded CSV file (Name, Birthday, Gender, Photo columns) row by row.
+    
+    Args:
+        stream: Binary file object with UTF-8 CSV data
+    
+    Yields:
+        Dicts with stripped "name" and "birthday" strings and "gender" and
+        "photo" (None when empty), ready for bulk_insert_birthdays
+    """
+    for row in csv.DictReader(iter_text_lines(stream)):
+        yield {
+            "name": (row.get("Name") or "").strip(),
+            "birthday": (row.get("Birthday") or "").strip(),
+            "gender": (row.get("Gender") or "").strip() or None,
+            "photo": (row.get("Photo") or "").strip() or None
+        }
+
+
+# Rows validated and inserted per executemany() call in bulk_insert_birthdays
+BULK_INSERT_CHUNK_SIZE = 1000
+
+
+class ImportCancelled(Exception):
+    """Raised by an import progress callback to stop and roll back the import."""
+
+
+def _validate_birthday_rows(rows: List[Dict], first_row: int) -> Tuple[List[Tuple], List[Dict]]:
+    """
+    Validate a batch of rows with the same rules as add_birthday.
+    
+    Returns:
+        Tuple of (insert parameters for the valid rows, errors for the others)
+    """
+    params = []
+    errors = []
+    for row_number, row in enumerate(rows, start=first_row):
+        name = (row.get("name") or "").strip()
+        birthday = (row.get("birthday") or "").strip()
+        if not name or not birthday:
+            errors.append({"row": row_number, "name": name, "error": "Name and birthday are required"})
+            continue
+        try:
+            birthday = normalize_birthday(birthday)
+        except ValueError as e:
+            errors.append({"row": row_number, "name": name, "error": str(e)})
+            continue
+        params.append((name, birthday, row.get("photo") or None, row.get("gender") or None))
+    return params, errors
+
+
+def bulk_insert_birthdays(
+    db_path: Path,
+    rows: Iterable[Dict],
+    allow_partial: bool = False,
+    replace_existing: bool = False,
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE,
+    progress: Optional[Callable[[int], None]] = None
+) -> Tuple[int, List[Dict]]:
+    """
+    Insert many birthdays in a single transaction.
+    
+    Rows are consumed chunk_size at a time: each chunk is validated, then
+    its valid rows are inserted with one executemany() call. Everything
+    commits (with one fsync and one data version bump) at the end, so rows
+    can come from a generator without being held in memory.
+    
+    Args:
+        db_path: Path to the database
+        rows: Dicts with "name", "birthday" and optional "gender" and "photo"
+        allow_partial: Insert the valid rows even if some are invalid.
+            Otherwise any invalid row rolls back the whole import.
+        replace_existing: Delete all existing birthdays in the same transaction
+        chunk_size: Rows per validation batch and executemany() call
+        progress: Called with the number of rows consumed after each chunk.
+            It may raise ImportCancelled (or any error) to roll back.
+    
+    Returns:
+        Tuple of (inserted_count, errors). Each error is a dict with "row"
+        (1-based position in rows), "name" and "error". inserted_count is 0
+        if there are errors and allow_partial is False.
+    """
+    inserted = 0
+    errors: List[Dict] = []
+    rows = iter(rows)
+    row_number = 1
+    
+    with get_connection(db_path, write=True) as conn:
+        if replace_existing:
+            conn.execute("DELETE FROM birthdays")
+        
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            params, chunk_errors = _validate_birthday_rows(chunk, row_number)
+            row_number += len(chunk)
+            errors.extend(chunk_errors)
+            # After an invalid row without allow_partial, only validate the
+            # rest for the error report
+            if params and (allow_partial or not errors):
+                conn.executemany(
+                    "INSERT INTO birthdays (name, birthday, photo, gender) VALUES (?, ?, ?, ?)",
+                    params
+                )
+                inserted += len(params)
+            if progress is not None:
+                progress(row_number - 1)
+        
+        if errors and not allow_partial:
+            conn.rollback()
+            return 0, errors
+        if inserted or replace_existing:
+            _bump_data_version(conn)
+    
+    return inserted, errors
+
+
 def update_birthday(
     db_path: Path,
     birthday_id: int,
@@ -135,47 +877,54 @@ def update_birthday(
     if not name or not birthday:
         raise ValueError("Name and birthday are required")
     
-    # Validate date format
-    try:
-        datetime.strptime(birthday, "%Y-%m-%d")
-    except ValueError:
-        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    # Validate date format (stored zero-padded so month_day is always MM-DD)
+    birthday = normalize_birthday(birthday)
     
-    with sqlite3.connect(str(db_path)) as conn:
+    with get_connection(db_path, write=True) as conn:
         if photo:
-            conn.execute(
+            cursor = conn.execute(
                 "UPDATE birthdays SET name = ?, birthday = ?, photo = ?, gender = ? WHERE id = ?",
                 (name, birthday, photo, gender, birthday_id)
             )
         else:
-            conn.execute(
+            cursor = conn.execute(
                 "UPDATE birthdays SET name = ?, birthday = ?, gender = ? WHERE id = ?",
                 (name, birthday, gender, birthday_id)
             )
-        conn.commit()
-        return conn.total_changes > 0
+        if cursor.rowcount > 0:
+            _bump_data_version(conn)
+            return True
+        return False
 
 
 def delete_birthday(db_path: Path, birthday_id: int) -> Tuple[bool, Optional[str]]:
     """Delete a birthday entry. Returns (success, photo_path)."""
-    with sqlite3.connect(str(db_path)) as conn:
-        conn.row_factory = sqlite3.Row
+    with get_connection(db_path, write=True) as conn:
         cursor = conn.execute("SELECT photo FROM birthdays WHERE id = ?", (birthday_id,))
         row = cursor.fetchone()
         photo_path = row["photo"] if row else None
         
-        conn.execute("DELETE FROM birthdays WHERE id = ?", (birthday_id,))
-        conn.commit()
-        success = conn.total_changes > 0
+        cursor = conn.execute("DELETE FROM birthdays WHERE id = ?", (birthday_id,))
+        success = cursor.rowcount > 0
+        if success:
+            _bump_data_version(conn)
         
         return (success, photo_path)
 
 
+def delete_all_birthdays(db_path: Path) -> int:
+    """Delete every birthday entry. Returns the number of rows deleted."""
+    with get_connection(db_path, write=True) as conn:
+        cursor = conn.execute("DELETE FROM birthdays")
+        if cursor.rowcount:
+            _bump_data_version(conn)
+        return cursor.rowcount
+
+
 def get_birthday_by_id(db_path: Path, birthday_id: int) -> Optional[Dict]:
     """Get a single birthday by ID."""
-    with sqlite3.connect(str(db_path)) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.execute("SELECT * FROM birthdays WHERE id = ?", (birthday_id,))
+    with get_connection(db_path) as conn:
+        cursor = conn.execute(f"SELECT {BIRTHDAY_COLUMNS} FROM birthdays WHERE id = ?", (birthday_id,))
         row = cursor.fetchone()
         if row:
             birthday_dict = dict(row)
@@ -184,6 +933,215 @@ def get_birthday_by_id(db_path: Path, birthday_id: int) -> Optional[Dict]:
         return None
 
 
+def save_oauth_state(db_path: Path, state: str, data: Dict, expires_at: float) -> None:
+    """Store OAuth flow state until expires_at (Unix time). Purges expired states."""
+    with get_connection(db_path, write=True) as conn:
+        conn.execute("DELETE FROM oauth_states WHERE expires_at < ?", (time.time(),))
+        conn.execute(
+            "INSERT OR REPLACE INTO oauth_states (state, data, expires_at) VALUES (?, ?, ?)",
+            (state, json.dumps(data), expires_at)
+        )
+
+
+def get_oauth_state(db_path: Path, state: str) -> Optional[Dict]:
+    """Get stored OAuth flow state, including its "expires_at", or None if unknown."""
+    with get_connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT data, expires_at FROM oauth_states WHERE state = ?", (state,)
+        ).fetchone()
+    if not row:
+        return None
+    data = json.loads(row["data"])
+    data["expires_at"] = row["expires_at"]
+    return data
+
+
+def update_oauth_state(db_path: Path, state: str, **fields) -> bool:
+    """Merge fields into stored OAuth flow state. Returns False if the state is unknown."""
+    with get_connection(db_path, write=True) as conn:
+        row = conn.execute("SELECT data FROM oauth_states WHERE state = ?", (state,)).fetchone()
+        if not row:
+            return False
+        data = json.loads(row["data"])
+        data.update(fields)
+        conn.execute("UPDATE oauth_states SET data = ? WHERE state = ?", (json.dumps(data), state))
+        return True
+
+
+def delete_oauth_state(db_path: Path, state: str) -> None:
+    """Remove stored OAuth flow state."""
+    with get_connection(db_path, write=True) as conn:
+        conn.execute("DELETE FROM oauth_states WHERE state = ?", (state,))
+
+
+# Outbox row statuses. "sending" rows are leased to a worker until
+# next_attempt_at, after which another worker may reclaim them.
+OUTBOX_PENDING = "pending"
+OUTBOX_SENDING = "sending"
+OUTBOX_SENT = "sent"
+OUTBOX_DEAD = "dead"
+
+
+def enqueue_email(db_path: Path, message: bytes, subject: Optional[str] = None) -> int:
+    """Queue a serialized email for delivery. Returns the outbox entry ID."""
+    now = time.time()
+    with get_connection(db_path, write=True) as conn:
+        cursor = conn.execute(
+            "INSERT INTO outbox (subject, message, status, next_attempt_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (subject, message, OUTBOX_PENDING, now, now, now)
+        )
+        return cursor.lastrowid
+
+
+def claim_outbox_batch(
+    db_path: Path,
+    limit: int,
+    lease_seconds: float = 300,
+    max_attempts: int = 5
+) -> List[Dict]:
+    """
+    Claim up to limit due emails for sending.
+    
+    Claimed rows are marked "sending" and leased for lease_seconds. A row
+    whose lease expired (the worker died or hung mid-send) counts as a
+    failed attempt: it is queued again, or dead-lettered once it reaches
+    max_attempts, so an email that crashes every send doesn't loop forever.
+    
+    Returns:
+        List of dicts with id, subject, message and attempts
+    """
+    now = time.time()
+    with get_connection(db_path, write=True) as conn:
+        conn.execute(
+            "UPDATE outbox SET status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, "
+            "attempts = attempts + 1, last_error = ?, next_attempt_at = ?, updated_at = ? "
+            "WHERE status = ? AND next_attempt_at <= ?",
+            (max_attempts, OUTBOX_DEAD, OUTBOX_PENDING, "Send interrupted: lease expired",
+             now, now, OUTBOX_SENDING, now)
+        )
+        rows = conn.execute(
+            "SELECT id, subject, message, attempts FROM outbox "
+            "WHERE status = ? AND next_attempt_at <= ? "
+            "ORDER BY next_attempt_at, id LIMIT ?",
+            (OUTBOX_PENDING, now, limit)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE outbox SET status = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+            [(OUTBOX_SENDING, now + lease_seconds, now, row["id"]) for row in rows]
+        )
+    return [dict(row) for row in rows]
+
+
+def renew_outbox_lease(db_path: Path, entries: List[Dict], lease_seconds: float = 300) -> List[int]:
+    """
+    Extend the lease on claimed emails that are still waiting to be sent.
+    
+    An entry whose lease already expired is left alone: once reclaimed its
+    attempts no longer match the claimed entry, and another worker may be
+    sending it.
+    
+    Args:
+        db_path: Path to the database
+        entries: Entries returned by claim_outbox_batch
+        lease_seconds: New lease, counted from now
+    
+    Returns:
+        IDs of the entries whose lease was renewed
+    """
+    now = time.time()
+    renewed = []
+    with get_connection(db_path, write=True) as conn:
+        for entry in entries:
+            cursor = conn.execute(
+                "UPDATE outbox SET next_attempt_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND attempts = ?",
+                (now + lease_seconds, now, entry["id"], OUTBOX_SENDING, entry["attempts"])
+            )
+            if cursor.rowcount:
+                renewed.append(entry["id"])
+    return renewed
+
+
+def mark_outbox_sent(db_path: Path, outbox_id: int) -> None:
+    """Mark an email as delivered and drop its message body."""
+    now = time.time()
+    with get_connection(db_path, write=True) as conn:
+        conn.execute(
+            "UPDATE outbox SET status = ?, message = NULL, attempts = attempts + 1, "
+            "last_error = NULL, updated_at = ? WHERE id = ?",
+            (OUTBOX_SENT, now, outbox_id)
+        )
+
+
+def mark_outbox_failed(
+    db_path: Path,
+    outbox_id: int,
+    error: str,
+    retry_at: Optional[float]
+) -> None:
+    """
+    Record a failed delivery attempt.
+    
+    Args:
+        db_path: Path to the database
+        outbox_id: Outbox entry ID
+        error: Error message (should already be sanitized)
+        retry_at: Unix time of the next attempt, or None to dead-letter the email
+    """
+    now = time.time()
+    status = OUTBOX_PENDING if retry_at is not None else OUTBOX_DEAD
+    with get_connection(db_path, write=True) as conn:
+        conn.execute(
+            "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ?, "
+            "next_attempt_at = ?, updated_at = ? WHERE id = ?",
+            (status, error, retry_at if retry_at is not None else now, now, outbox_id)
+        )
+
+
+def retry_outbox_email(db_path: Path, outbox_id: int) -> bool:
+    """Move a dead-lettered email back to the queue. Returns False if not dead-lettered."""
+    now = time.time()
+    with get_connection(db_path, write=True) as conn:
+        cursor = conn.execute(
+            "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ?",
+            (OUTBOX_PENDING, now, now, outbox_id, OUTBOX_DEAD)
+        )
+        return cursor.rowcount > 0
+
+
+def purge_sent_outbox(db_path: Path, older_than_seconds: float) -> int:
+    """Delete delivered emails older than the given age. Returns rows deleted."""
+    cutoff = time.time() - older_than_seconds
+    with get_connection(db_path, write=True) as conn:
+        cursor = conn.execute(
+            "DELETE FROM outbox WHERE status = ? AND updated_at < ?",
+            (OUTBOX_SENT, cutoff)
+        )
+        return cursor.rowcount
+
+
+def get_outbox_stats(db_path: Path, failures: int = 10) -> Dict:
+    """
+    Get outbox counts per status and the most recent dead-lettered emails.
+    
+    Returns:
+        Dict with "counts" ({status: count}) and "dead" (list of id, subject,
+        attempts, last_error, updated_at)
+    """
+    with get_connection(db_path) as conn:
+        counts = {status: 0 for status in (OUTBOX_PENDING, OUTBOX_SENDING, OUTBOX_SENT, OUTBOX_DEAD)}
+        for row in conn.execute("SELECT status, COUNT(*) AS count FROM outbox GROUP BY status"):
+            counts[row["status"]] = row["count"]
+        dead = conn.execute(
+            "SELECT id, subject, attempts, last_error, updated_at FROM outbox "
+            "WHERE status = ? ORDER BY updated_at DESC LIMIT ?",
+            (OUTBOX_DEAD, failures)
+        ).fetchall()
+    return {"counts": counts, "dead": [dict(row) for row in dead]}
+
+
 def generate_email_content(birthday: Dict) -> Tuple[str, str]:
     """Generate email subject and HTML body for a birthday reminder."""
     name = birthday["name"]
@@ -233,73 +1191,248 @@ def generate_email_content(birthday: Dict) -> Tuple[str, str]:
     return subject, html_body
 
 
-def export_birthdays(db_path: Path, uploads_dir: Path, export_path: Path) -> None:
-    """Export all birthdays with images to a ZIP file.
+# Bytes read from a photo, and ZIP output buffered, per chunk of an export
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Photo formats that are already compressed; deflating them again only costs CPU
+PRECOMPRESSED_IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+
+
+class _ZipOutputBuffer:
+    """
+    Write-only file object for zipfile that collects output until drained.
     
-    Args:
-        db_path: Path to the database
-        uploads_dir: Path to the uploads directory containing images
-        export_path: Path where the ZIP file should be created
+    Having no tell()/seek() makes zipfile write a streaming archive (sizes
+    in data descriptors after each entry), so nothing needs to be rewritten
+    once it has been handed out.
     """
-    # Get all birthdays
-    birthdays = get_all_birthdays(db_path)
     
-    # Prepare export data (remove age as it's calculated)
-    export_data = []
-    for bday in birthdays:
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        """Return and clear everything written so far."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+def _iter_export_json(db_path: Path) -> Iterator[bytes]:
+    """
+    Yield the export's birthdays.json in pieces, formatted as json.dumps(..., indent=2).
+    """
+    separator = "[\n  "
+    for bday in iter_birthdays(db_path):
         export_item = {
             "name": bday["name"],
             "birthday": bday["birthday"],
             "gender": bday.get("gender"),
             "photo": bday.get("photo")
         }
-        export_data.append(export_item)
+        item = json.dumps(export_item, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+        yield (separator + item).encode("utf-8")
+        separator = ",\n  "
+    yield ("[]" if separator.startswith("[") else "\n]").encode("utf-8")
+
+
+def _export_photo_path(uploads_dir: Path, photo: str) -> Path:
+    """Resolve a stored photo URL (e.g. /uploads/x.jpg) to its file in uploads_dir."""
+    photo_path = photo.lstrip("/")
+    # Remove "uploads/" prefix if present
+    if photo_path.startswith("uploads/"):
+        photo_path = photo_path[8:]  # Remove "uploads/" (8 chars)
+    return uploads_dir / photo_path
+
+
+def iter_export_zip(
+    db_path: Path,
+    uploads_dir: Path,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Generate a ZIP export of all birthdays and their photos, chunk by chunk.
+    
+    The archive holds birthdays.json and an images/ folder. Birthdays are
+    read from the database in batches and photos in chunk_size pieces, and
+    output is handed out as soon as about chunk_size bytes are ready, so
+    memory use and time to the first chunk don't grow with the archive.
+    Already-compressed photos (JPEG, PNG, WebP, GIF) are stored as-is.
     
-    # Create ZIP file
-    with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    Args:
+        db_path: Path to the database
+        uploads_dir: Path to the uploads directory containing images
+        chunk_size: Approximate size of each yielded chunk
+    
+    Yields:
+        Bytes which concatenate to the ZIP file
+    """
+    output = _ZipOutputBuffer()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
         # Add JSON file with birthday data
-        json_data = json.dumps(export_data, indent=2, ensure_ascii=False)
-        zipf.writestr("birthdays.json", json_data.encode('utf-8'))
+        with zipf.open("birthdays.json", "w") as entry:
+            for piece in _iter_export_json(db_path):
+                entry.write(piece)
+                if output.size >= chunk_size:
+                    yield output.drain()
         
-        # Add image files
-        for bday in birthdays:
-            if bday.get("photo"):
-                photo_path = bday["photo"].lstrip("/")
-                # Remove "uploads/" prefix if present
-                if photo_path.startswith("uploads/"):
-                    photo_path = photo_path[8:]  # Remove "uploads/" (8 chars)
-                source_path = uploads_dir / photo_path
-                
-                if source_path.exists():
-                    # Store in images/ folder in ZIP
-                    zip_path = f"images/{source_path.name}"
-                    zipf.write(str(source_path), zip_path)
+        # Add image files, in a second pass so photo names aren't held in memory
+        for bday in iter_birthdays(db_path):
+            if not bday.get("photo"):
+                continue
+            source_path = _export_photo_path(uploads_dir, bday["photo"])
+            if not source_path.is_file():
+                continue
+            
+            # Store in images/ folder in ZIP
+            info = zipfile.ZipInfo.from_file(source_path, f"images/{source_path.name}")
+            if source_path.suffix.lower() in PRECOMPRESSED_IMAGE_SUFFIXES:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with source_path.open("rb") as source, zipf.open(info, "w") as entry:
+                while True:
+                    data = source.read(chunk_size)
+                    if not data:
+                        break
+                    entry.write(data)
+                    if output.size >= chunk_size:
+                        yield output.drain()
+    # Closing the archive wrote the central directory
+    yield output.drain()
+
+
+def iter_csv_export(db_path: Path, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Generate a CSV export (Name, Birthday, Age, Gender, Photo) chunk by chunk.
+    
+    Rows are read with iter_birthdays, so memory use stays constant and the
+    first chunk is ready after one batch, however many birthdays there are.
+    
+    Args:
+        db_path: Path to the database
+        chunk_size: Approximate size of each yielded chunk
+    
+    Yields:
+        UTF-8 encoded pieces of the CSV file
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Name', 'Birthday', 'Age', 'Gender', 'Photo'])
+    
+    for bday in iter_birthdays(db_path):
+        writer.writerow([
+            bday.get('name', ''),
+            bday.get('birthday', ''),
+            bday.get('age', ''),
+            bday.get('gender', ''),
+            bday.get('photo', '')
+        ])
+        if output.tell() >= chunk_size:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue().encode("utf-8")
+
+
+def iter_ics_export(db_path: Path, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Generate an iCalendar export with a yearly event per birthday, chunk by chunk.
+    
+    Like iter_csv_export, rows are read in batches with iter_birthdays.
+    Birthdays that aren't valid YYYY-MM-DD dates are skipped.
+    
+    Args:
+        db_path: Path to the database
+        chunk_size: Approximate size of each yielded chunk
+    
+    Yields:
+        UTF-8 encoded pieces of the ICS file
+    """
+    output = io.StringIO()
+    output.write("BEGIN:VCALENDAR\n")
+    output.write("VERSION:2.0\n")
+    output.write("PRODID:-//Birthday Manager//EN\n")
+    output.write("CALSCALE:GREGORIAN\n")
+    
+    for bday in iter_birthdays(db_path):
+        name = bday.get('name', 'Unknown')
+        try:
+            bday_date = datetime.strptime(bday.get('birthday', ''), "%Y-%m-%d")
+        except (ValueError, TypeError):
+            continue
+        age = bday.get('age', 0)
+        
+        # Create recurring event for each year
+        output.write("BEGIN:VEVENT\n")
+        output.write(f"UID:birthday-{bday.get('id', '')}@birthday-manager\n")
+        output.write(f"DTSTART;VALUE=DATE:{bday_date.strftime('%Y%m%d')}\n")
+        output.write("RRULE:FREQ=YEARLY\n")
+        output.write(f"SUMMARY:{name}'s Birthday ({age} years old)\n")
+        output.write(f"DESCRIPTION:Happy Birthday to {name}!\n")
+        output.write("END:VEVENT\n")
+        if output.tell() >= chunk_size:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+    
+    output.write("END:VCALENDAR\n")
+    yield output.getvalue().encode("utf-8")
+
+
+def export_birthdays(db_path: Path, uploads_dir: Path, export_path: Path) -> None:
+    """Export all birthdays with images to a ZIP file.
+    
+    Args:
+        db_path: Path to the database
+        uploads_dir: Path to the uploads directory containing images
+        export_path: Path where the ZIP file should be created
+    """
+    with open(export_path, "wb") as f:
+        for chunk in iter_export_zip(db_path, uploads_dir):
+            f.write(chunk)
 
 
 def import_birthdays(
     db_path: Path,
     uploads_dir: Path,
     import_path: Path,
-    replace_existing: bool = False
+    replace_existing: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None
 ) -> Tuple[int, int, List[str]]:
     """Import birthdays from a ZIP file.
     
+    All entries are inserted in one transaction with bulk_insert_birthdays;
+    invalid entries are skipped. If the import fails or is cancelled,
+    nothing is imported and copied photos are removed again.
+    
     Args:
         db_path: Path to the database
         uploads_dir: Path to the uploads directory for images
         import_path: Path to the ZIP file to import
         replace_existing: If True, delete existing birthdays before import
+        progress: Called with (entries processed, total entries) as the
+            import advances. It may raise ImportCancelled to stop.
     
     Returns:
         Tuple of (imported_count, skipped_count, errors)
     """
-    imported = 0
-    skipped = 0
     errors = []
+    copied_photos: List[Path] = []
     
-    # Extract ZIP to temporary directory
-    temp_dir = Path(__file__).parent / "temp_import"
-    temp_dir.mkdir(exist_ok=True)
+    # Extract ZIP to a temporary directory of its own, so imports can run concurrently
+    temp_root = Path(__file__).parent / "temp_import"
+    temp_root.mkdir(exist_ok=True)
+    temp_dir = temp_root / os.urandom(8).hex()
     
     try:
         # Extract ZIP file
@@ -314,74 +1447,94 @@ def import_birthdays(
         
         with open(json_path, 'r', encoding='utf-8') as f:
             birthdays_data = json.load(f)
+        if not isinstance(birthdays_data, list):
+            errors.append("birthdays.json must contain a list of birthdays")
+            return (0, 0, errors)
         
-        # Delete existing birthdays if requested
-        if replace_existing:
-            with sqlite3.connect(str(db_path)) as conn:
-                conn.execute("DELETE FROM birthdays")
-                conn.commit()
-        
-        # Import each birthday
         images_dir = temp_dir / "images"
-        for bday_data in birthdays_data:
-            try:
-                name = bday_data.get("name", "").strip()
-                birthday = bday_data.get("birthday", "").strip()
-                
-                if not name or not birthday:
-                    skipped += 1
-                    errors.append(f"Skipped entry: missing name or birthday")
-                    continue
-                
-                # Validate date
-                try:
-                    datetime.strptime(birthday, "%Y-%m-%d")
-                except ValueError:
-                    skipped += 1
-                    errors.append(f"Skipped {name}: invalid date format")
+        total = len(birthdays_data)
+        invalid_entries = 0
+        
+        def rows() -> Iterator[Dict]:
+            nonlocal invalid_entries
+            for index, bday_data in enumerate(birthdays_data, start=1):
+                if not isinstance(bday_data, dict):
+                    invalid_entries += 1
+                    errors.append(f"Row {index}: invalid entry")
+                    if progress is not None:
+                        progress(index, total)
                     continue
                 
-                gender = bday_data.get("gender")
-                photo_path = None
-                
-                # Handle image import
-                if bday_data.get("photo"):
-                    original_photo = bday_data["photo"]
-                    # Extract filename from original path
-                    if "/" in original_photo:
-                        original_filename = original_photo.split("/")[-1]
-                    else:
-                        original_filename = original_photo
-                    
-                    # Look for image in extracted images folder
-                    source_image = images_dir / original_filename
-                    if not source_image.exists():
-                        # Try to find by any name in images folder
-                        image_files = list(images_dir.glob("*"))
-                        if image_files:
-                            source_image = image_files[0]  # Use first found image
-                        else:
-                            source_image = None
-                    
-                    if source_image and source_image.exists():
-                        # Copy to uploads directory with unique name
-                        unique_filename = f"{os.urandom(8).hex()}-{source_image.name}"
-                        dest_path = uploads_dir / unique_filename
-                        shutil.copy2(str(source_image), str(dest_path))
-                        photo_path = f"/uploads/{unique_filename}"
+                name = str(bday_data.get("name") or "").strip()
+                birthday = str(bday_data.get("birthday") or "").strip()
+                row = {"name": name, "birthday": birthday, "gender": bday_data.get("gender"), "photo": None}
                 
-                # Add birthday to database
-                add_birthday(db_path, name, birthday, gender, photo_path)
-                imported += 1
+                # Handle image import (only for entries that will be inserted)
+                if name and bday_data.get("photo") and _is_valid_birthday(birthday):
+                    try:
+                        row["photo"] = _import_photo(images_dir, uploads_dir, str(bday_data["photo"]), copied_photos)
+                    except OSError as e:
+                        errors.append(f"Could not import photo for {name}: {str(e)}")
                 
-            except Exception as e:
-                skipped += 1
-                errors.append(f"Error importing {bday_data.get('name', 'unknown')}: {str(e)}")
+                yield row
+                if progress is not None:
+                    progress(index, total)
         
+        imported, row_errors = bulk_insert_birthdays(
+            db_path,
+            rows(),
+            allow_partial=True,
+            replace_existing=replace_existing
+        )
+        for error in row_errors:
+            if error["name"]:
+                errors.append(f"Skipped {error['name']}: {error['error']}")
+            else:
+                errors.append("Skipped entry: missing name or birthday")
+        
+        return (imported, len(row_errors) + invalid_entries, errors)
+    except BaseException:
+        # Nothing was committed; don't leave the copied photos behind
+        for photo in copied_photos:
+            photo.unlink(missing_ok=True)
+        raise
     finally:
         # Clean up temporary directory
         if temp_dir.exists():
             shutil.rmtree(temp_dir, ignore_errors=True)
-    
-    return (imported, skipped, errors)
 
+
+def _is_valid_birthday(birthday: str) -> bool:
+    """Check whether normalize_birthday accepts a birthday."""
+    try:
+        normalize_birthday(birthday)
+        return True
+    except ValueError:
+        return False
+
+
+def _import_photo(images_dir: Path, uploads_dir: Path, original_photo: str, copied: List[Path]) -> Optional[str]:
+    """
+    Copy an imported entry's photo into uploads_dir under a unique name.
+    
+    Returns:
+        The photo URL (/uploads/...), or None if the archive has no image
+    """
+    # Extract filename from original path
+    original_filename = original_photo.split("/")[-1]
+    
+    # Look for image in extracted images folder
+    source_image = images_dir / original_filename
+    if not source_image.is_file():
+        # Try to find by any name in images folder
+        image_files = sorted(images_dir.glob("*")) if images_dir.is_dir() else []
+        if not image_files:
+            return None
+        source_image = image_files[0]  # Use first found image
+    
+    # Copy to uploads directory with unique name
+    unique_filename = f"{os.urandom(8).hex()}-{source_image.name}"
+    dest_path = uploads_dir / unique_filename
+    shutil.copy2(str(source_image), str(dest_path))
+    copied.append(dest_path)
+    return f"/uploads/{unique_filename}"
@@ -0,0 +1,260 @@
+"""SQLite connection pooling for birthday reminder application."""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+from logger import add_log_timing
+from metrics import DB_OPERATIONS
+
+
+# PRAGMAs applied once when a pooled connection is opened
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+]
+
+
+def get_pool_size() -> int:
+    """Get the configured pool size from DB_POOL_SIZE env var (default 4)."""
+    try:
+        return max(1, int(os.getenv("DB_POOL_SIZE", 4)))
+    except ValueError:
+        return 4
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections for a single database file.
+
+    Connections are opened lazily up to ``size`` and handed back to an idle
+    queue after use, so PRAGMA setup and page-cache warmup happen once per
+    connection instead of once per query.
+    """
+
+    def __init__(self, db_path: Union[str, Path], size: Optional[int] = None, timeout: float = 30.0):
+        self.db_path = str(db_path)
+        self.size = size if size is not None else get_pool_size()
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "discarded": 0,
+            "errors": 0,
+        }
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a new connection and apply per-connection PRAGMAs."""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, open a new one, or wait for a free slot."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats["reused"] += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._open < self.size
+            if can_open:
+                self._open += 1
+
+        if can_open:
+            try:
+                conn = self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._open -= 1
+                    self._stats["errors"] += 1
+                raise
+            with self._lock:
+                self._stats["created"] += 1
+            return conn
+
+        with self._lock:
+            self._stats["waits"] += 1
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out waiting for a database connection (pool size {self.size})"
+            )
+        with self._lock:
+            self._stats["reused"] += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Close a connection and free its slot."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._open -= 1
+            self._stats["discarded"] += 1
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the idle queue, rolling back any open transaction."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        if self._closed:
+            self._discard(conn)
+            return
+
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a ``with`` block.
+
+        The block runs as a transaction: it commits on success and rolls
+        back on error, matching ``with sqlite3.connect(...) as conn``.
+        With ``write=True`` the transaction takes SQLite's write lock up
+        front (BEGIN IMMEDIATE), so read-then-write blocks can't fail with
+        SQLITE_BUSY when several threads or worker processes write at once.
+        """
+        started = time.perf_counter()
+        conn = self._acquire()
+        with self._lock:
+            self._stats["checkouts"] += 1
+        try:
+            with conn:
+                if write:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+        except sqlite3.Error:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            self._release(conn)
+            elapsed = time.perf_counter() - started
+            add_log_timing("db_ms", elapsed)
+            DB_OPERATIONS.observe(elapsed, "write" if write else "read")
+
+    def check_health(self) -> bool:
+        """Run a trivial query on a pooled connection."""
+        try:
+            with self.connection() as conn:
+                conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def stats(self) -> Dict:
+        """Get pool counters and current occupancy."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open"] = self._open
+        stats["idle"] = self._idle.qsize()
+        stats["in_use"] = stats["open"] - stats["idle"]
+        stats["size"] = self.size
+        return stats
+
+    def close(self) -> None:
+        """Close all idle connections; in-use connections close on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Union[str, Path]) -> ConnectionPool:
+    """Get (or create) the shared pool for a database file."""
+    key = str(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(key)
+                _pools[key] = pool
+    return pool
+
+
+@contextmanager
+def get_connection(db_path: Union[str, Path], write: bool = False) -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled connection for the given database file."""
+    with get_pool(db_path).connection(write=write) as conn:
+        yield conn
+
+
+@contextmanager
+def read_snapshot(db_path: Union[str, Path]) -> Iterator[sqlite3.Connection]:
+    """
+    Open a dedicated connection holding one read transaction.
+    
+    Every query on it sees the database as of its first query, so a result
+    read in several batches is consistent. It isn't pooled: a long-running
+    consumer (such as a streamed response to a slow client) doesn't hold a
+    pool slot. While it is open, WAL checkpoints can't pass the snapshot.
+    """
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    try:
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute("BEGIN")
+        yield conn
+    finally:
+        # Closing ends the read transaction
+        conn.close()
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    """Get stats for every open pool, keyed by database path."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {path: pool.stats() for path, pool in pools}
+
+
+def close_pools(db_path: Optional[Union[str, Path]] = None) -> None:
+    """Close the pool for one database file, or all pools if none given."""
+    with _pools_lock:
+        if db_path is None:
+            pools = list(_pools.values())
+            _pools.clear()
+        else:
+            pool = _pools.pop(str(db_path), None)
+            pools = [pool] if pool else []
+    for pool in pools:
+        pool.close()
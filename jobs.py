@@ -0,0 +1,491 @@
+"""Background import jobs, with progress kept in a small SQLite database."""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core import ImportCancelled, bulk_insert_birthdays, import_birthdays, iter_csv_birthdays
+from db import get_connection
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Job statuses. A job is "running" while one worker owns it; the worker
+# refreshes updated_at, so a job left running by a dead process goes stale.
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+JOB_KINDS = ("csv", "zip")
+
+# Row errors kept per job for the status endpoint
+MAX_JOB_ERRORS = 10
+
+JOBS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS import_jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        filename TEXT,
+        file_path TEXT NOT NULL,
+        options TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL,
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        rows_processed INTEGER NOT NULL DEFAULT 0,
+        total_rows INTEGER,
+        bytes_processed INTEGER NOT NULL DEFAULT 0,
+        total_bytes INTEGER,
+        imported INTEGER NOT NULL DEFAULT 0,
+        skipped INTEGER NOT NULL DEFAULT 0,
+        errors TEXT NOT NULL DEFAULT '[]',
+        message TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        updated_at REAL NOT NULL,
+        finished_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs (status, created_at)",
+]
+
+# Columns a running job may update with update_import_job
+PROGRESS_FIELDS = ("rows_processed", "total_rows", "bytes_processed", "total_bytes")
+
+
+def get_jobs_db_path(db_path: Path) -> Path:
+    """
+    Get the job database, stored next to the birthday database.
+    
+    Jobs live in a file of their own because an import holds the birthday
+    database's write lock until it commits, and progress (and cancel
+    requests) must be writable meanwhile, from any worker process.
+    """
+    return Path(db_path).with_name("import_jobs.db")
+
+
+def init_jobs_database(jobs_db: Path) -> None:
+    """Create the import_jobs table if needed."""
+    with get_connection(jobs_db, write=True) as conn:
+        for statement in JOBS_SCHEMA:
+            conn.execute(statement)
+
+
+def _job_from_row(row) -> Dict:
+    job = dict(row)
+    job["options"] = json.loads(job["options"])
+    job["errors"] = json.loads(job["errors"])
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def create_import_job(
+    jobs_db: Path,
+    kind: str,
+    file_path: Path,
+    filename: Optional[str] = None,
+    options: Optional[Dict] = None,
+    total_bytes: Optional[int] = None
+) -> str:
+    """
+    Queue an import of an uploaded file.
+    
+    Args:
+        jobs_db: Path to the job database
+        kind: "csv" or "zip"
+        file_path: Saved upload; deleted when the job finishes
+        filename: Original file name, for display
+        options: Import options ("replace", and "partial" for CSV)
+        total_bytes: Size of the upload, used for CSV progress
+    
+    Returns:
+        The new job's ID
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown import kind: {kind}")
+    job_id = os.urandom(16).hex()
+    now = time.time()
+    with get_connection(jobs_db, write=True) as conn:
+        conn.execute(
+            "INSERT INTO import_jobs (id, kind, filename, file_path, options, status, total_bytes, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, filename, str(file_path), json.dumps(options or {}), JOB_PENDING,
+             total_bytes, now, now)
+        )
+    return job_id
+
+
+def claim_import_job(jobs_db: Path, stale_seconds: float = 300) -> Optional[Dict]:
+    """
+    Claim the oldest pending job, marking it running.
+    
+    Running jobs that haven't reported progress for stale_seconds (their
+    worker process died) are marked failed first. Nothing is claimed while
+    another job is still running: an import holds the birthday database's
+    write lock until it commits, so a second one would fail with "database
+    is locked" instead of waiting its turn.
+    
+    Returns:
+        The claimed job, or None if there is nothing to do
+    """
+    now = time.time()
+    with get_connection(jobs_db, write=True) as conn:
+        conn.execute(
+            "UPDATE import_jobs SET status = ?, message = ?, finished_at = ?, updated_at = ? "
+            "WHERE status = ? AND updated_at < ?",
+            (JOB_FAILED, "Import interrupted; no birthdays were imported", now, now,
+             JOB_RUNNING, now - stale_seconds)
+        )
+        # Checked in the same write transaction, so two workers can't both
+        # see no running job
+        if conn.execute("SELECT 1 FROM import_jobs WHERE status = ? LIMIT 1", (JOB_RUNNING,)).fetchone():
+            return None
+        row = conn.execute(
+            "SELECT * FROM import_jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+            (JOB_PENDING,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE import_jobs SET status = ?, started_at = ?, updated_at = ? WHERE id = ?",
+            (JOB_RUNNING, now, now, row["id"])
+        )
+    job = _job_from_row(row)
+    job.update(status=JOB_RUNNING, started_at=now, updated_at=now)
+    return job
+
+
+def update_import_job(jobs_db: Path, job_id: str, **fields) -> bool:
+    """
+    Record a running job's progress.
+    
+    Args:
+        jobs_db: Path to the job database
+        job_id: Job ID
+        **fields: Any of PROGRESS_FIELDS
+    
+    Returns:
+        True if cancellation has been requested
+    """
+    unknown = set(fields) - set(PROGRESS_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+    assignments = "".join(f"{field} = ?, " for field in fields)
+    with get_connection(jobs_db, write=True) as conn:
+        conn.execute(
+            f"UPDATE import_jobs SET {assignments}updated_at = ? WHERE id = ?",
+            (*fields.values(), time.time(), job_id)
+        )
+        row = conn.execute("SELECT cancel_requested FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+    return bool(row and row["cancel_requested"])
+
+
+def finish_import_job(
+    jobs_db: Path,
+    job_id: str,
+    status: str,
+    message: str,
+    imported: int = 0,
+    skipped: int = 0,
+    errors: Optional[List[str]] = None,
+    rows_processed: Optional[int] = None
+) -> None:
+    """Record a job's outcome. errors should already be sanitized."""
+    now = time.time()
+    with get_connection(jobs_db, write=True) as conn:
+        conn.execute(
+            "UPDATE import_jobs SET status = ?, message = ?, imported = ?, skipped = ?, errors = ?, "
+            "rows_processed = COALESCE(?, rows_processed), finished_at = ?, updated_at = ? WHERE id = ?",
+            (status, message, imported, skipped, json.dumps((errors or [])[:MAX_JOB_ERRORS]),
+             rows_processed, now, now, job_id)
+        )
+
+
+def get_import_job(jobs_db: Path, job_id: str) -> Optional[Dict]:
+    """Get a job by ID, or None if it doesn't exist."""
+    with get_connection(jobs_db) as conn:
+        row = conn.execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_from_row(row) if row else None
+
+
+def cancel_import_job(jobs_db: Path, job_id: str) -> bool:
+    """
+    Cancel a job. A pending job is cancelled at once; a running job stops
+    (and rolls back) at its next progress report.
+    
+    Returns:
+        False if the job doesn't exist or has already finished
+    """
+    now = time.time()
+    with get_connection(jobs_db, write=True) as conn:
+        cursor = conn.execute(
+            "UPDATE import_jobs SET status = ?, message = ?, finished_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ?",
+            (JOB_CANCELLED, "Import cancelled", now, now, job_id, JOB_PENDING)
+        )
+        if cursor.rowcount:
+            return True
+        cursor = conn.execute(
+            "UPDATE import_jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+            (job_id, JOB_RUNNING)
+        )
+        return cursor.rowcount > 0
+
+
+def purge_import_jobs(jobs_db: Path, older_than_seconds: float) -> List[str]:
+    """
+    Delete finished jobs older than the given age.
+    
+    Returns:
+        Upload paths of the deleted jobs, for files a dead worker left behind
+    """
+    cutoff = time.time() - older_than_seconds
+    placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+    with get_connection(jobs_db, write=True) as conn:
+        rows = conn.execute(
+            f"SELECT file_path FROM import_jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+            (*FINISHED_STATUSES, cutoff)
+        ).fetchall()
+        conn.execute(
+            f"DELETE FROM import_jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+            (*FINISHED_STATUSES, cutoff)
+        )
+    return [row["file_path"] for row in rows]
+
+
+def describe_import_job(job: Dict, now: Optional[float] = None) -> Dict:
+    """
+    Build the API view of a job, with throughput and ETA.
+    
+    progress is the completed fraction (0-1) when the job's size is known:
+    entries for ZIP imports, bytes read for CSV imports. eta_seconds
+    extrapolates the elapsed time from it.
+    """
+    now = now if now is not None else time.time()
+    if job["total_rows"]:
+        progress = job["rows_processed"] / job["total_rows"]
+    elif job["total_bytes"]:
+        progress = job["bytes_processed"] / job["total_bytes"]
+    else:
+        progress = None
+    
+    throughput = None
+    eta_seconds = None
+    if job["started_at"]:
+        elapsed = (job["finished_at"] or now) - job["started_at"]
+        if elapsed > 0:
+            throughput = round(job["rows_processed"] / elapsed, 1)
+        if job["status"] == JOB_RUNNING and progress:
+            eta_seconds = round(elapsed * (1 - progress) / progress, 1)
+    if job["status"] == JOB_COMPLETED:
+        progress = 1.0
+    
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "filename": job["filename"],
+        "status": job["status"],
+        "finished": job["status"] in FINISHED_STATUSES,
+        "cancel_requested": job["cancel_requested"],
+        "rows_processed": job["rows_processed"],
+        "total_rows": job["total_rows"],
+        "progress": round(min(progress, 1.0), 4) if progress is not None else None,
+        "throughput": throughput,
+        "eta_seconds": eta_seconds,
+        "imported": job["imported"],
+        "skipped": job["skipped"],
+        "errors": job["errors"],
+        "message": job["message"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def format_row_error(error: Dict) -> str:
+    """Format a bulk_insert_birthdays error for display."""
+    return f"Row {error['row']} ({error['name'] or 'no name'}): {error['error']}"
+
+
+class _CountingReader:
+    """Binary file wrapper that counts the bytes read through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class ImportJobWorker:
+    """
+    Background thread that runs queued import jobs, one at a time.
+    
+    Progress is written to the job database at most every
+    progress_interval seconds, which is also when cancel requests are
+    noticed. Imports run in a single transaction, so a cancelled or failed
+    job leaves the birthdays untouched. Several workers (e.g. one per
+    server process) can share the job database: each job is claimed once,
+    and only one job runs at a time across all of them.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        uploads_dir: Path,
+        sanitize: Callable[[str], str] = str,
+        poll_interval: float = 5.0,
+        progress_interval: float = 0.5,
+        stale_seconds: float = 300,
+        finished_retention: float = 24 * 3600
+    ):
+        """
+        Args:
+            db_path: Path to the birthday database
+            uploads_dir: Directory imported photos are copied to
+            sanitize: Redacts secrets from error text before it is stored
+            poll_interval: Seconds to sleep when no job is pending
+            progress_interval: Minimum seconds between progress writes
+            stale_seconds: Seconds without progress after which a running
+                job is considered abandoned
+            finished_retention: Seconds to keep finished jobs before purging
+        """
+        self.db_path = db_path
+        self.jobs_db = get_jobs_db_path(db_path)
+        self.uploads_dir = uploads_dir
+        self.sanitize = sanitize
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+        self.stale_seconds = stale_seconds
+        self.finished_retention = finished_retention
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+        init_jobs_database(self.jobs_db)
+
+    def start(self) -> None:
+        """Start the background thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="import-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop after the current job, waiting up to timeout seconds."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self) -> None:
+        """Check for pending jobs now instead of waiting for the next poll."""
+        self._wake.set()
+
+    def is_alive(self) -> bool:
+        """Check whether the background thread is running."""
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self) -> None:
+        """Run pending jobs until stopped."""
+        while not self._stop.is_set():
+            try:
+                job = claim_import_job(self.jobs_db, self.stale_seconds)
+            except Exception as e:
+                logger.error(f"Import worker error: {self.sanitize(str(e))}")
+                job = None
+            
+            if job is not None:
+                self.run_job(job)
+                continue
+            
+            self._purge_finished()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _purge_finished(self) -> None:
+        """Delete old finished jobs, at most once an hour."""
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        try:
+            for file_path in purge_import_jobs(self.jobs_db, self.finished_retention):
+                Path(file_path).unlink(missing_ok=True)
+        except Exception as e:
+            logger.error(f"Import job purge failed: {self.sanitize(str(e))}")
+
+    def run_job(self, job: Dict) -> None:
+        """Run a claimed job to completion, failure or cancellation."""
+        job_id = job["id"]
+        file_path = Path(job["file_path"])
+        options = job["options"]
+        last_report = 0.0
+        
+        def report(**fields) -> None:
+            """Write progress if due; raise ImportCancelled if cancel was requested."""
+            nonlocal last_report
+            now = time.monotonic()
+            if now - last_report < self.progress_interval:
+                return
+            last_report = now
+            if update_import_job(self.jobs_db, job_id, **fields):
+                raise ImportCancelled()
+        
+        try:
+            if job["kind"] == "csv":
+                allow_partial = options.get("partial", True)
+                with open(file_path, "rb") as f:
+                    reader = _CountingReader(f)
+                    # Photos aren't imported from CSV
+                    rows = ({**row, "photo": None} for row in iter_csv_birthdays(reader))
+                    imported, row_errors = bulk_insert_birthdays(
+                        self.db_path,
+                        rows,
+                        allow_partial=allow_partial,
+                        replace_existing=options.get("replace", False),
+                        progress=lambda count: report(rows_processed=count, bytes_processed=reader.bytes_read)
+                    )
+                skipped = len(row_errors)
+                errors = [format_row_error(error) for error in row_errors[:MAX_JOB_ERRORS]]
+                if row_errors and not allow_partial:
+                    finish_import_job(
+                        self.jobs_db, job_id, JOB_FAILED,
+                        f"Import cancelled: {skipped} invalid rows",
+                        skipped=skipped, errors=errors, rows_processed=imported + skipped
+                    )
+                    return
+            else:
+                imported, skipped, errors = import_birthdays(
+                    self.db_path,
+                    self.uploads_dir,
+                    file_path,
+                    options.get("replace", False),
+                    progress=lambda done, total: report(rows_processed=done, total_rows=total)
+                )
+            
+            finish_import_job(
+                self.jobs_db, job_id, JOB_COMPLETED,
+                f"Import completed: {imported} imported, {skipped} skipped",
+                imported=imported, skipped=skipped, errors=errors, rows_processed=imported + skipped
+            )
+            logger.info(f"Import job {job_id} completed: {imported} imported, {skipped} skipped")
+        except ImportCancelled:
+            finish_import_job(self.jobs_db, job_id, JOB_CANCELLED, "Import cancelled; no birthdays were imported")
+            logger.info(f"Import job {job_id} cancelled")
+        except UnicodeDecodeError:
+            finish_import_job(self.jobs_db, job_id, JOB_FAILED, "CSV file must be UTF-8 encoded")
+        except Exception as e:
+            error_text = self.sanitize(str(e))
+            logger.error(f"Import job {job_id} failed: {error_text}")
+            finish_import_job(self.jobs_db, job_id, JOB_FAILED, f"Import failed: {error_text}")
+        finally:
+            file_path.unlink(missing_ok=True)
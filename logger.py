@@ -1,49 +1,169 @@
 """Centralized logging configuration with file rotation and console toggle."""
+import atexit
+import json
 import os
 import logging
+import queue
 import re
-from logging.handlers import RotatingFileHandler
+import threading
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Keys whose values are redacted. All keys share one pattern so a message is
+# scanned once; the value may be bare, or quoted as in JSON/repr output.
+_REDACT_PATTERN = re.compile(
+    r'(?P<key>smtpPassword|password|passwd|pwd|client_id|client_secret|refresh_token|token'
+    r'|api[_-]?key|secret[_-]?key)'
+    r'["\']?\s*[:=]\s*(?:"[^"]*"|\'[^\']*\'|\S+)',
+    re.IGNORECASE
+)
+
+# Lowercase substrings at least one of which appears in any redactable text
+_REDACT_HINTS = ("pass", "pwd", "token", "secret", "client_id", "key")
+
+
+def redact(text: str) -> str:
+    """
+    Redact credentials (passwords, tokens, client secrets, API keys) from text.
+    
+    Used for log records and for error messages returned by the API.
+    
+    Args:
+        text: Text that may contain "key: value" or "key=value" secrets
+        
+    Returns:
+        Text with each secret value replaced by [REDACTED]
+    """
+    # Most messages have no key/value separator or no secret-like word at all
+    if ":" not in text and "=" not in text:
+        return text
+    lowered = text.lower()
+    if not any(hint in lowered for hint in _REDACT_HINTS):
+        return text
+    return _REDACT_PATTERN.sub(r'\g<key>: [REDACTED]', text)
 
 
 class SanitizedFormatter(logging.Formatter):
     """Formatter that sanitizes sensitive data from log messages."""
     
-    SENSITIVE_PATTERNS = [
-        (r'(password|passwd|pwd)\s*[:=]\s*\S+', r'\1: [REDACTED]'),
-        (r'smtpPassword["\']?\s*[:=]\s*["\']?[^"\']+', 'smtpPassword: [REDACTED]'),
-        (r'(client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]'),
-        (r'(api[_-]?key|secret[_-]?key)\s*[:=]\s*\S+', r'\1: [REDACTED]'),
-    ]
-    
     def format(self, record):
         """Format log record and sanitize sensitive data."""
-        msg = super().format(record)
-        for pattern, replacement in self.SENSITIVE_PATTERNS:
-            msg = re.sub(pattern, replacement, msg, flags=re.IGNORECASE)
-        return msg
+        return redact(super().format(record))
 
 
-def setup_logger(name: str = __name__, log_to_console: bool = None) -> logging.Logger:
+# Per-request fields attached to every record logged while handling a request
+LOG_CONTEXT_FIELDS = ("request_id", "route", "method", "status", "db_ms", "smtp_ms", "duration_ms")
+
+_log_context: ContextVar[Optional[Dict]] = ContextVar("log_context", default=None)
+
+
+def start_log_context(**fields) -> Dict:
     """
-    Set up a logger with file rotation and optional console output.
+    Start collecting per-request log fields for the current thread/context.
     
-    Args:
-        name: Logger name (typically __name__)
-        log_to_console: Whether to log to console. If None, reads from LOG_TO_CONSOLE env var.
-        
     Returns:
-        Configured logger instance
+        The context dict; update it to change fields on later records
     """
-    logger = logging.getLogger(name)
+    context = {"db_ms": 0.0, "smtp_ms": 0.0}
+    context.update(fields)
+    _log_context.set(context)
+    return context
+
+
+def get_log_context() -> Optional[Dict]:
+    """Get the current per-request log fields, or None outside a request."""
+    return _log_context.get()
+
+
+def end_log_context() -> None:
+    """Stop attaching per-request fields to records."""
+    _log_context.set(None)
+
+
+def add_log_timing(field: str, seconds: float) -> None:
+    """Add elapsed time (in ms) to a timing field of the current request, if any."""
+    context = _log_context.get()
+    if context is not None:
+        context[field] = context.get(field, 0.0) + seconds * 1000
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the current per-request fields onto each record as it is logged."""
     
-    # Don't add handlers if logger already configured
-    if logger.handlers:
-        return logger
+    def filter(self, record):
+        context = _log_context.get()
+        if context:
+            for field, value in context.items():
+                setattr(record, field, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatter that writes each record as one sanitized JSON object per line."""
     
-    # Set log level from environment
-    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
-    logger.setLevel(getattr(logging, log_level, logging.INFO))
+    def format(self, record):
+        """Format log record as JSON, including any per-request fields."""
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        for field in LOG_CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = round(value, 2) if isinstance(value, float) else value
+        if record.exc_info:
+            entry["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def is_json_logging() -> bool:
+    """Check whether LOG_FORMAT selects JSON lines for the log file."""
+    return os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+
+
+_context_filter = RequestContextFilter()
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue.
+    
+    When the queue is full the logging thread waits up to block_timeout
+    seconds for the writer to catch up (backpressure), then drops the
+    record and counts it instead of raising.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, block_timeout: float = 1.0):
+        super().__init__(log_queue)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put(record, timeout=self.block_timeout)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Async logging state: one queue and one writer thread per process
+_queue_handler = None
+_queue_listener = None
+_queue_lock = threading.Lock()
+
+
+def is_async_logging() -> bool:
+    """Check whether LOG_ASYNC enables the background writer thread."""
+    return os.getenv('LOG_ASYNC', 'false').lower() in ('true', '1', 'yes')
+
+
+def _create_handlers(log_to_console: bool) -> List[logging.Handler]:
+    """Create the rotating file handler and, optionally, a console handler."""
+    handlers = []
     
     # Get log directory from environment
     log_dir = Path(os.getenv('LOG_DIR', './logs'))
@@ -61,17 +181,17 @@ def setup_logger(name: str = __name__, log_to_console: bool = None) -> logging.L
         encoding='utf-8'
     )
     file_handler.setLevel(logging.DEBUG)
-    file_formatter = SanitizedFormatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if is_json_logging():
+        file_formatter = JsonFormatter(datefmt='%Y-%m-%dT%H:%M:%S%z')
+    else:
+        file_formatter = SanitizedFormatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+    handlers.append(file_handler)
     
     # Console handler (optional)
-    if log_to_console is None:
-        log_to_console = os.getenv('LOG_TO_CONSOLE', 'false').lower() in ('true', '1', 'yes')
-    
     if log_to_console:
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
@@ -80,7 +200,111 @@ def setup_logger(name: str = __name__, log_to_console: bool = None) -> logging.L
             datefmt='%H:%M:%S'
         )
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
-    return logger
+    return handlers
+
 
+def _new_log_queue() -> queue.Queue:
+    """Create the bounded record queue (size from LOG_QUEUE_SIZE, default 10000)."""
+    return queue.Queue(maxsize=max(1, int(os.getenv('LOG_QUEUE_SIZE', 10000))))
+
+
+def _get_queue_handler(log_to_console: bool) -> BoundedQueueHandler:
+    """
+    Get the process-wide queue handler, starting the writer thread on first use.
+    
+    All loggers share one queue and one set of file/console handlers, so the
+    log file has a single writer; the console setting of the first logger
+    applies.
+    """
+    global _queue_handler, _queue_listener
+    with _queue_lock:
+        if _queue_handler is None:
+            _queue_handler = BoundedQueueHandler(_new_log_queue())
+            _queue_listener = QueueListener(
+                _queue_handler.queue,
+                *_create_handlers(log_to_console),
+                respect_handler_level=True
+            )
+            _queue_listener.start()
+            atexit.register(shutdown_logging)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_restart_listener_after_fork)
+        return _queue_handler
+
+
+def _restart_listener_after_fork() -> None:
+    """Give a forked child (e.g. a gunicorn worker) its own queue and writer thread."""
+    global _queue_listener
+    if _queue_listener is None:
+        return
+    _queue_handler.queue = _new_log_queue()
+    _queue_listener = QueueListener(
+        _queue_handler.queue,
+        *_queue_listener.handlers,
+        respect_handler_level=True
+    )
+    _queue_listener.start()
+
+
+def shutdown_logging() -> None:
+    """Write out all queued records and stop the writer thread (async mode only)."""
+    global _queue_listener
+    with _queue_lock:
+        listener, _queue_listener = _queue_listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+
+
+def get_logging_stats() -> Dict:
+    """Get async logging queue depth and dropped record count."""
+    if _queue_handler is None:
+        return {"async": False, "queued": 0, "dropped": 0}
+    return {
+        "async": True,
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+    }
+
+
+def setup_logger(name: str = __name__, log_to_console: bool = None) -> logging.Logger:
+    """
+    Set up a logger with file rotation and optional console output.
+    
+    With LOG_ASYNC enabled, the logger gets a queue handler instead and the
+    file/console handlers run on a background writer thread, so callers
+    never wait on disk I/O or log rotation.
+    
+    Args:
+        name: Logger name (typically __name__)
+        log_to_console: Whether to log to console. If None, reads from LOG_TO_CONSOLE env var.
+        
+    Returns:
+        Configured logger instance
+    """
+    logger = logging.getLogger(name)
+    
+    # Don't add handlers if logger already configured
+    if logger.handlers:
+        return logger
+    
+    # Set log level from environment
+    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    logger.setLevel(getattr(logging, log_level, logging.INFO))
+    
+    if log_to_console is None:
+        log_to_console = os.getenv('LOG_TO_CONSOLE', 'false').lower() in ('true', '1', 'yes')
+    
+    # Attach per-request fields on the calling thread (before any queue hand-off)
+    logger.addFilter(_context_filter)
+    
+    if is_async_logging():
+        logger.addHandler(_get_queue_handler(log_to_console))
+    else:
+        for handler in _create_handlers(log_to_console):
+            logger.addHandler(handler)
+    
+    return logger
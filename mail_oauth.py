@@ -5,14 +5,24 @@ import urllib.parse
 import urllib.error
 import json
 import base64
-from typing import Tuple, Optional
+import hashlib
+import threading
+import time
+from typing import Dict, Tuple, Optional
 from email.message import EmailMessage
 from email.mime.multipart import MIMEMultipart
 
+from logger import add_log_timing
+from metrics import OAUTH_TOKEN_FETCHES, SMTP_CONNECT_LATENCY, SMTP_SEND_LATENCY, SMTP_SENDS
 
-def fetch_access_token(client_id: str, client_secret: str, refresh_token: str) -> str:
+
+# Refresh cached access tokens this many seconds before Google expires them
+TOKEN_EXPIRY_MARGIN = 300
+
+
+def request_access_token(client_id: str, client_secret: str, refresh_token: str) -> Tuple[str, int]:
     """
-    Fetch OAuth2 access token from Google using refresh token.
+    Request a new OAuth2 access token from Google using refresh token.
     
     Args:
         client_id: Google OAuth2 client ID
@@ -20,7 +30,7 @@ def fetch_access_token(client_id: str, client_secret: str, refresh_token: str) -
         refresh_token: OAuth2 refresh token
         
     Returns:
-        Access token string
+        Tuple of (access_token, expires_in seconds)
         
     Raises:
         Exception: If token fetch fails
@@ -42,7 +52,7 @@ def fetch_access_token(client_id: str, client_secret: str, refresh_token: str) -
             result = json.loads(response.read().decode("utf-8"))
             if "access_token" not in result:
                 raise Exception(f"Token response missing access_token: {result.get('error', 'Unknown error')}")
-            return result["access_token"]
+            return result["access_token"], int(result.get("expires_in", 3600))
     except urllib.error.HTTPError as e:
         error_body = e.read().decode("utf-8") if e.fp else "Unknown error"
         try:
@@ -55,6 +65,147 @@ def fetch_access_token(client_id: str, client_secret: str, refresh_token: str) -
         raise Exception(f"Failed to fetch access token: {str(e)}")
 
 
+class AccessTokenCache:
+    """
+    In-process cache of OAuth2 access tokens.
+    
+    Entries are keyed by client ID and a hash of the refresh token (the
+    refresh token itself is never used as a key) and expire
+    TOKEN_EXPIRY_MARGIN seconds before Google's expires_in. Concurrent
+    callers needing the same token share one refresh request. Expired
+    tokens and the refresh locks of uncached credentials are pruned on the
+    next miss, so rotated credentials don't accumulate.
+    """
+    
+    def __init__(self, margin: float = TOKEN_EXPIRY_MARGIN):
+        self.margin = margin
+        self._tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._refresh_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+    
+    @staticmethod
+    def _key(client_id: str, refresh_token: str) -> Tuple[str, str]:
+        return client_id, hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+    
+    def _lookup(self, key: Tuple[str, str]) -> Optional[str]:
+        """Get a cached token that is still valid, or None."""
+        entry = self._tokens.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+    
+    def _prune(self) -> None:
+        """Drop expired tokens and idle refresh locks without a cached token. Call with _lock held."""
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in self._tokens.items() if expires <= now]:
+            del self._tokens[key]
+        for key in [key for key, lock in self._refresh_locks.items() if key not in self._tokens and not lock.locked()]:
+            del self._refresh_locks[key]
+    
+    def get(self, client_id: str, client_secret: str, refresh_token: str, force_refresh: bool = False) -> str:
+        """
+        Get a valid access token, refreshing it if missing or about to expire.
+        
+        Args:
+            client_id: Google OAuth2 client ID
+            client_secret: Google OAuth2 client secret
+            refresh_token: OAuth2 refresh token
+            force_refresh: Ignore any cached token (e.g. after it was rejected)
+            
+        Returns:
+            Access token string
+            
+        Raises:
+            Exception: If token fetch fails
+        """
+        key = self._key(client_id, refresh_token)
+        with self._lock:
+            token = None if force_refresh else self._lookup(key)
+            if token:
+                self._stats["hits"] += 1
+                return token
+            self._stats["misses"] += 1
+            self._prune()
+            stale = self._tokens.get(key)
+            refresh_lock = self._refresh_locks.setdefault(key, threading.Lock())
+        
+        with refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            with self._lock:
+                entry = self._tokens.get(key)
+                token = self._lookup(key)
+            if token and entry is not stale:
+                return token
+            
+            started = time.perf_counter()
+            try:
+                token, expires_in = request_access_token(client_id, client_secret, refresh_token)
+            except Exception:
+                OAUTH_TOKEN_FETCHES.observe(time.perf_counter() - started, "failure")
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            OAUTH_TOKEN_FETCHES.observe(time.perf_counter() - started, "success")
+            
+            with self._lock:
+                self._tokens[key] = (token, time.monotonic() + max(0, expires_in - self.margin))
+                self._stats["refreshes"] += 1
+            return token
+    
+    def invalidate(self, client_id: str, refresh_token: str) -> None:
+        """Drop the cached token for these credentials."""
+        with self._lock:
+            self._tokens.pop(self._key(client_id, refresh_token), None)
+            self._prune()
+    
+    def clear(self) -> None:
+        """Drop all cached tokens."""
+        with self._lock:
+            self._tokens.clear()
+            self._prune()
+    
+    def stats(self) -> Dict:
+        """Get hit/miss/refresh counters and the number of cached tokens."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached"] = len(self._tokens)
+            stats["refresh_locks"] = len(self._refresh_locks)
+        return stats
+
+
+_token_cache = AccessTokenCache()
+
+
+def fetch_access_token(client_id: str, client_secret: str, refresh_token: str, force_refresh: bool = False) -> str:
+    """
+    Get an OAuth2 access token, reusing a cached one until shortly before it expires.
+    
+    Args:
+        client_id: Google OAuth2 client ID
+        client_secret: Google OAuth2 client secret
+        refresh_token: OAuth2 refresh token
+        force_refresh: Fetch a new token even if one is cached
+        
+    Returns:
+        Access token string
+        
+    Raises:
+        Exception: If token fetch fails
+    """
+    return _token_cache.get(client_id, client_secret, refresh_token, force_refresh=force_refresh)
+
+
+def invalidate_access_token(client_id: str, refresh_token: str) -> None:
+    """Forget the cached access token, e.g. after SMTP rejected it."""
+    _token_cache.invalidate(client_id, refresh_token)
+
+
+def get_token_cache_stats() -> Dict:
+    """Get access token cache counters."""
+    return _token_cache.stats()
+
+
 def build_xoauth2_string(email: str, access_token: str) -> str:
     """
     Build XOAUTH2 authentication string for SMTP.
@@ -70,6 +221,137 @@ def build_xoauth2_string(email: str, access_token: str) -> str:
     return base64.b64encode(auth_string.encode("utf-8")).decode("utf-8")
 
 
+class SMTPSession:
+    """
+    Authenticated SMTP connection reused for many messages.
+    
+    Connects and authenticates once (EHLO, STARTTLS or SSL, AUTH), then
+    sends any number of messages over the same session. If the server drops
+    the connection between messages, the session reconnects and retries the
+    message once.
+    
+    Use as a context manager:
+    
+        with SMTPSession(server, port, email, password=app_password) as session:
+            for msg in messages:
+                session.send_message(msg)
+    """
+    
+    def __init__(
+        self,
+        smtp_server: str,
+        smtp_port: int,
+        smtp_email: str,
+        password: Optional[str] = None,
+        access_token: Optional[str] = None,
+        timeout: int = 20
+    ):
+        """
+        Args:
+            smtp_server: SMTP server address
+            smtp_port: SMTP port (465 for SSL, otherwise STARTTLS)
+            smtp_email: Account to authenticate as
+            password: App Password (for password authentication)
+            access_token: OAuth2 access token (for XOAUTH2 authentication)
+            timeout: Connection timeout in seconds
+        """
+        if not password and not access_token:
+            raise ValueError("SMTPSession requires a password or an access token")
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.smtp_email = smtp_email
+        self.password = password
+        self.access_token = access_token
+        self.timeout = timeout
+        self.connections = 0
+        self.messages_sent = 0
+        self._smtp = None
+    
+    def connect(self) -> None:
+        """Open the connection and authenticate."""
+        self.close()
+        started = time.perf_counter()
+        result = "failure"
+        try:
+            self._open()
+            result = "success"
+        finally:
+            elapsed = time.perf_counter() - started
+            add_log_timing("smtp_ms", elapsed)
+            SMTP_CONNECT_LATENCY.observe(elapsed, result)
+    
+    def _open(self) -> None:
+        """Connect, say EHLO, upgrade to TLS and authenticate."""
+        if self.smtp_port == 465:
+            smtp = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.smtp_port != 465:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.access_token:
+                # Authenticate using XOAUTH2
+                xoauth2_string = build_xoauth2_string(self.smtp_email, self.access_token)
+                code, response = smtp.docmd("AUTH", "XOAUTH2 " + xoauth2_string)
+                if code != 235:
+                    raise smtplib.SMTPAuthenticationError(code, response)
+            else:
+                smtp.login(self.smtp_email, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.connections += 1
+    
+    def send_message(self, msg) -> None:
+        """
+        Send one message, connecting first if needed.
+        
+        Raises:
+            smtplib.SMTPException: If sending fails
+        """
+        if self._smtp is None:
+            self.connect()
+        started = time.perf_counter()
+        result = "failure"
+        try:
+            try:
+                self._smtp.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # Session dropped (idle timeout, server restart): reconnect once.
+                # connect() records its own time, so restart the send timer after it
+                add_log_timing("smtp_ms", time.perf_counter() - started)
+                self.connect()
+                started = time.perf_counter()
+                self._smtp.send_message(msg)
+            result = "success"
+        finally:
+            elapsed = time.perf_counter() - started
+            add_log_timing("smtp_ms", elapsed)
+            SMTP_SEND_LATENCY.observe(elapsed)
+            SMTP_SENDS.inc(result)
+        self.messages_sent += 1
+    
+    def close(self) -> None:
+        """Send QUIT and close the connection, ignoring errors."""
+        if self._smtp is None:
+            return
+        smtp, self._smtp = self._smtp, None
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+    
+    def __enter__(self) -> "SMTPSession":
+        self.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
 def send_gmail_app_password(
     smtp_server: str,
     smtp_port: int,
@@ -93,19 +375,8 @@ def send_gmail_app_password(
     Raises:
         smtplib.SMTPException: If sending fails
     """
-    if smtp_port == 465:
-        # Use SSL
-        with smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=timeout) as s:
-            s.login(smtp_email, smtp_password)
-            s.send_message(msg)
-    else:
-        # Use STARTTLS (default for 587)
-        with smtplib.SMTP(smtp_server, smtp_port, timeout=timeout) as s:
-            s.ehlo()
-            s.starttls()
-            s.ehlo()
-            s.login(smtp_email, smtp_password)
-            s.send_message(msg)
+    with SMTPSession(smtp_server, smtp_port, smtp_email, password=smtp_password, timeout=timeout) as session:
+        session.send_message(msg)
 
 
 def send_gmail_oauth2(
@@ -130,17 +401,8 @@ def send_gmail_oauth2(
     Raises:
         smtplib.SMTPException: If sending fails
     """
-    xoauth2_string = build_xoauth2_string(email, access_token)
-    
-    with smtplib.SMTP(smtp_server, smtp_port, timeout=timeout) as s:
-        s.ehlo()
-        s.starttls()
-        s.ehlo()
-        # Authenticate using XOAUTH2
-        code, response = s.docmd("AUTH", "XOAUTH2 " + xoauth2_string)
-        if code != 235:
-            raise smtplib.SMTPAuthenticationError(code, response)
-        s.send_message(msg)
+    with SMTPSession(smtp_server, smtp_port, email, access_token=access_token, timeout=timeout) as session:
+        session.send_message(msg)
 
 
 def map_smtp_error(error: Exception) -> Tuple[str, int, str]:
@@ -0,0 +1,210 @@
+"""Lightweight in-process metrics exposed in Prometheus text format."""
+import bisect
+import os
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond SQLite reads to slow SMTP sends
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "birthday_"
+
+_registry: List = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    """Escape a label value for the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, *extra: str) -> str:
+    """
+    Render {name="value",...}, or an empty string if there are no labels.
+    
+    extra holds already formatted name="value" parts; empty ones are skipped.
+    """
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    parts.extend(part for part in extra if part)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, using integers where exact."""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        """Add amount to the counter for the given label values."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        """Get the current value for the given label values."""
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self, const_labels: str = "") -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in values:
+            labels = _format_labels(self.labels, label_values, const_labels)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Distribution of observed values (e.g. latencies) in fixed buckets."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = PREFIX + name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label values: [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value: float, *label_values) -> None:
+        """Record one observation for the given label values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[label_values] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *label_values) -> int:
+        """Get the number of observations for the given label values."""
+        with self._lock:
+            entry = self._values.get(label_values)
+            return entry[2] if entry else 0
+
+    def render(self, const_labels: str = "") -> List[str]:
+        with self._lock:
+            values = sorted((labels, (list(e[0]), e[1], e[2])) for labels, e in self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (bucket_counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels, label_values, const_labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values, const_labels)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time values read from a callback when metrics are rendered."""
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable[[], Dict[Tuple, float]],
+        labels: Sequence[str] = ()
+    ):
+        """
+        Args:
+            name: Metric name (without prefix)
+            help_text: HELP line text
+            callback: Returns {label values tuple: value}; () for an unlabelled gauge
+            labels: Label names
+        """
+        self.name = PREFIX + name
+        self.help_text = help_text
+        self.callback = callback
+        self.labels = tuple(labels)
+        _register(self)
+
+    def render(self, const_labels: str = "") -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for label_values, value in sorted(self.callback().items()):
+            labels = _format_labels(self.labels, label_values, const_labels)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class CallbackCounter(Gauge):
+    """
+    Monotonic totals kept elsewhere (e.g. a cache's hit count), read from a
+    callback when metrics are rendered. Name it with a _total suffix.
+    """
+
+    metric_type = "counter"
+
+
+def _register(metric) -> None:
+    with _registry_lock:
+        _registry.append(metric)
+
+
+def render_metrics() -> str:
+    """
+    Render every registered metric in Prometheus text format (version 0.0.4).
+    
+    Metrics are kept per process, so every series carries a pid label: with
+    several server workers, each worker's counters are separate series that
+    only reset when that worker restarts. Sum them in queries, e.g.
+    sum without (pid) (rate(birthday_http_requests_total[5m])).
+    """
+    with _registry_lock:
+        metrics = list(_registry)
+    # Read at render time: gunicorn workers are forked after import
+    const_labels = f'pid="{os.getpid()}"'
+    lines = []
+    for metric in metrics:
+        try:
+            lines.extend(metric.render(const_labels))
+        except Exception:
+            # A failing gauge callback must not break the whole scrape
+            continue
+    return "\n".join(lines) + "\n"
+
+
+# Metrics shared across modules
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+DB_OPERATIONS = Histogram(
+    "db_operation_duration_seconds",
+    "Time a pooled SQLite connection was held per operation",
+    ("mode",)
+)
+SMTP_SENDS = Counter("smtp_sends_total", "SMTP messages sent", ("result",))
+SMTP_SEND_LATENCY = Histogram("smtp_send_duration_seconds", "SMTP send latency per message")
+SMTP_CONNECT_LATENCY = Histogram("smtp_connect_duration_seconds", "SMTP connect and authenticate latency", ("result",))
+OAUTH_TOKEN_FETCHES = Histogram(
+    "oauth_token_fetch_duration_seconds",
+    "OAuth2 access token requests to Google",
+    ("result",)
+)
+UPLOAD_BYTES = Counter("upload_bytes_served_total", "Bytes of uploaded photos served")
@@ -0,0 +1,216 @@
+"""Background delivery of queued emails from the database outbox."""
+import email
+import email.policy
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from core import (
+    enqueue_email,
+    claim_outbox_batch,
+    mark_outbox_sent,
+    mark_outbox_failed,
+    purge_sent_outbox,
+    renew_outbox_lease,
+)
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def queue_message(db_path: Path, msg) -> int:
+    """Serialize an EmailMessage or MIMEMultipart and add it to the outbox."""
+    return enqueue_email(db_path, msg.as_bytes(), msg["Subject"])
+
+
+def load_message(data: bytes):
+    """Parse a queued message back into an EmailMessage."""
+    return email.message_from_bytes(data, policy=email.policy.SMTP)
+
+
+class LeaseLost(Exception):
+    """The lease on a claimed email expired before it was sent."""
+
+
+def retry_delay(attempts: int, base_delay: float, max_delay: float) -> float:
+    """
+    Get the exponential backoff delay before the next attempt.
+
+    Args:
+        attempts: Number of failed attempts so far (1 for the first failure)
+        base_delay: Delay after the first failure, in seconds
+        max_delay: Upper bound for the delay, in seconds
+
+    Returns:
+        Delay in seconds, with up to 10% random jitter
+    """
+    delay = min(max_delay, base_delay * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.9, 1.0)
+
+
+class OutboxWorker:
+    """
+    Background thread that drains the outbox.
+
+    Due emails are claimed in batches and handed to send_batch. Failed
+    sends are retried with exponential backoff and dead-lettered after
+    max_attempts. Several workers (e.g. one per server process) can drain
+    the same database safely because claims are leased; the lease is
+    renewed before each email is sent, so a slow batch doesn't outlive it.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        send_batch: Callable[[List, Callable[[int], None]], List[Optional[Exception]]],
+        sanitize: Callable[[str], str] = str,
+        batch_size: int = 20,
+        poll_interval: float = 5.0,
+        max_attempts: int = 5,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        sent_retention: float = 7 * 24 * 3600,
+        lease_seconds: float = 300.0
+    ):
+        """
+        Args:
+            db_path: Path to the database holding the outbox
+            send_batch: Sends a list of messages, returning one result per
+                message (None on success, the exception on failure). It is
+                also given a before_send callback to call with each
+                message's index just before sending it; if that raises,
+                the message must not be sent.
+            sanitize: Redacts secrets from error text before it is stored
+            batch_size: Maximum emails claimed per batch
+            poll_interval: Seconds to sleep when the outbox is empty
+            max_attempts: Attempts before an email is dead-lettered
+            base_delay: Backoff after the first failure, in seconds
+            max_delay: Maximum backoff, in seconds
+            sent_retention: Seconds to keep delivered emails before purging
+            lease_seconds: Lease on claimed emails, renewed before each send
+        """
+        self.db_path = db_path
+        self.send_batch = send_batch
+        self.sanitize = sanitize
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sent_retention = sent_retention
+        self.lease_seconds = lease_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        """Start the background thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop after the current batch, waiting up to timeout seconds."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self) -> None:
+        """Check the outbox now instead of waiting for the next poll."""
+        self._wake.set()
+
+    def is_alive(self) -> bool:
+        """Check whether the background thread is running."""
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self) -> None:
+        """Drain due emails until stopped."""
+        while not self._stop.is_set():
+            try:
+                processed = self.process_batch()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {self.sanitize(str(e))}")
+                processed = 0
+
+            if processed == 0:
+                self._purge_sent()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _purge_sent(self) -> None:
+        """Delete old delivered emails, at most once an hour."""
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        try:
+            purge_sent_outbox(self.db_path, self.sent_retention)
+        except Exception as e:
+            logger.error(f"Outbox purge failed: {self.sanitize(str(e))}")
+
+    def process_batch(self) -> int:
+        """
+        Claim and send one batch of due emails.
+
+        Returns:
+            Number of emails claimed
+        """
+        batch = claim_outbox_batch(
+            self.db_path, self.batch_size, lease_seconds=self.lease_seconds, max_attempts=self.max_attempts
+        )
+        if not batch:
+            return 0
+
+        messages = []
+        entries = []
+        for entry in batch:
+            try:
+                messages.append(load_message(entry["message"]))
+                entries.append(entry)
+            except Exception as e:
+                # A message that can't be parsed will never send
+                mark_outbox_failed(self.db_path, entry["id"], f"Unreadable message: {e}", None)
+
+        lost = set()
+
+        def before_send(index: int) -> None:
+            # Renew this and the remaining leases, which would otherwise run
+            # out during a slow batch and let another worker send them too
+            remaining = entries[index:]
+            renewed = renew_outbox_lease(self.db_path, remaining, self.lease_seconds)
+            if entries[index]["id"] not in renewed:
+                lost.add(entries[index]["id"])
+                raise LeaseLost(f"Lease on email {entries[index]['id']} expired before sending")
+
+        if messages:
+            try:
+                results = self.send_batch(messages, before_send)
+            except Exception as e:
+                results = [e] * len(messages)
+
+            for entry, error in zip(entries, results):
+                if entry["id"] in lost:
+                    # Reclaimed (and counted as an attempt) by claim_outbox_batch
+                    logger.warning(f"Email {entry['id']} not sent: its lease expired")
+                    continue
+                if error is None:
+                    mark_outbox_sent(self.db_path, entry["id"])
+                    continue
+
+                attempts = entry["attempts"] + 1
+                error_text = self.sanitize(str(error))
+                if attempts >= self.max_attempts:
+                    logger.error(f"Email {entry['id']} dead-lettered after {attempts} attempts: {error_text}")
+                    mark_outbox_failed(self.db_path, entry["id"], error_text, None)
+                else:
+                    retry_at = time.time() + retry_delay(attempts, self.base_delay, self.max_delay)
+                    logger.warning(f"Email {entry['id']} failed (attempt {attempts}), will retry: {error_text}")
+                    mark_outbox_failed(self.db_path, entry["id"], error_text, retry_at)
+
+        return len(batch)
@@ -0,0 +1,61 @@
+"""Micro-benchmark: per-row calculate_age vs. core.compute_ages_bulk.
+
+Usage:
+    python3 scripts/bench_ages.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import calculate_age, compute_ages_bulk, np
+
+
+def make_birthdays(count: int) -> list:
+    """Generate random zero-padded YYYY-MM-DD birthdays."""
+    rng = random.Random(42)
+    start = date(1930, 1, 1)
+    return [(start + timedelta(days=rng.randrange(30000))).isoformat() for _ in range(count)]
+
+
+def best_of(func, repeat: int) -> float:
+    """Run func repeat times and return the fastest wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk age computation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"NumPy: {'available' if np is not None else 'not installed'}")
+    print(f"{'rows':>10} {'per-row':>10} {'bulk-py':>10} {'bulk-np':>10} {'speedup':>8}")
+
+    for size in args.sizes:
+        birthdays = make_birthdays(size)
+        per_row = best_of(lambda: [calculate_age(b) for b in birthdays], args.repeat)
+        bulk_py = best_of(lambda: compute_ages_bulk(birthdays, use_numpy=False), args.repeat)
+        if np is not None:
+            bulk_np = best_of(lambda: compute_ages_bulk(birthdays, use_numpy=True), args.repeat)
+        else:
+            bulk_np = None
+        fastest = min(t for t in (bulk_py, bulk_np) if t is not None)
+        print(
+            f"{size:>10} {per_row * 1000:>8.1f}ms {bulk_py * 1000:>8.1f}ms "
+            f"{(f'{bulk_np * 1000:.1f}ms' if bulk_np is not None else '-'):>10} "
+            f"{per_row / fastest:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: time and peak memory to serialize the full birthday list.
+
+Compares, on a temporary database:
+    - query:    get_all_birthdays() alone, the cost shared by every strategy
+    - legacy:   get_all_birthdays() + stdlib json.dumps (what jsonify() did)
+    - list:     get_all_birthdays() + serialization.dumps (jsonify() now)
+    - streamed: iter_birthdays() + iter_json_array() (GET /api/birthdays now)
+
+each with the stdlib and orjson backends where available. Time is measured
+without tracing; peak memory is measured in a separate tracemalloc run.
+
+Usage:
+    python3 scripts/bench_json.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import serialization
+from core import get_all_birthdays, init_database, iter_birthdays
+from db import close_pools, get_connection
+
+
+def populate(db_path: Path, rows: int) -> None:
+    """Fill a fresh database with random birthdays."""
+    rng = random.Random(42)
+    init_database(db_path)
+    with get_connection(db_path, write=True) as conn:
+        conn.executemany(
+            "INSERT INTO birthdays (name, birthday, photo, gender) VALUES (?, ?, ?, ?)",
+            (
+                (
+                    f"Person {i}",
+                    f"{rng.randint(1930, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    f"{i}.jpg" if i % 5 == 0 else None,
+                    rng.choice(("male", "female", None)),
+                )
+                for i in range(rows)
+            )
+        )
+
+
+def query(db_path: Path) -> int:
+    get_all_birthdays(db_path)
+    return 0
+
+
+def legacy(db_path: Path) -> int:
+    body = json.dumps(get_all_birthdays(db_path), separators=(",", ":"), sort_keys=True)
+    return len(body.encode("utf-8"))
+
+
+def full_list(db_path: Path) -> int:
+    return len(serialization.dumps(get_all_birthdays(db_path)))
+
+
+def streamed(db_path: Path) -> int:
+    return sum(len(chunk) for chunk in serialization.iter_json_array(iter_birthdays(db_path)))
+
+
+def measure(func, db_path: Path, repeat: int):
+    """Return (best seconds, peak traced bytes, output bytes) for one strategy."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = func(db_path)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    func(db_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization of the birthday list")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = ["json"] + (["orjson"] if serialization.orjson is not None else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        populate(db_path, args.rows)
+
+        print(f"{args.rows} rows")
+        results = [
+            ("query", "-", measure(query, db_path, args.repeat)),
+            ("legacy", "json", measure(legacy, db_path, args.repeat)),
+        ]
+        for backend in backends:
+            serialization._backend = backend
+            results.append(("list", backend, measure(full_list, db_path, args.repeat)))
+            results.append(("streamed", backend, measure(streamed, db_path, args.repeat)))
+
+        for strategy, backend, (seconds, peak, size) in results:
+            print(f"{strategy:>9} {backend:>6}: {seconds * 1000:8.1f} ms  "
+                  f"peak {peak / 1024 / 1024:7.1f} MiB  output {size / 1024 / 1024:6.1f} MiB")
+        close_pools()
+    if serialization.orjson is None:
+        print("orjson not installed: only the stdlib backend was measured (pip3 install orjson)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Micro-benchmark: per-record cost of log sanitization.
+
+Compares the previous formatter (four uncompiled re.sub calls per record)
+with logger.SanitizedFormatter, which uses the shared single-pass redact().
+
+Usage:
+    python3 scripts/bench_logging.py [--records 200000] [--secret-ratio 0.05]
+"""
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from logger import SanitizedFormatter
+
+LEGACY_PATTERNS = [
+    (r'(password|passwd|pwd)\s*[:=]\s*\S+', r'\1: [REDACTED]'),
+    (r'smtpPassword["\']?\s*[:=]\s*["\']?[^"\']+', 'smtpPassword: [REDACTED]'),
+    (r'(client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]'),
+    (r'(api[_-]?key|secret[_-]?key)\s*[:=]\s*\S+', r'\1: [REDACTED]'),
+]
+
+BENIGN_MESSAGES = [
+    "Added birthday for Alice (2 photos)",
+    "GET /api/birthdays 200 in 3.2ms",
+    "Digest preview generated with 12 upcoming birthdays",
+    "Outbox batch sent: 20 emails",
+    "Imported 150 birthdays, skipped 3",
+]
+
+SECRET_MESSAGES = [
+    "OAuth2 exchange failed: client_secret=abc123 refresh_token=1//0gXYZ",
+    'Saving settings {"smtpPassword": "abcd efgh ijkl mnop"}',
+    "SMTP login failed: password=hunter2",
+]
+
+
+class LegacyFormatter(logging.Formatter):
+    """The formatter as it was before redact() was introduced."""
+
+    def format(self, record):
+        msg = super().format(record)
+        for pattern, replacement in LEGACY_PATTERNS:
+            msg = re.sub(pattern, replacement, msg, flags=re.IGNORECASE)
+        return msg
+
+
+def make_records(count: int, secret_ratio: float) -> list:
+    """Build log records with the given fraction containing secrets."""
+    rng = random.Random(42)
+    records = []
+    for _ in range(count):
+        pool = SECRET_MESSAGES if rng.random() < secret_ratio else BENIGN_MESSAGES
+        records.append(logging.LogRecord("bench", logging.INFO, __file__, 0, rng.choice(pool), None, None))
+    return records
+
+
+def time_formatter(formatter: logging.Formatter, records: list) -> float:
+    """Format every record and return the elapsed wall time in seconds."""
+    started = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark log sanitization")
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--secret-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    fmt = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    records = make_records(args.records, args.secret_ratio)
+
+    plain = time_formatter(logging.Formatter(fmt), records)
+    legacy = time_formatter(LegacyFormatter(fmt), records)
+    current = time_formatter(SanitizedFormatter(fmt), records)
+
+    print(f"{args.records} records, {args.secret_ratio:.0%} with secrets")
+    for label, elapsed in (("unsanitized", plain), ("legacy", legacy), ("redact()", current)):
+        print(f"{label:>12}: {elapsed / args.records * 1e6:6.2f} us/record")
+    print(f"sanitization overhead: legacy {(legacy - plain) / args.records * 1e6:.2f} us, "
+          f"redact() {(current - plain) / args.records * 1e6:.2f} us per record")
+
+
+if __name__ == "__main__":
+    main()
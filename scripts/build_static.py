@@ -0,0 +1,91 @@
+"""Build content-hashed, precompressed copies of the static frontend.
+
+Writes static/dist/ with:
+    - app.<hash>.js, i18n.<hash>.js, style.<hash>.css (served from /assets/
+      with a one-year immutable cache)
+    - index.html rewritten to reference the hashed URLs
+    - .gz siblings for every file, and .br siblings if brotli is installed
+    - manifest.json mapping each source name to its hashed name
+
+server.py serves these automatically when static/dist/ exists. Previous
+hashed files are kept so pages loaded before a rebuild still work; pass
+--clean to remove them.
+
+Usage:
+    python3 scripts/build_static.py [--clean]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+
+# Assets referenced from index.html that get content-hashed names
+HASHED_ASSETS = ["app.js", "i18n.js", "style.css"]
+
+
+def hashed_name(name: str, data: bytes) -> str:
+    """Insert a short content hash before the extension: app.js -> app.1a2b3c4d5e.js."""
+    path = Path(name)
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def write_compressed(path: Path, data: bytes) -> None:
+    """Write data plus .gz (and .br, if available) siblings at maximum compression."""
+    path.write_bytes(data)
+    # mtime=0 keeps the .gz output identical across builds of the same input
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+
+
+def build(clean: bool = False) -> dict:
+    """Build static/dist and return the name -> hashed name manifest."""
+    if clean and DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True, exist_ok=True)
+
+    manifest = {}
+    for name in HASHED_ASSETS:
+        data = (STATIC_DIR / name).read_bytes()
+        manifest[name] = hashed_name(name, data)
+        write_compressed(DIST_DIR / manifest[name], data)
+
+    html = (STATIC_DIR / "index.html").read_text(encoding="utf-8")
+    for name, hashed in manifest.items():
+        html = html.replace(f'"/static/{name}"', f'"/assets/{hashed}"')
+    write_compressed(DIST_DIR / "index.html", html.encode("utf-8"))
+
+    (DIST_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build hashed, precompressed static assets")
+    parser.add_argument("--clean", action="store_true", help="Remove previous builds first")
+    args = parser.parse_args()
+
+    manifest = build(clean=args.clean)
+    for name, hashed in manifest.items():
+        size = (DIST_DIR / hashed).stat().st_size
+        gz_size = (DIST_DIR / (hashed + ".gz")).stat().st_size
+        br = DIST_DIR / (hashed + ".br")
+        br_size = f"{br.stat().st_size:>8}" if br.exists() else "       -"
+        print(f"{name:>12} -> {hashed:<24} {size:>8} raw {gz_size:>8} gz {br_size} br")
+    if brotli is None:
+        print("brotli not installed: only .gz files written (pip3 install brotli)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
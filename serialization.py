@@ -0,0 +1,88 @@
+"""JSON serialization for API responses, using orjson when it is installed."""
+import json
+import os
+from typing import Any, Iterable, Iterator
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Items encoded per chunk yielded by iter_json_array
+STREAM_BATCH_SIZE = 500
+
+
+def get_json_backend() -> str:
+    """
+    Get the active JSON backend: "orjson" if installed, otherwise "json".
+    
+    Set JSON_BACKEND=json to force the standard library encoder.
+    """
+    if orjson is not None and os.getenv("JSON_BACKEND", "").strip().lower() != "json":
+        return "orjson"
+    return "json"
+
+
+_backend = get_json_backend()
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize obj to compact UTF-8 JSON.
+    
+    Both backends produce the same output for API data (dicts, lists, str,
+    int, float, bool, None). Other values, such as dates, fall back to str().
+    """
+    if _backend == "orjson":
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def iter_json_array(items: Iterable, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Serialize items as one JSON array, yielding one chunk per batch_size items.
+    
+    Only one batch is held in memory at a time, so an array of any length can
+    be streamed from a generator without materializing the list or the full
+    document. Each batch is encoded with a single dumps() call, which avoids
+    the per-call overhead of encoding item by item.
+    
+    Args:
+        items: Iterable of JSON-serializable values
+        batch_size: Number of items encoded per chunk
+    
+    Yields:
+        Bytes which concatenate to the JSON array
+    """
+    prefix = b"["
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            # Strip the brackets of the encoded batch to splice it into the array
+            yield prefix + dumps(batch)[1:-1]
+            prefix = b","
+            batch = []
+    if batch:
+        yield prefix + dumps(batch)[1:-1] + b"]"
+    else:
+        yield b"[]" if prefix == b"[" else b"]"
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes jsonify() responses with dumps()."""
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        if kwargs:
+            # Explicit options (indent, sort_keys, ...) keep the stdlib behavior
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            # Pretty-printed output for debugging
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b"\n", mimetype=self.mimetype)
@@ -1,13 +1,21 @@
 """Flask server for birthday reminder application."""
 import argparse
+import atexit
 import os
-import csv
-import io
-import re
-import sqlite3
-from datetime import datetime, timedelta
+import functools
+import gzip
+import hashlib
+import mimetypes
+import itertools
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import date, datetime
 from pathlib import Path
-from flask import Flask, jsonify, request, send_from_directory, send_file, Response
+from flask import Flask, Request, abort, g, jsonify, make_response, request, send_from_directory, send_file, Response
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 import smtplib
 from email.mime.text import MIMEText
@@ -18,25 +26,54 @@ import urllib.request
 import urllib.parse
 import urllib.error
 import json
-import base64
-from typing import Dict, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 # Configure logging with file rotation and console toggle
-from logger import setup_logger
+from logger import (
+    setup_logger,
+    redact,
+    shutdown_logging,
+    start_log_context,
+    get_log_context,
+    end_log_context,
+    is_json_logging,
+    get_logging_stats,
+)
 logger = setup_logger(__name__)
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 from core import (
     get_db_path,
     init_database,
+    check_database,
+    get_data_version,
     get_todays_birthdays,
-    get_all_birthdays,
+    iter_birthdays,
+    open_birthdays_snapshot,
+    get_upcoming_birthdays,
+    count_birthdays,
+    get_birthdays_page,
+    DEFAULT_PAGE_SIZE,
     add_birthday,
     update_birthday,
     delete_birthday,
     get_birthday_by_id,
+    save_oauth_state,
+    get_oauth_state,
+    update_oauth_state,
+    delete_oauth_state,
+    get_outbox_stats,
+    retry_outbox_email,
     generate_email_content,
-    export_birthdays,
-    import_birthdays,
+    iter_export_zip,
+    iter_csv_export,
+    iter_ics_export,
+    iter_csv_birthdays,
 )
 from config import (
     get_smtp_settings,
@@ -45,203 +82,247 @@ from config import (
     reset_config as reset_config_file,
     encrypt_refresh_token,
     decrypt_refresh_token,
+    get_settings_cache_stats,
+    check_config,
+)
+from db import close_pools, get_pool_stats
+from jobs import (
+    JOB_CANCELLED,
+    ImportJobWorker,
+    cancel_import_job,
+    create_import_job,
+    describe_import_job,
+    get_import_job,
+    get_jobs_db_path,
 )
+from metrics import CallbackCounter, Gauge, HTTP_LATENCY, HTTP_REQUESTS, UPLOAD_BYTES, render_metrics
+from outbox import OutboxWorker, queue_message
+from serialization import FastJSONProvider, iter_json_array
 from mail_oauth import (
     fetch_access_token,
-    build_xoauth2_string,
-    send_gmail_app_password,
-    send_gmail_oauth2,
+    invalidate_access_token,
+    get_token_cache_stats,
     map_smtp_error,
+    SMTPSession,
 )
 
+# CSV imports are parsed row by row from the spooled upload, so they may be
+# larger than other uploads without using more memory
+CSV_UPLOAD_ENDPOINTS = {"api_import_csv", "api_import_csv_preview"}
+
+
+class AppRequest(Request):
+    """Request with a separate, larger upload limit for CSV imports."""
+    
+    @property
+    def max_content_length(self) -> Optional[int]:
+        if self.endpoint in CSV_UPLOAD_ENDPOINTS:
+            return get_csv_max_upload_size()
+        return super().max_content_length
+
+
 app = Flask(__name__, static_folder="static", static_url_path="/static")
+app.request_class = AppRequest
+app.json = FastJSONProvider(app)  # orjson when installed
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
 
 # Configuration
 UPLOADS_DIR = Path(__file__).parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+# Uploads waiting for a background import job
+IMPORTS_DIR = Path(__file__).parent / "imports"
+
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
 
 
+def env_int(name: str) -> Optional[int]:
+    """Read an optional integer from the environment."""
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else None
+
+
+def get_csv_max_upload_size() -> int:
+    """Get the upload limit for CSV imports in bytes (CSV_MAX_UPLOAD_MB, default 256)."""
+    return (env_int("CSV_MAX_UPLOAD_MB") or 256) * 1024 * 1024
+
+
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def fetch_access_token(client_id: str, client_secret: str, refresh_token: str) -> str:
+def should_use_oauth2(settings: Dict) -> bool:
     """
-    Fetch OAuth2 access token from Google using refresh token.
+    Determine if OAuth2 should be used for SMTP authentication.
     
     Args:
-        client_id: Google OAuth2 client ID
-        client_secret: Google OAuth2 client secret
-        refresh_token: OAuth2 refresh token
+        settings: SMTP settings dictionary
         
     Returns:
-        Access token string
-        
-    Raises:
-        Exception: If token fetch fails
+        True if OAuth2 should be used, False otherwise
     """
-    token_url = "https://oauth2.googleapis.com/token"
-    
-    data = urllib.parse.urlencode({
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "refresh_token": refresh_token,
-        "grant_type": "refresh_token"
-    }).encode("utf-8")
-    
-    req = urllib.request.Request(token_url, data=data, method="POST")
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
-    
-    try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read().decode("utf-8"))
-            if "access_token" not in result:
-                raise Exception(f"Token response missing access_token: {result.get('error', 'Unknown error')}")
-            return result["access_token"]
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode("utf-8") if e.fp else "Unknown error"
-        try:
-            error_json = json.loads(error_body)
-            error_msg = error_json.get("error_description", error_json.get("error", "Unknown error"))
-        except:
-            error_msg = error_body
-        raise Exception(f"Failed to fetch access token: {error_msg}")
-    except Exception as e:
-        raise Exception(f"Failed to fetch access token: {str(e)}")
+    auth_type = settings.get("authType", "").lower()
+    return auth_type == "oauth2"
 
 
-def build_xoauth2_string(email: str, access_token: str) -> str:
+def open_smtp_session(settings: Dict) -> SMTPSession:
     """
-    Build XOAUTH2 authentication string for SMTP.
+    Open an authenticated SMTP session for sending several messages.
+    
+    The OAuth2 access token (if used) comes from the mail_oauth token cache,
+    so it is only fetched from Google when the cached one is about to expire.
     
     Args:
-        email: Gmail address
-        access_token: OAuth2 access token
+        settings: SMTP settings dictionary
         
     Returns:
-        Base64-encoded XOAUTH2 string
-    """
-    auth_string = f"user={email}\x01auth=Bearer {access_token}\x01\x01"
-    return base64.b64encode(auth_string.encode("utf-8")).decode("utf-8")
-
-
-def send_gmail_oauth2(
-    smtp_server: str,
-    smtp_port: int,
-    email: str,
-    access_token: str,
-    msg: EmailMessage,
-    timeout: int = 20
-) -> None:
-    """
-    Send email via Gmail SMTP using XOAUTH2 authentication.
-    
-    Args:
-        smtp_server: SMTP server address
-        smtp_port: SMTP port
-        email: Gmail address
-        access_token: OAuth2 access token
-        msg: EmailMessage object to send
-        timeout: Connection timeout in seconds
+        Connected SMTPSession; the caller must close it
         
     Raises:
-        smtplib.SMTPException: If sending fails
+        smtplib.SMTPException: If connecting or authenticating fails
+        Exception: If OAuth2 token fetch fails
     """
-    xoauth2_string = build_xoauth2_string(email, access_token)
+    smtp_server = settings["smtpServer"]
+    smtp_port = int(settings["smtpPort"])
+    smtp_email = settings["smtpEmail"]
+    
+    if not should_use_oauth2(settings):
+        session = SMTPSession(smtp_server, smtp_port, smtp_email, password=settings["smtpPassword"])
+        session.connect()
+        return session
     
-    with smtplib.SMTP(smtp_server, smtp_port, timeout=timeout) as s:
-        s.ehlo()
-        s.starttls()
-        s.ehlo()
-        # Authenticate using XOAUTH2
-        # Send AUTH XOAUTH2 command with base64-encoded string
-        code, response = s.docmd("AUTH", "XOAUTH2 " + xoauth2_string)
-        if code != 235:
-            raise smtplib.SMTPAuthenticationError(code, response)
-        s.send_message(msg)
+    credentials = (
+        settings["googleClientId"],
+        settings["googleClientSecret"],
+        settings["googleRefreshToken"]
+    )
+    session = SMTPSession(smtp_server, smtp_port, smtp_email, access_token=fetch_access_token(*credentials))
+    try:
+        session.connect()
+    except smtplib.SMTPAuthenticationError:
+        # The cached token may have been revoked early: refresh it and retry once
+        invalidate_access_token(settings["googleClientId"], settings["googleRefreshToken"])
+        session.access_token = fetch_access_token(*credentials, force_refresh=True)
+        session.connect()
+    return session
 
 
-def should_use_oauth2(settings: Dict) -> bool:
+def send_outbox_batch(messages, before_send: Optional[Callable[[int], None]] = None) -> list:
     """
-    Determine if OAuth2 should be used for SMTP authentication.
+    Send queued outbox messages with the current SMTP settings.
     
     Args:
-        settings: SMTP settings dictionary
-        
+        messages: Messages to send over one SMTP session
+        before_send: Called with each message's index before it is sent;
+            if it raises, that message is skipped and the error is its result
+    
     Returns:
-        True if OAuth2 should be used, False otherwise
+        One entry per message: None if sent, otherwise the exception
     """
-    auth_type = settings.get("authType", "").lower()
-    return auth_type == "oauth2"
+    settings = get_smtp_settings(get_portable_mode())
+    if not settings or not settings.get("smtpServer"):
+        return [Exception("SMTP settings are not configured")] * len(messages)
+    
+    try:
+        session = open_smtp_session(settings)
+    except Exception as e:
+        # Can't connect or authenticate: every message in the batch fails
+        return [e] * len(messages)
+    
+    results = []
+    try:
+        for index, msg in enumerate(messages):
+            try:
+                if before_send is not None:
+                    before_send(index)
+                session.send_message(msg)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+    finally:
+        session.close()
+    return results
+
+
+# Background outbox worker for this process (started on first use)
+_outbox_worker = None
+_outbox_worker_lock = threading.Lock()
+
+
+def get_outbox_worker() -> OutboxWorker:
+    """Get this process's outbox worker, starting it if needed."""
+    global _outbox_worker
+    with _outbox_worker_lock:
+        if _outbox_worker is None:
+            _outbox_worker = OutboxWorker(get_app_db_path(), send_outbox_batch, sanitize=redact)
+        _outbox_worker.start()
+    return _outbox_worker
+
+
+def stop_outbox_worker(timeout: float = 30.0) -> None:
+    """Stop this process's outbox worker, letting the current batch finish."""
+    if _outbox_worker is not None:
+        _outbox_worker.stop(timeout)
+
+
+# Background import worker for this process (started on first use)
+_import_worker = None
+_import_worker_lock = threading.Lock()
 
 
-def send_email_with_auth(settings: Dict, msg) -> None:
+def get_import_worker() -> ImportJobWorker:
+    """Get this process's import worker, starting it if needed."""
+    global _import_worker
+    with _import_worker_lock:
+        if _import_worker is None:
+            _import_worker = ImportJobWorker(get_app_db_path(), UPLOADS_DIR, sanitize=redact)
+        _import_worker.start()
+    return _import_worker
+
+
+def stop_import_worker(timeout: float = 30.0) -> None:
+    """Stop this process's import worker, letting the current job finish."""
+    if _import_worker is not None:
+        _import_worker.stop(timeout)
+
+
+def queue_import(kind: str, file, options: Dict):
     """
-    Send email using appropriate authentication method (OAuth2 or password).
-    Supports both EmailMessage and MIMEMultipart.
+    Save an uploaded file and queue a background job to import it.
     
     Args:
-        settings: SMTP settings dictionary
-        msg: EmailMessage or MIMEMultipart object to send
-        
-    Raises:
-        smtplib.SMTPException: If sending fails
-        Exception: If OAuth2 token fetch fails
+        kind: "csv" or "zip"
+        file: Uploaded file
+        options: Import options stored with the job
+    
+    Returns:
+        202 response with the job ID to poll at /api/jobs/<job_id>
     """
-    smtp_server = settings["smtpServer"]
-    smtp_port = int(settings["smtpPort"])
-    smtp_email = settings["smtpEmail"]
+    IMPORTS_DIR.mkdir(exist_ok=True)
+    import_path = IMPORTS_DIR / f"import_{os.urandom(8).hex()}.{kind}"
+    file.save(str(import_path))
     
-    if should_use_oauth2(settings):
-        # Use OAuth2 authentication
-        try:
-            access_token = fetch_access_token(
-                settings["googleClientId"],
-                settings["googleClientSecret"],
-                settings["googleRefreshToken"]
-            )
-            # For OAuth2, we need EmailMessage - convert if needed
-            if isinstance(msg, MIMEMultipart):
-                # Convert MIMEMultipart to EmailMessage for OAuth2
-                email_msg = EmailMessage()
-                email_msg["From"] = msg["From"]
-                email_msg["To"] = msg["To"]
-                email_msg["Subject"] = msg["Subject"]
-                # Extract text/html content from MIMEMultipart
-                html_content = None
-                text_content = None
-                for part in msg.walk():
-                    content_type = part.get_content_type()
-                    if content_type == "text/html":
-                        html_content = part.get_payload(decode=True).decode("utf-8")
-                    elif content_type == "text/plain":
-                        text_content = part.get_payload(decode=True).decode("utf-8")
-                
-                # Set content (prefer HTML if available)
-                if html_content:
-                    email_msg.set_content(html_content, subtype="html")
-                elif text_content:
-                    email_msg.set_content(text_content)
-                else:
-                    # Fallback: get all text parts
-                    email_msg.set_content(str(msg))
-                
-                send_gmail_oauth2(smtp_server, smtp_port, smtp_email, access_token, email_msg)
-            else:
-                send_gmail_oauth2(smtp_server, smtp_port, smtp_email, access_token, msg)
-        except Exception as e:
-            # Log error without exposing secrets
-            sanitized_error = re.sub(r'(client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
-            logger.error(f"OAuth2 authentication failed: {sanitized_error}")
-            raise
-    else:
-        # Use App Password authentication
-        smtp_password = settings["smtpPassword"]
-        send_gmail_app_password(smtp_server, smtp_port, smtp_email, smtp_password, msg)
+    worker = get_import_worker()
+    try:
+        job_id = create_import_job(
+            worker.jobs_db,
+            kind,
+            import_path,
+            filename=file.filename,
+            options=options,
+            total_bytes=import_path.stat().st_size
+        )
+    except Exception:
+        import_path.unlink(missing_ok=True)
+        raise
+    worker.wake()
+    
+    return jsonify({
+        "job_id": job_id,
+        "status": "pending",
+        "message": "Import queued"
+    }), 202
 
 
 def get_smtp_error_message(error: Exception) -> Tuple[str, int]:
@@ -286,33 +367,385 @@ def get_portable_mode() -> bool:
     return os.environ.get("BIRTHDAY_REMINDER_PORTABLE", "").lower() == "true"
 
 
+# Database paths whose schema is ready, keyed by portable mode
+_ready_db_paths: Dict[bool, Path] = {}
+_db_init_lock = threading.Lock()
+
+
+def get_app_db_path() -> Path:
+    """
+    Get the ready-to-use database path for the current mode.
+    
+    The schema is checked and migrated once per process (normally at startup
+    from main()); later calls are a dictionary lookup with no DDL or mkdir.
+    """
+    portable = get_portable_mode()
+    db_path = _ready_db_paths.get(portable)
+    if db_path is None:
+        with _db_init_lock:
+            db_path = _ready_db_paths.get(portable)
+            if db_path is None:
+                db_path = get_db_path(portable)
+                init_database(db_path)
+                _ready_db_paths[portable] = db_path
+    return db_path
+
+
+def get_request_id() -> str:
+    """Use the caller's X-Request-ID if it looks sane, otherwise generate one."""
+    request_id = request.headers.get("X-Request-ID", "")
+    if 0 < len(request_id) <= 64 and all(c.isalnum() or c in "-_." for c in request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+
+@app.before_request
+def start_request_log_context():
+    """Start per-request timing and attach request fields to log records."""
+    g.request_started = time.perf_counter()
+    start_log_context(
+        request_id=get_request_id(),
+        route=request.url_rule.rule if request.url_rule else None,
+        method=request.method,
+    )
+
+
+@app.after_request
+def finish_request_log_context(response):
+    """Record status and latency; in JSON log mode, write one line per request."""
+    context = get_log_context()
+    if context is None:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    route = context["route"] or "unmatched"
+    HTTP_REQUESTS.inc(request.method, route, str(response.status_code))
+    HTTP_LATENCY.observe(elapsed, request.method, route)
+    context["status"] = response.status_code
+    context["duration_ms"] = elapsed * 1000
+    response.headers["X-Request-ID"] = context["request_id"]
+    if is_json_logging():
+        logger.info(f"{request.method} {request.path} {response.status_code}")
+    return response
+
+
+@app.teardown_request
+def end_request_log_context(error=None):
+    """Stop attaching this request's fields to log records."""
+    end_log_context()
+
+
+def data_generation() -> Tuple[int, date]:
+    """
+    Get (data version, today's date) for the current request.
+    
+    Looked up once per request and shared by the ETag and the response
+    cache, so a cached view costs a single data-version query.
+    """
+    if "data_generation" not in g:
+        g.data_generation = (get_data_version(get_app_db_path()), datetime.now().date())
+    return g.data_generation
+
+
+def data_etag(version: Optional[int] = None) -> str:
+    """
+    Strong ETag for a birthday view: data version, today's date and the request URL.
+    
+    The date is included because ages and upcoming windows change at midnight.
+    
+    Args:
+        version: Data version the body was read at; the request's
+            data_generation() if not given
+    """
+    if version is None:
+        version, today = data_generation()
+    else:
+        today = datetime.now().date()
+    variant = f"{request.full_path}|{today.isoformat()}"
+    return f"{version}-{hashlib.sha1(variant.encode('utf-8')).hexdigest()[:16]}"
+
+
+class ResponseCache:
+    """
+    Bounded LRU of rendered response bodies for views that are pure
+    functions of (birthday data, today's date, request parameters).
+    
+    Entries belong to one generation, the (data version, date) pair; when
+    either changes (any core mutation, or midnight) the whole cache is
+    dropped, so a stale body is never served.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+    
+    def get_or_render(self, generation: Tuple, key: Tuple, render: Callable[[], bytes]) -> bytes:
+        """
+        Get the cached body for key, rendering and storing it on a miss.
+        
+        Args:
+            generation: (data version, date) the body is valid for
+            key: View name and parameters
+            render: Produces the body on a miss
+        """
+        with self._lock:
+            if generation != self._generation:
+                if self._entries:
+                    self._stats["invalidations"] += 1
+                    self._entries.clear()
+                self._generation = generation
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return body
+            self._stats["misses"] += 1
+        
+        body = render()
+        
+        with self._lock:
+            # Don't store a body rendered for a generation that has since passed
+            if generation == self._generation:
+                self._entries[key] = body
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return body
+    
+    def stats(self) -> Dict:
+        """Get hit/miss/eviction/invalidation counters and the current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+response_cache = ResponseCache(env_int("RESPONSE_CACHE_SIZE") or 64)
+
+
+def render_cached(name: str, render: Callable[[], bytes]) -> bytes:
+    """Render a data-derived view body through the response cache, keyed on the query string."""
+    return response_cache.get_or_render(data_generation(), (name, request.query_string), render)
+
+
+def conditional_get(view):
+    """
+    Serve a birthday view with an ETag, answering If-None-Match with 304.
+    
+    A matching request costs one data-version lookup; the view itself (and
+    its query and JSON serialization) doesn't run.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            etag = data_etag()
+        except Exception as e:
+            # Serve uncached; the view reports any database error itself
+            logger.warning(f"Could not compute ETag: {redact(str(e))}")
+            return view(*args, **kwargs)
+        # The client may hold the plain or a compressed representation
+        matched = next(
+            (tag for tag in (etag, f"{etag}-br", f"{etag}-gzip") if request.if_none_match.contains(tag)),
+            None
+        )
+        if matched:
+            response = Response(status=304)
+            response.set_etag(matched)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            # A view that read a later snapshot sets the ETag describing it
+            if "ETag" not in response.headers:
+                response.set_etag(etag)
+        # Let browsers and the service worker cache, but revalidate every time
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    return wrapper
+
+
+def get_compress_min_size() -> int:
+    """Get the smallest JSON body worth compressing, from COMPRESS_MIN_SIZE (default 1024 bytes)."""
+    return env_int("COMPRESS_MIN_SIZE") or 1024
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Pick br or gzip from the request's Accept-Encoding, or None for identity."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_stream(chunks: Iterable[bytes], coding: str) -> Iterator[bytes]:
+    """Compress a streamed body chunk by chunk with br or gzip."""
+    if coding == "br":
+        compressor = brotli.Compressor(quality=5)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        compress, finish = compressor.compress, compressor.flush
+    try:
+        for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+@app.after_request
+def compress_json_response(response):
+    """Compress JSON bodies above COMPRESS_MIN_SIZE with the client's preferred encoding."""
+    if (
+        response.mimetype != "application/json"
+        or response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    
+    response.vary.add("Accept-Encoding")
+    coding = negotiate_encoding()
+    if coding is None:
+        return response
+    
+    if response.is_streamed:
+        # Size is unknown up front; only the large listings are streamed
+        response.response = compress_stream(response.response, coding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < get_compress_min_size():
+            return response
+        if coding == "br":
+            # Quality 5 compresses close to gzip -9 at a fraction of the CPU cost
+            response.set_data(brotli.compress(data, quality=5))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = coding
+    
+    # A strong ETag must differ per encoding; conditional_get accepts either form
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{coding}")
+    return response
+
+
+# Built by scripts/build_static.py; used when present
+STATIC_DIST_DIR = Path(__file__).parent / "static" / "dist"
+
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+def send_precompressed(filename: str, immutable: bool) -> Response:
+    """
+    Send a file from static/dist, using its .br/.gz sibling if the client accepts it.
+    
+    Args:
+        filename: File name inside static/dist
+        immutable: Content-hashed file that can be cached for a year;
+            otherwise the client must revalidate every time
+    """
+    path = safe_join(str(STATIC_DIST_DIR), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    # Without max_age send_file marks the response no-cache (revalidate every time)
+    max_age = 365 * 24 * 3600 if immutable else None
+    accepted = request.accept_encodings
+    for coding, suffix in PRECOMPRESSED_SUFFIXES:
+        if accepted[coding] and os.path.isfile(path + suffix):
+            response = send_file(path + suffix, mimetype=mimetype, conditional=True, max_age=max_age)
+            response.headers["Content-Encoding"] = coding
+            break
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True, max_age=max_age)
+    
+    response.vary.add("Accept-Encoding")
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+@app.route("/assets/<filename>")
+def serve_asset(filename):
+    """Serve a content-hashed, precompressed static asset."""
+    return send_precompressed(filename, immutable=True)
+
+
 @app.route("/")
 def index():
-    """Serve the main HTML page."""
+    """Serve the main HTML page (the built copy referencing hashed assets, if built)."""
+    if (STATIC_DIST_DIR / "index.html").is_file():
+        return send_precompressed("index.html", immutable=False)
     return send_from_directory(app.static_folder, "index.html")
 
 
 @app.route("/api/birthdays", methods=["GET"])
+@conditional_get
 def api_get_birthdays():
-    """Get all birthdays."""
+    """
+    Get birthdays.
+    
+    Without query parameters, returns the full list as a JSON array, streamed
+    from the database in batches. With any of limit/after/month/gender/name,
+    returns one keyset-paginated page: {"items": [...], "next_cursor": str or null}.
+    The first page (no after) also has "total", the number of matching rows.
+    """
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
+        
+        page_params = ("limit", "after", "month", "gender", "name")
+        if not any(param in request.args for param in page_params):
+            # One read snapshot: the body is consistent and matches its ETag
+            # even if birthdays change while it streams
+            version, birthdays = open_birthdays_snapshot(db_path)
+            chunks = iter_json_array(birthdays)
+            # Run the first query now, so database errors still get a 500
+            first = next(chunks)
+            response = Response(itertools.chain((first,), chunks), mimetype="application/json")
+            response.set_etag(data_etag(version))
+            return response
         
-        birthdays = get_all_birthdays(db_path)
-        return jsonify(birthdays)
+        try:
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+            month = int(request.args["month"]) if request.args.get("month") else None
+        except ValueError:
+            return jsonify({"error": "limit and month must be integers"}), 400
+        
+        after = request.args.get("after") or None
+        filters = {
+            "month": month,
+            "gender": request.args.get("gender") or None,
+            "name_prefix": request.args.get("name", "").strip() or None,
+        }
+        birthdays, next_cursor = get_birthdays_page(db_path, limit=limit, after=after, **filters)
+        page = {"items": birthdays, "next_cursor": next_cursor}
+        if after is None:
+            # Lets a client that loads pages on demand show the full count
+            page["total"] = count_birthdays(db_path, **filters)
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/birthdays/today", methods=["GET"])
+@conditional_get
 def api_get_todays_birthdays():
     """Get today's birthdays."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
         
         birthdays = get_todays_birthdays(db_path)
         return jsonify(birthdays)
@@ -324,9 +757,7 @@ def api_get_todays_birthdays():
 def api_add_birthday():
     """Add a new birthday."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
         
         name = request.form.get("name", "").strip()
         birthday = request.form.get("birthday", "").strip()
@@ -358,9 +789,7 @@ def api_add_birthday():
 def api_update_birthday(birthday_id):
     """Update an existing birthday."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
         
         name = request.form.get("name", "").strip()
         birthday = request.form.get("birthday", "").strip()
@@ -402,9 +831,7 @@ def api_update_birthday(birthday_id):
 def api_delete_birthday(birthday_id):
     """Delete a birthday."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
         
         success, photo_path = delete_birthday(db_path, birthday_id)
         if not success:
@@ -466,7 +893,7 @@ def api_save_config():
         save_smtp_settings(data, portable)
         return jsonify({"ok": True})
     except Exception as e:
-        sanitized = re.sub(r'(client_secret|refresh_token|password|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+        sanitized = redact(str(e))
         logger.error(f"Error saving config: {sanitized}")
         return jsonify({"ok": False, "error": "INTERNAL_ERROR"}), 500
 
@@ -482,8 +909,8 @@ def api_reset_config():
         return jsonify({"error": str(e)}), 500
 
 
-# In-memory storage for OAuth desktop flow (short-lived)
-oauth_desktop_codes = {}  # {code: {"state": str, "expires_at": float}}
+# OAuth desktop flow state (short-lived) is kept in the database via
+# save_oauth_state/get_oauth_state so every worker process sees it
 
 @app.route("/api/oauth/desktop/init", methods=["POST"])
 def api_oauth_desktop_init():
@@ -502,7 +929,6 @@ def api_oauth_desktop_init():
             return jsonify({"ok": False, "error": "CONFIG_NOT_SET", "hint": "Google Client ID and Secret must be configured first"}), 400
         
         import secrets
-        import time
         
         # Generate state for CSRF protection
         state = secrets.token_urlsafe(32)
@@ -526,13 +952,12 @@ def api_oauth_desktop_init():
         )
         
         # Store state temporarily (expires in 10 minutes)
-        oauth_desktop_codes[state] = {
+        save_oauth_state(get_app_db_path(), state, {
             "state": state,
-            "expires_at": time.time() + 600,
             "client_id": client_id,
             "client_secret": client_secret,
             "redirect_uri": backend_redirect_uri
-        }
+        }, time.time() + 600)
         
         return jsonify({
             "ok": True,
@@ -541,7 +966,7 @@ def api_oauth_desktop_init():
             "state": state
         })
     except Exception as e:
-        sanitized = re.sub(r'(client_id|client_secret)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+        sanitized = redact(str(e))
         logger.error(f"Error initializing desktop OAuth: {sanitized}")
         return jsonify({"ok": False, "error": "INTERNAL_ERROR"}), 500
 
@@ -561,13 +986,13 @@ def api_oauth_desktop_exchange():
         state = data["state"]
         
         # Verify state
-        if state not in oauth_desktop_codes:
+        db_path = get_app_db_path()
+        stored = get_oauth_state(db_path, state)
+        if stored is None:
             return jsonify({"ok": False, "error": "INVALID_STATE", "hint": "State not found or expired"}), 400
         
-        stored = oauth_desktop_codes[state]
-        import time
         if time.time() > stored["expires_at"]:
-            del oauth_desktop_codes[state]
+            delete_oauth_state(db_path, state)
             return jsonify({"ok": False, "error": "EXPIRED_STATE", "hint": "Authorization code expired"}), 400
         
         client_id = stored["client_id"]
@@ -606,7 +1031,7 @@ def api_oauth_desktop_exchange():
                 save_smtp_settings(settings, portable)
                 
                 # Clean up
-                del oauth_desktop_codes[state]
+                delete_oauth_state(db_path, state)
                 
                 return jsonify({"ok": True})
         except urllib.error.HTTPError as e:
@@ -616,11 +1041,11 @@ def api_oauth_desktop_exchange():
                 error_msg = error_json.get("error_description", error_json.get("error", "Unknown error"))
             except:
                 error_msg = error_body
-            sanitized = re.sub(r'(client_id|client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', error_msg, flags=re.IGNORECASE)
+            sanitized = redact(error_msg)
             logger.error(f"Token exchange failed: {sanitized}")
             return jsonify({"ok": False, "error": "TOKEN_EXCHANGE_FAILED", "hint": error_msg}), 400
     except Exception as e:
-        sanitized = re.sub(r'(client_id|client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+        sanitized = redact(str(e))
         logger.error(f"Error exchanging token: {sanitized}")
         return jsonify({"ok": False, "error": "INTERNAL_ERROR"}), 500
 
@@ -643,13 +1068,13 @@ def api_oauth_desktop_callback():
     
     # Exchange code for tokens (reuse exchange logic)
     try:
-        if state not in oauth_desktop_codes:
+        db_path = get_app_db_path()
+        stored = get_oauth_state(db_path, state)
+        if stored is None:
             return jsonify({"ok": False, "error": "INVALID_STATE", "hint": "State not found or expired"}), 400
         
-        stored = oauth_desktop_codes[state]
-        import time
         if time.time() > stored["expires_at"]:
-            del oauth_desktop_codes[state]
+            delete_oauth_state(db_path, state)
             return jsonify({"ok": False, "error": "EXPIRED_STATE", "hint": "Authorization code expired"}), 400
         
         client_id = stored["client_id"]
@@ -688,8 +1113,7 @@ def api_oauth_desktop_callback():
                 save_smtp_settings(settings, portable)
                 
                 # Mark as completed
-                oauth_desktop_codes[state]["completed"] = True
-                oauth_desktop_codes[state]["refresh_token_stored"] = True
+                update_oauth_state(db_path, state, completed=True, refresh_token_stored=True)
                 
                 # Return success page
                 return """
@@ -732,7 +1156,7 @@ def api_oauth_desktop_callback():
             </html>
             """, 400
     except Exception as e:
-        sanitized = re.sub(r'(client_id|client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+        sanitized = redact(str(e))
         logger.error(f"Error in callback: {sanitized}")
         return """
         <!DOCTYPE html>
@@ -761,10 +1185,10 @@ def api_oauth_desktop_status():
     if not state:
         return jsonify({"ok": False, "error": "BAD_REQUEST", "hint": "state parameter required"}), 400
     
-    if state not in oauth_desktop_codes:
+    stored = get_oauth_state(get_app_db_path(), state)
+    if stored is None:
         return jsonify({"ok": False, "status": "expired", "hint": "State expired or not found"}), 400
     
-    stored = oauth_desktop_codes[state]
     if stored.get("completed") and stored.get("refresh_token_stored"):
         return jsonify({"ok": True, "status": "success"})
     
@@ -825,11 +1249,11 @@ def api_oauth_device_init():
                 error_msg = error_json.get("error_description", error_json.get("error", "Unknown error"))
             except:
                 error_msg = error_body
-            sanitized = re.sub(r'(client_id|client_secret)\s*[:=]\s*\S+', r'\1: [REDACTED]', error_msg, flags=re.IGNORECASE)
+            sanitized = redact(error_msg)
             logger.error(f"Device flow init failed: {sanitized}")
             return jsonify({"error": f"Failed to initialize device flow: {error_msg}"}), 500
     except Exception as e:
-        sanitized = re.sub(r'(client_id|client_secret|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+        sanitized = redact(str(e))
         logger.error(f"Error initializing device flow: {sanitized}")
         return jsonify({"error": str(e)}), 500
 
@@ -905,11 +1329,11 @@ def api_oauth_device_poll():
                 error_msg = error_json.get("error_description", error)
             except:
                 error_msg = error_body
-            sanitized = re.sub(r'(client_id|client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', error_msg, flags=re.IGNORECASE)
+            sanitized = redact(error_msg)
             logger.error(f"Device flow poll failed: {sanitized}")
             return jsonify({"status": "error", "error": error_msg}), 500
     except Exception as e:
-        sanitized = re.sub(r'(client_id|client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+        sanitized = redact(str(e))
         logger.error(f"Error polling device flow: {sanitized}")
         return jsonify({"status": "error", "error": str(e)}), 500
 
@@ -932,6 +1356,9 @@ def api_test_email():
         if not auth_type:
             return jsonify({"ok": False, "error": "CONFIG_NOT_SET", "hint": "authType not configured"}), 400
         
+        if auth_type not in ("app_password", "oauth2"):
+            return jsonify({"ok": False, "error": "INVALID_AUTH_TYPE", "hint": f"Unknown authType: {auth_type}"}), 400
+        
         # Create email using EmailMessage
         msg = EmailMessage()
         msg["Subject"] = "Birthday Manager – SMTP test"
@@ -939,42 +1366,24 @@ def api_test_email():
         msg["To"] = settings["recipientEmail"]
         msg.set_content("SMTP is working. 🎉")
         
-        # Send email based on auth type
+        # Same path as outbox sends, so a revoked cached OAuth2 token is
+        # refreshed and retried once
         try:
-            if auth_type == "app_password":
-                send_gmail_app_password(
-                    settings["smtpServer"],
-                    int(settings["smtpPort"]),
-                    settings["smtpEmail"],
-                    settings["smtpPassword"],
-                    msg
-                )
-            elif auth_type == "oauth2":
-                # Get access token from refresh token
-                access_token = fetch_access_token(
-                    settings["googleClientId"],
-                    settings["googleClientSecret"],
-                    settings["googleRefreshToken"]
-                )
-                send_gmail_oauth2(
-                    settings["smtpServer"],
-                    int(settings["smtpPort"]),
-                    settings["smtpEmail"],
-                    access_token,
-                    msg
-                )
-            else:
-                return jsonify({"ok": False, "error": "INVALID_AUTH_TYPE", "hint": f"Unknown authType: {auth_type}"}), 400
+            session = open_smtp_session(settings)
+            try:
+                session.send_message(msg)
+            finally:
+                session.close()
         except Exception as e:
             # Map SMTP errors to proper HTTP status codes
             error_code, http_status, hint = map_smtp_error(e)
-            sanitized = re.sub(r'(client_secret|refresh_token|password|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+            sanitized = redact(str(e))
             logger.error(f"SMTP error sending test email: {sanitized}")
             return jsonify({"ok": False, "error": error_code, "hint": hint}), http_status
         
         return jsonify({"ok": True})
     except Exception as e:
-        sanitized = re.sub(r'(client_secret|refresh_token|password|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
+        sanitized = redact(str(e))
         logger.error(f"Unexpected error sending test email: {sanitized}")
         return jsonify({"ok": False, "error": "INTERNAL_ERROR"}), 502
 
@@ -984,8 +1393,7 @@ def api_test_reminder():
     """Send test reminder emails for today's birthdays."""
     try:
         portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
         
         settings = get_smtp_settings(portable)
         if not settings:
@@ -995,7 +1403,7 @@ def api_test_reminder():
         if not birthdays:
             return jsonify({"message": "No birthdays today"})
         
-        sent_count = 0
+        queued_count = 0
         for birthday in birthdays:
             try:
                 subject, html_body = generate_email_content(birthday)
@@ -1015,16 +1423,42 @@ def api_test_reminder():
                             img.add_header("Content-ID", f"<photo_{birthday['id']}>")
                             msg.attach(img)
                 
-                # Send email using appropriate authentication method
-                send_email_with_auth(settings, msg)
+                # Queue for the background outbox worker
+                queue_message(db_path, msg)
                 
-                sent_count += 1
-            except (smtplib.SMTPException, Exception) as e:
+                queued_count += 1
+            except Exception as e:
                 # Log error but continue with other birthdays
-                sanitized_error = re.sub(r'(client_secret|refresh_token|password|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
-                logger.error(f"Failed to send reminder for {birthday.get('name', 'unknown')}: {sanitized_error}")
+                logger.error(f"Failed to queue reminder for {birthday.get('name', 'unknown')}: {redact(str(e))}")
         
-        return jsonify({"message": f"Test reminder emails sent for {sent_count} birthday(s)"})
+        get_outbox_worker().wake()
+        return jsonify({
+            "message": f"Test reminder emails queued for {queued_count} birthday(s)",
+            "queued": queued_count
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/outbox", methods=["GET"])
+def api_get_outbox():
+    """Get outbox counts per status and recent dead-lettered emails."""
+    try:
+        stats = get_outbox_stats(get_app_db_path())
+        stats["worker_running"] = get_outbox_worker().is_alive()
+        return jsonify(stats)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/outbox/<int:outbox_id>/retry", methods=["POST"])
+def api_retry_outbox(outbox_id):
+    """Re-queue a dead-lettered email."""
+    try:
+        if not retry_outbox_email(get_app_db_path(), outbox_id):
+            return jsonify({"error": "Email not found in dead letters"}), 404
+        get_outbox_worker().wake()
+        return jsonify({"message": "Email queued for retry"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1032,45 +1466,33 @@ def api_test_reminder():
 @app.route("/uploads/<filename>")
 def serve_upload(filename):
     """Serve uploaded files."""
-    return send_from_directory(str(UPLOADS_DIR), filename)
+    response = send_from_directory(str(UPLOADS_DIR), filename)
+    if response.content_length:
+        UPLOAD_BYTES.inc(amount=response.content_length)
+    return response
 
 
 @app.route("/api/export", methods=["GET"])
 def api_export():
-    """Export all birthdays with images as a ZIP file."""
+    """Export all birthdays with images as a ZIP file, streamed as it is built."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
-        
-        # Create temporary export file
-        export_dir = Path(__file__).parent / "exports"
-        export_dir.mkdir(exist_ok=True)
+        db_path = get_app_db_path()
         export_filename = f"birthdays_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        export_path = export_dir / export_filename
-        
-        # Export birthdays
-        export_birthdays(db_path, UPLOADS_DIR, export_path)
         
-        # Send file
-        return send_file(
-            str(export_path),
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=export_filename
-        )
+        chunks = iter_export_zip(db_path, UPLOADS_DIR)
+        # Read the first batch now, so database errors still get a 500
+        first = next(chunks)
+        response = Response(itertools.chain((first,), chunks), mimetype="application/zip")
+        response.headers.set("Content-Disposition", "attachment", filename=export_filename)
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/import", methods=["POST"])
 def api_import():
-    """Import birthdays from a ZIP file."""
+    """Queue a background import of a ZIP file; poll /api/jobs/<job_id> for progress."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
-        
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
         
@@ -1081,70 +1503,27 @@ def api_import():
         if not file.filename.endswith('.zip'):
             return jsonify({"error": "File must be a ZIP file"}), 400
         
-        # Save uploaded file temporarily
-        import_dir = Path(__file__).parent / "imports"
-        import_dir.mkdir(exist_ok=True)
-        import_filename = f"import_{os.urandom(8).hex()}.zip"
-        import_path = import_dir / import_filename
-        
-        file.save(str(import_path))
-        
-        # Get replace option
         replace_existing = request.form.get('replace', 'false').lower() == 'true'
         
-        # Import birthdays
-        imported, skipped, errors = import_birthdays(
-            db_path,
-            UPLOADS_DIR,
-            import_path,
-            replace_existing
-        )
-        
-        # Clean up import file
-        if import_path.exists():
-            import_path.unlink()
-        
-        result = {
-            "message": f"Import completed: {imported} imported, {skipped} skipped",
-            "imported": imported,
-            "skipped": skipped
-        }
-        
-        if errors:
-            result["errors"] = errors[:10]  # Limit to first 10 errors
-        
-        return jsonify(result)
+        return queue_import("zip", file, {"replace": replace_existing})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/export/csv", methods=["GET"])
 def api_export_csv():
-    """Export birthdays as CSV file."""
+    """Export birthdays as CSV file, streamed from the database."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
-        
-        birthdays = get_all_birthdays(db_path)
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Name', 'Birthday', 'Age', 'Gender', 'Photo'])
+        db_path = get_app_db_path()
         
-        for bday in birthdays:
-            writer.writerow([
-                bday.get('name', ''),
-                bday.get('birthday', ''),
-                bday.get('age', ''),
-                bday.get('gender', ''),
-                bday.get('photo', '')
-            ])
+        chunks = iter_csv_export(db_path)
+        # Read the first batch now, so database errors still get a 500
+        first = next(chunks)
         
         filename = f"birthdays_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
         return Response(
-            output.getvalue(),
+            itertools.chain((first,), chunks),
             mimetype='text/csv',
             headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
@@ -1155,44 +1534,18 @@ def api_export_csv():
 
 @app.route("/api/export/ics", methods=["GET"])
 def api_export_ics():
-    """Export birthdays as ICS (iCalendar) file."""
+    """Export birthdays as ICS (iCalendar) file, streamed from the database."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
-        
-        birthdays = get_all_birthdays(db_path)
-        
-        output = io.StringIO()
-        output.write("BEGIN:VCALENDAR\n")
-        output.write("VERSION:2.0\n")
-        output.write("PRODID:-//Birthday Manager//EN\n")
-        output.write("CALSCALE:GREGORIAN\n")
-        
-        for bday in birthdays:
-            name = bday.get('name', 'Unknown')
-            birthday = bday.get('birthday', '')
-            if not birthday:
-                continue
-            
-            # Create recurring event for each year
-            bday_date = datetime.strptime(birthday, "%Y-%m-%d")
-            age = bday.get('age', 0)
-            
-            output.write("BEGIN:VEVENT\n")
-            output.write(f"UID:birthday-{bday.get('id', '')}@birthday-manager\n")
-            output.write(f"DTSTART;VALUE=DATE:{bday_date.strftime('%Y%m%d')}\n")
-            output.write(f"RRULE:FREQ=YEARLY\n")
-            output.write(f"SUMMARY:{name}'s Birthday ({age} years old)\n")
-            output.write(f"DESCRIPTION:Happy Birthday to {name}!\n")
-            output.write("END:VEVENT\n")
-        
-        output.write("END:VCALENDAR\n")
+        db_path = get_app_db_path()
+        
+        chunks = iter_ics_export(db_path)
+        # Read the first batch now, so database errors still get a 500
+        first = next(chunks)
         
         filename = f"birthdays_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ics"
         
         return Response(
-            output.getvalue(),
+            itertools.chain((first,), chunks),
             mimetype='text/calendar',
             headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
@@ -1212,53 +1565,35 @@ def api_import_csv_preview():
         if not file.filename.endswith('.csv'):
             return jsonify({"error": "File must be a CSV file"}), 400
         
-        # Read CSV
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-        
-        rows = []
-        for row in csv_reader:
-            rows.append({
-                'name': row.get('Name', '').strip(),
-                'birthday': row.get('Birthday', '').strip(),
-                'gender': row.get('Gender', '').strip() or None,
-                'photo': row.get('Photo', '').strip() or None
-            })
-        
-        # Get existing birthdays for comparison
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
-        existing = get_all_birthdays(db_path)
-        existing_names = {b['name'].lower().strip() for b in existing}
+        # Names already in the database, for duplicate detection
+        db_path = get_app_db_path()
+        existing_names = {b['name'].lower().strip() for b in iter_birthdays(db_path)}
         
-        # Analyze differences
-        new_entries = []
-        duplicates = []
-        invalid = []
+        # Analyze differences row by row, keeping a sample of each kind
+        total = 0
+        counts = {"new": 0, "duplicates": 0, "invalid": 0}
+        samples = {"new": [], "duplicates": [], "invalid": []}
         
-        for row in rows:
+        for row in iter_csv_birthdays(file.stream):
+            total += 1
             if not row['name'] or not row['birthday']:
-                invalid.append(row)
-                continue
-            
-            # Check for duplicates
-            if row['name'].lower().strip() in existing_names:
-                duplicates.append(row)
+                kind = "invalid"
+            elif row['name'].lower() in existing_names:
+                kind = "duplicates"
             else:
-                new_entries.append(row)
+                kind = "new"
+            counts[kind] += 1
+            if len(samples[kind]) < 10:
+                samples[kind].append(row)
         
         return jsonify({
-            "preview": {
-                "total": len(rows),
-                "new": len(new_entries),
-                "duplicates": len(duplicates),
-                "invalid": len(invalid)
-            },
-            "new_entries": new_entries[:10],  # First 10
-            "duplicates": duplicates[:10],
-            "invalid": invalid[:10]
+            "preview": {"total": total, **counts},
+            "new_entries": samples["new"],  # First 10
+            "duplicates": samples["duplicates"],
+            "invalid": samples["invalid"]
         })
+    except UnicodeDecodeError:
+        return jsonify({"error": "CSV file must be UTF-8 encoded"}), 400
     except Exception as e:
         logger.error(f"Error previewing CSV: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1266,7 +1601,7 @@ def api_import_csv_preview():
 
 @app.route("/api/import/csv", methods=["POST"])
 def api_import_csv():
-    """Import birthdays from CSV file."""
+    """Queue a background import of a CSV file; poll /api/jobs/<job_id> for progress."""
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
@@ -1275,97 +1610,63 @@ def api_import_csv():
         if not file.filename.endswith('.csv'):
             return jsonify({"error": "File must be a CSV file"}), 400
         
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
-        
         replace_existing = request.form.get('replace', 'false').lower() == 'true'
+        # Skip invalid rows by default; partial=false imports all rows or none
+        allow_partial = request.form.get('partial', 'true').lower() == 'true'
         
-        if replace_existing:
-            with sqlite3.connect(str(db_path)) as conn:
-                conn.execute("DELETE FROM birthdays")
-                conn.commit()
-        
-        # Read and import CSV
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-        
-        imported = 0
-        skipped = 0
-        errors = []
-        
-        for row in csv_reader:
-            try:
-                name = row.get('Name', '').strip()
-                birthday = row.get('Birthday', '').strip()
-                
-                if not name or not birthday:
-                    skipped += 1
-                    continue
-                
-                # Validate date
-                try:
-                    datetime.strptime(birthday, "%Y-%m-%d")
-                except ValueError:
-                    skipped += 1
-                    errors.append(f"Invalid date for {name}")
-                    continue
-                
-                gender = row.get('Gender', '').strip() or None
-                
-                add_birthday(db_path, name, birthday, gender, None)
-                imported += 1
-            except Exception as e:
-                skipped += 1
-                errors.append(f"Error importing {row.get('Name', 'unknown')}: {str(e)}")
-        
-        return jsonify({
-            "message": f"Import completed: {imported} imported, {skipped} skipped",
-            "imported": imported,
-            "skipped": skipped,
-            "errors": errors[:10]
-        })
+        return queue_import("csv", file, {"replace": replace_existing, "partial": allow_partial})
     except Exception as e:
         logger.error(f"Error importing CSV: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def api_get_job(job_id):
+    """Get an import job's status, progress, throughput and ETA."""
+    try:
+        job = get_import_job(get_jobs_db_path(get_app_db_path()), job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(describe_import_job(job))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def api_cancel_job(job_id):
+    """Cancel an import job; a running import is rolled back."""
+    try:
+        jobs_db = get_jobs_db_path(get_app_db_path())
+        if not cancel_import_job(jobs_db, job_id):
+            if get_import_job(jobs_db, job_id) is None:
+                return jsonify({"error": "Job not found"}), 404
+            return jsonify({"error": "Job has already finished"}), 409
+        job = get_import_job(jobs_db, job_id)
+        if job["status"] == JOB_CANCELLED:
+            # Cancelled before it started: no worker will delete the upload
+            Path(job["file_path"]).unlink(missing_ok=True)
+        return jsonify(describe_import_job(job))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/digest/preview", methods=["GET"])
 def api_digest_preview():
     """Preview daily digest for upcoming birthdays."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
         
         days_ahead = int(request.args.get('days', 7))
-        end_date = datetime.now() + timedelta(days=days_ahead)
-        
-        birthdays = get_all_birthdays(db_path)
-        upcoming = []
-        
-        for bday in birthdays:
-            bday_date = datetime.strptime(bday['birthday'], "%Y-%m-%d")
-            this_year = datetime.now().replace(month=bday_date.month, day=bday_date.day)
-            next_year = datetime.now().replace(year=datetime.now().year + 1, month=bday_date.month, day=bday_date.day)
-            
-            target = this_year if this_year >= datetime.now() else next_year
-            
-            if target <= end_date:
-                days_until = (target - datetime.now()).days
-                upcoming.append({
-                    **bday,
-                    'days_until': days_until,
-                    'target_date': target.strftime('%Y-%m-%d')
-                })
         
-        upcoming.sort(key=lambda x: x['days_until'])
+        def render() -> bytes:
+            upcoming = get_upcoming_birthdays(db_path, datetime.now().date(), days_ahead)
+            return app.json.dumps({
+                "upcoming": upcoming,
+                "count": len(upcoming),
+                "period_days": days_ahead
+            }).encode("utf-8")
         
-        return jsonify({
-            "upcoming": upcoming,
-            "count": len(upcoming),
-            "period_days": days_ahead
-        })
+        return Response(render_cached("digest_preview", render), mimetype="application/json")
     except Exception as e:
         logger.error(f"Error previewing digest: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1376,40 +1677,21 @@ def api_digest_send():
     """Send daily digest email."""
     try:
         portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
+        db_path = get_app_db_path()
         
         settings = get_smtp_settings(portable)
         if not settings:
             return jsonify({"error": "SMTP settings are not configured"}), 400
         
         days_ahead = int(request.json.get('days', 7) if request.json else 7)
-        end_date = datetime.now() + timedelta(days=days_ahead)
-        
-        birthdays = get_all_birthdays(db_path)
-        upcoming = []
-        
-        for bday in birthdays:
-            bday_date = datetime.strptime(bday['birthday'], "%Y-%m-%d")
-            this_year = datetime.now().replace(month=bday_date.month, day=bday_date.day)
-            next_year = datetime.now().replace(year=datetime.now().year + 1, month=bday_date.month, day=bday_date.day)
-            
-            target = this_year if this_year >= datetime.now() else next_year
-            
-            if target <= end_date:
-                days_until = (target - datetime.now()).days
-                upcoming.append({
-                    **bday,
-                    'days_until': days_until,
-                    'target_date': target.strftime('%Y-%m-%d')
-                })
+        upcoming = get_upcoming_birthdays(db_path, datetime.now().date(), days_ahead)
         
         if not upcoming:
             return jsonify({"message": "No upcoming birthdays in the selected period"})
         
         # Generate email content
         html_content = "<h2>Upcoming Birthdays</h2><ul>"
-        for bday in sorted(upcoming, key=lambda x: x['days_until']):
+        for bday in upcoming:
             days_text = "Today!" if bday['days_until'] == 0 else f"in {bday['days_until']} days"
             html_content += f"<li><strong>{bday['name']}</strong> - {bday['target_date']} ({days_text})</li>"
         html_content += "</ul>"
@@ -1420,38 +1702,26 @@ def api_digest_send():
         msg["Subject"] = f"Birthday Digest - Next {days_ahead} Days"
         msg.attach(MIMEText(html_content, "html"))
         
-        # Send email using appropriate authentication method
-        send_email_with_auth(settings, msg)
+        # Queue for the background outbox worker
+        outbox_id = queue_message(db_path, msg)
+        get_outbox_worker().wake()
         
         return jsonify({
-            "message": f"Digest sent successfully with {len(upcoming)} birthdays",
-            "count": len(upcoming)
+            "message": f"Digest queued for sending with {len(upcoming)} birthdays",
+            "count": len(upcoming),
+            "outbox_id": outbox_id
         })
-    except smtplib.SMTPException as e:
-        error_msg, status_code = get_smtp_error_message(e)
-        sanitized_error = re.sub(r'(client_secret|refresh_token|password|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', str(e), flags=re.IGNORECASE)
-        logger.error(f"SMTP error sending digest: {sanitized_error}")
-        return jsonify({"error": error_msg}), status_code
     except Exception as e:
-        error_str = str(e)
-        if "access token" in error_str.lower() or "oauth" in error_str.lower():
-            sanitized_error = re.sub(r'(client_secret|refresh_token|token)\s*[:=]\s*\S+', r'\1: [REDACTED]', error_str, flags=re.IGNORECASE)
-            logger.error(f"OAuth2 error sending digest: {sanitized_error}")
-            return jsonify({"error": "OAuth2 authentication failed. Check your Client ID, Secret, and Refresh Token."}), 401
-        logger.error(f"Error sending digest: {str(e)}")
+        logger.error(f"Error queueing digest: {redact(str(e))}")
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/birthdays/upcoming30", methods=["GET"])
+@conditional_get
 def api_get_upcoming30():
     """Get birthdays in next 30 days grouped by weekday."""
     try:
-        portable = get_portable_mode()
-        db_path = get_db_path(portable)
-        init_database(db_path)
-        
-        birthdays = get_all_birthdays(db_path)
-        end_date = datetime.now() + timedelta(days=30)
+        db_path = get_app_db_path()
         
         grouped = {}
         weekdays = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -1459,27 +1729,14 @@ def api_get_upcoming30():
         for weekday in weekdays:
             grouped[weekday] = []
         
-        for bday in birthdays:
-            bday_date = datetime.strptime(bday['birthday'], "%Y-%m-%d")
-            this_year = datetime.now().replace(month=bday_date.month, day=bday_date.day)
-            next_year = datetime.now().replace(year=datetime.now().year + 1, month=bday_date.month, day=bday_date.day)
-            
-            target = this_year if this_year >= datetime.now() else next_year
-            
-            if target <= end_date:
-                days_until = (target - datetime.now()).days
-                weekday_name = weekdays[target.weekday()]
-                grouped[weekday_name].append({
-                    **bday,
-                    'days_until': days_until,
-                    'target_date': target.strftime('%Y-%m-%d')
-                })
+        def render() -> bytes:
+            # Rows arrive sorted by days_until, so each group stays sorted
+            for bday in get_upcoming_birthdays(db_path, datetime.now().date(), 30):
+                target = datetime.strptime(bday['target_date'], "%Y-%m-%d")
+                grouped[weekdays[target.weekday()]].append(bday)
+            return app.json.dumps(grouped).encode("utf-8")
         
-        # Sort each group by days_until
-        for weekday in weekdays:
-            grouped[weekday].sort(key=lambda x: x['days_until'])
-        
-        return jsonify(grouped)
+        return Response(render_cached("upcoming30", render), mimetype="application/json")
     except Exception as e:
         logger.error(f"Error getting upcoming 30 days: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1503,24 +1760,234 @@ def health():
     return jsonify({"status": "ok"})
 
 
+def check_uploads_dir() -> None:
+    """Check that a file can be created in the uploads directory."""
+    with tempfile.NamedTemporaryFile(dir=UPLOADS_DIR, prefix=".health-"):
+        pass
+
+
+# Readiness checks: name -> callable that raises if the dependency is unhealthy
+READINESS_CHECKS = {
+    "database": lambda: check_database(get_app_db_path()),
+    "uploads": check_uploads_dir,
+    "config": lambda: check_config(get_portable_mode()),
+}
+
+# Last readiness result, reused for HEALTH_CACHE_SECONDS so probes don't hammer the DB
+_readiness_cache: Dict = {}
+_readiness_lock = threading.Lock()
+
+
+def get_health_cache_seconds() -> float:
+    """Get how long readiness results are reused, from HEALTH_CACHE_SECONDS (default 5)."""
+    try:
+        return max(0.0, float(os.environ.get("HEALTH_CACHE_SECONDS", 5)))
+    except ValueError:
+        return 5.0
+
+
+def run_readiness_checks() -> Dict:
+    """
+    Run every readiness check, or return the cached result if still fresh.
+    
+    Returns:
+        Dict with "ready" (bool), "checks" ({name: {"ok", "ms", "error"?}}),
+        "checked_at" (unix time) and "cached" (bool)
+    """
+    with _readiness_lock:
+        cached = _readiness_cache.get("result")
+        if cached and time.time() - cached["checked_at"] < get_health_cache_seconds():
+            return dict(cached, cached=True)
+        
+        checks = {}
+        for name, check in READINESS_CHECKS.items():
+            started = time.perf_counter()
+            try:
+                check()
+                checks[name] = {"ok": True}
+            except Exception as e:
+                checks[name] = {"ok": False, "error": redact(str(e))}
+            checks[name]["ms"] = round((time.perf_counter() - started) * 1000, 2)
+        
+        result = {
+            "ready": all(check["ok"] for check in checks.values()),
+            "checks": checks,
+            "checked_at": time.time(),
+        }
+        if not result["ready"]:
+            failed = ", ".join(name for name, check in checks.items() if not check["ok"])
+            logger.warning(f"Readiness check failed: {failed}")
+        _readiness_cache["result"] = result
+        return dict(result, cached=False)
+
+
+@app.route("/health/ready", methods=["GET"])
+def health_ready():
+    """
+    Readiness check: database, uploads directory and config decryption.
+    
+    Returns 200 when every check passes and 503 otherwise, with per-check
+    timings. Results are cached for HEALTH_CACHE_SECONDS.
+    """
+    result = run_readiness_checks()
+    status = {"status": "ready" if result["ready"] else "degraded"}
+    status.update(result)
+    del status["ready"]
+    return jsonify(status), 200 if result["ready"] else 503
+
+
+def outbox_depth() -> Dict:
+    """Outbox emails per status, for the /metrics gauge."""
+    counts = get_outbox_stats(get_app_db_path(), failures=0)["counts"]
+    return {(status,): count for status, count in counts.items()}
+
+
+def db_pool_connections() -> Dict:
+    """Pooled SQLite connections per database file and state, for the /metrics gauge."""
+    values = {}
+    for path, stats in get_pool_stats().items():
+        for state in ("open", "idle", "in_use"):
+            values[(Path(path).name, state)] = stats[state]
+    return values
+
+
+def cache_events() -> Dict:
+    """Hit/miss counts of the in-process caches since start, for the /metrics counter."""
+    values = {}
+    caches = (
+        ("settings", get_settings_cache_stats()),
+        ("oauth_token", get_token_cache_stats()),
+        ("response", response_cache.stats()),
+    )
+    for cache, stats in caches:
+        for event in ("hits", "misses"):
+            values[(cache, event)] = stats[event]
+    return values
+
+
+def log_queue() -> Dict:
+    """Async log queue depth and dropped records, for the /metrics gauge."""
+    stats = get_logging_stats()
+    return {("queued",): stats["queued"], ("dropped",): stats["dropped"]}
+
+
+Gauge("outbox_emails", "Outbox emails by status", outbox_depth, ("status",))
+Gauge("db_pool_connections", "Pooled SQLite connections", db_pool_connections, ("db", "state"))
+CallbackCounter("cache_events_total", "In-process cache hits and misses", cache_events, ("cache", "event"))
+Gauge("log_queue_records", "Async log queue depth and dropped records", log_queue, ("state",))
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus-style metrics for this process.
+    
+    With several gunicorn workers each scrape is answered by one worker;
+    every series is labelled with that worker's pid.
+    """
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def run_production_server(
+    host: str,
+    port: int,
+    workers: int,
+    threads: int,
+    backlog: int,
+    graceful_timeout: int
+) -> None:
+    """
+    Serve the app with gunicorn using threaded (gthread) worker processes.
+    
+    Args:
+        host: Host to bind to
+        port: Port to bind to
+        workers: Number of worker processes
+        threads: Request threads per worker
+        backlog: Maximum queued connections waiting for a free thread
+        graceful_timeout: Seconds to let in-flight requests finish on shutdown
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("--workers/--threads require gunicorn: pip3 install gunicorn")
+    
+    class BirthdayManagerServer(BaseApplication):
+        """Embedded gunicorn application serving the Flask app."""
+        
+        def __init__(self, options: Dict):
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return app
+    
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "backlog": backlog,
+        "graceful_timeout": graceful_timeout,
+        # Each worker drains the shared outbox; claims are leased so
+        # workers never send the same email concurrently
+        # Import jobs are claimed the same way, one worker per job
+        "post_worker_init": lambda worker: (get_outbox_worker(), get_import_worker()),
+        "worker_exit": lambda server, worker: (
+            stop_outbox_worker(graceful_timeout), stop_import_worker(graceful_timeout),
+            close_pools(), shutdown_logging()
+        ),
+    }
+    BirthdayManagerServer(options).run()
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Birthday Reminder Flask Server")
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
     parser.add_argument("--port", type=int, default=5000, help="Port to bind to")
     parser.add_argument("--portable", action="store_true", help="Use portable mode (local config)")
+    parser.add_argument("--workers", type=int, default=env_int("SERVER_WORKERS"),
+                        help="Serve with gunicorn using this many worker processes (env: SERVER_WORKERS)")
+    parser.add_argument("--threads", type=int, default=env_int("SERVER_THREADS"),
+                        help="Request threads per gunicorn worker (env: SERVER_THREADS)")
+    parser.add_argument("--backlog", type=int, default=env_int("SERVER_BACKLOG") or 64,
+                        help="Maximum queued connections in gunicorn mode (default: 64)")
+    parser.add_argument("--graceful-timeout", type=int, default=env_int("SERVER_GRACEFUL_TIMEOUT") or 30,
+                        help="Seconds to finish in-flight requests on shutdown (default: 30)")
     
     args = parser.parse_args()
     
     if args.portable:
         os.environ["BIRTHDAY_REMINDER_PORTABLE"] = "true"
     
-    # Initialize database
-    portable = get_portable_mode()
-    db_path = get_db_path(portable)
-    init_database(db_path)
+    # Initialize (or migrate) the database schema once at startup
+    get_app_db_path()
     
-    # Run Flask app - single process, no reloader, no threads
+    if args.workers or args.threads:
+        # Don't let forked workers inherit the startup connections
+        close_pools()
+        run_production_server(
+            args.host,
+            args.port,
+            workers=args.workers or 1,
+            threads=args.threads or 1,
+            backlog=args.backlog,
+            graceful_timeout=args.graceful_timeout
+        )
+        return
+    
+    # Start delivering queued emails and running imports; stop cleanly on exit
+    get_outbox_worker()
+    get_import_worker()
+    atexit.register(stop_outbox_worker, 5.0)
+    atexit.register(stop_import_worker, 5.0)
+    
+    # Run Flask development server - single process, no reloader, no threads
     app.run(
         host=args.host,
         port=args.port,
@@ -1532,4 +1999,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
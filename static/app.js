@@ -5,12 +5,17 @@
 // CONFIGURATION & STATE
 // ============================================================================
 const API_BASE = '';
-let allBirthdays = [];
+let allBirthdays = []; // Pages loaded so far, in (birthday, id) order
 let filteredBirthdays = [];
 let paginatedBirthdays = [];
 let isDragging = false;
 let dragOffset = { x: 0, y: 0 };
 
+// Keyset paging of /api/birthdays: the next cursor (null once every page is
+// loaded) and the row count reported with the first page
+let birthdaysCursor = null;
+let birthdaysTotal = 0;
+
 // Pagination state
 let currentPage = 1;
 let itemsPerPage = 10;
@@ -74,6 +79,7 @@ document.addEventListener('DOMContentLoaded', () => {
     setupTableSorting();
     setupPagination();
     updateUIWithTranslations();
+    resumeImportJob();
     
     // Set current year in footer
     const currentYearEl = document.getElementById('current-year');
@@ -449,23 +455,69 @@ function showToast(message, type = 'info', duration = 3000) {
 // ============================================================================
 // DATA FETCHING
 // ============================================================================
+const BIRTHDAYS_PAGE_SIZE = 100;
+
+async function fetchBirthdayPage(cursor) {
+    const params = new URLSearchParams({ limit: BIRTHDAYS_PAGE_SIZE });
+    if (cursor) params.set('after', cursor);
+    
+    const response = await fetch(`${API_BASE}/api/birthdays?${params}`);
+    if (!response.ok) throw new Error('Failed to fetch birthdays');
+    return response.json();
+}
+
 async function fetchBirthdays() {
     try {
         showLoadingState();
-        const response = await fetch(`${API_BASE}/api/birthdays`);
-        if (!response.ok) throw new Error('Failed to fetch birthdays');
         
-        allBirthdays = await response.json();
-        filteredBirthdays = [...allBirthdays];
+        // Only the first page is loaded here. Later pages are fetched as the
+        // table is paged forward, or all at once when a search, a sort or the
+        // duplicate check needs the whole list
+        const page = await fetchBirthdayPage(null);
+        allBirthdays = page.items;
+        birthdaysCursor = page.next_cursor;
+        birthdaysTotal = page.total;
+        
+        // Keep an active search or sort, and stay on the current page after
+        // an add, edit or delete
+        if (sortColumn || document.getElementById('search-input')?.value.trim()) {
+            await loadAllBirthdays();
+        } else {
+            await loadMoreBirthdays(currentPage * itemsPerPage);
+        }
         renderAll();
-        updateStats();
     } catch (error) {
-        console.error('Error fetching birthdays:', error);
-        showToast(i18n?.t('failedToLoad') || 'Failed to load birthdays', 'error');
+        showLoadError(error);
         hideLoadingState();
     }
 }
 
+// Fetch further pages until at least count rows are loaded or none are left
+async function loadMoreBirthdays(count) {
+    while (birthdaysCursor && allBirthdays.length < count) {
+        const cursor = birthdaysCursor;
+        const page = await fetchBirthdayPage(cursor);
+        if (cursor !== birthdaysCursor) continue; // A reload or another load got there first
+        allBirthdays.push(...page.items);
+        birthdaysCursor = page.next_cursor;
+    }
+    filterBirthdays();
+}
+
+function loadAllBirthdays() {
+    return loadMoreBirthdays(Infinity);
+}
+
+function showLoadError(error) {
+    console.error('Error fetching birthdays:', error);
+    showToast(i18n?.t('failedToLoad') || 'Failed to load birthdays', 'error');
+}
+
+// Rows the table pages through: the server's count until every page is loaded
+function listedCount() {
+    return birthdaysCursor ? birthdaysTotal : filteredBirthdays.length;
+}
+
 function showLoadingState() {
     const tableBody = document.getElementById('birthday-table');
     tableBody.innerHTML = `
@@ -488,7 +540,7 @@ function hideLoadingState() {
 // ============================================================================
 function setupTableSorting() {
     document.querySelectorAll('.sortable').forEach(header => {
-        header.addEventListener('click', () => {
+        header.addEventListener('click', async () => {
             const column = header.dataset.sort;
             if (sortColumn === column) {
                 sortDirection = sortDirection === 'asc' ? 'desc' : 'asc';
@@ -497,6 +549,11 @@ function setupTableSorting() {
                 sortDirection = 'asc';
             }
             updateSortIndicators();
+            try {
+                await loadAllBirthdays(); // Sorting needs every row
+            } catch (error) {
+                showLoadError(error);
+            }
             applyPagination(); // This handles sorting internally
             announceTableUpdate();
         });
@@ -585,7 +642,7 @@ function updatePaginationControls() {
     const controls = document.getElementById('pagination-controls');
     if (!controls) return;
     
-    const totalPages = Math.ceil(filteredBirthdays.length / itemsPerPage);
+    const totalPages = Math.ceil(listedCount() / itemsPerPage);
     
     if (totalPages <= 1) {
         controls.innerHTML = '';
@@ -631,8 +688,8 @@ function updatePaginationInfo() {
     if (!info) return;
     
     const start = (currentPage - 1) * itemsPerPage + 1;
-    const end = Math.min(currentPage * itemsPerPage, filteredBirthdays.length);
-    const total = filteredBirthdays.length;
+    const total = listedCount();
+    const end = Math.min(currentPage * itemsPerPage, total);
     
     if (total === 0) {
         info.textContent = t('noBirthdays');
@@ -642,10 +699,16 @@ function updatePaginationInfo() {
     info.textContent = `${t('showing')} ${start} ${t('to')} ${end} ${t('of')} ${total} ${t('results')}`;
 }
 
-function goToPage(page) {
-    const totalPages = Math.ceil(filteredBirthdays.length / itemsPerPage);
+async function goToPage(page) {
+    const totalPages = Math.ceil(listedCount() / itemsPerPage);
     if (page < 1 || page > totalPages) return;
     
+    try {
+        await loadMoreBirthdays(page * itemsPerPage);
+    } catch (error) {
+        showLoadError(error);
+        return;
+    }
     currentPage = page;
     applyPagination(); // This handles sorting internally
     document.getElementById('birthday-table')?.scrollIntoView({ behavior: 'smooth', block: 'start' });
@@ -724,40 +787,44 @@ function announceTableUpdate() {
 // RENDERING FUNCTIONS
 // ============================================================================
 function renderAll() {
-    renderTodayBirthdays();
-    renderCountdownWidget();
-    render30DayView();
+    renderHighlights();
     applyPagination(); // This handles sorting internally
     updateStats();
 }
 
+// Today's and the coming week's birthdays come from the server, since only
+// part of the list may be loaded
+async function renderHighlights() {
+    try {
+        const [todayResponse, upcomingResponse] = await Promise.all([
+            fetch(`${API_BASE}/api/birthdays/today`),
+            fetch(`${API_BASE}/api/birthdays/upcoming30`)
+        ]);
+        if (!todayResponse.ok || !upcomingResponse.ok) throw new Error('Failed to fetch upcoming birthdays');
+        
+        const todays = await todayResponse.json();
+        const grouped = await upcomingResponse.json();
+        const week = Object.values(grouped)
+            .flat()
+            .filter(b => b.days_until <= 7)
+            .sort((a, b) => a.days_until - b.days_until);
+        
+        document.getElementById('today-count').textContent = todays.length;
+        document.getElementById('week-count').textContent = week.length;
+        renderTodayBirthdays(todays);
+        renderCountdownWidget(week);
+        render30DayView(grouped);
+    } catch (error) {
+        console.error('Error rendering upcoming birthdays:', error);
+    }
+}
+
 function updateStats() {
-    const today = new Date();
-    const todayCount = allBirthdays.filter(b => {
-        const bday = new Date(b.birthday);
-        return bday.getMonth() === today.getMonth() && bday.getDate() === today.getDate();
-    }).length;
-    
-    const weekCount = allBirthdays.filter(b => {
-        const bday = new Date(b.birthday);
-        const daysUntil = getDaysUntilBirthday(bday);
-        return daysUntil >= 0 && daysUntil <= 7;
-    }).length;
-    
-    document.getElementById('today-count').textContent = todayCount;
-    document.getElementById('week-count').textContent = weekCount;
-    document.getElementById('total-count').textContent = allBirthdays.length;
+    document.getElementById('total-count').textContent = birthdaysCursor ? birthdaysTotal : allBirthdays.length;
 }
 
-function renderTodayBirthdays() {
+function renderTodayBirthdays(todays) {
     const todayList = document.getElementById('today-birthday-list');
-    const today = new Date();
-    
-    const todays = allBirthdays.filter(birthday => {
-        const birthdayDate = new Date(birthday.birthday);
-        return birthdayDate.getMonth() === today.getMonth() && 
-               birthdayDate.getDate() === today.getDate();
-    });
     
     if (todays.length === 0) {
         todayList.innerHTML = `
@@ -792,19 +859,12 @@ function renderTodayBirthdays() {
     }).join('');
 }
 
-function renderCountdownWidget() {
+// week: the next 7 days' birthdays from /api/birthdays/upcoming30, soonest first
+function renderCountdownWidget(week) {
     const widget = document.getElementById('countdown-widget');
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
     
-    const upcoming = allBirthdays
-        .map(b => {
-            const bday = new Date(b.birthday);
-            const daysUntil = getDaysUntilBirthday(bday);
-            return { ...b, daysUntil };
-        })
-        .filter(b => b.daysUntil >= 0 && b.daysUntil <= 7)
-        .sort((a, b) => a.daysUntil - b.daysUntil)
+    const upcoming = week
+        .map(b => ({ ...b, daysUntil: b.days_until }))
         .slice(0, 5);
     
     if (upcoming.length === 0) {
@@ -1273,8 +1333,9 @@ function handleSearchDebounced(e) {
     }, 300); // 300ms debounce
 }
 
-function handleSearch(e) {
-    const query = e.target.value.toLowerCase().trim();
+// Apply the search box to allBirthdays
+function filterBirthdays() {
+    const query = (document.getElementById('search-input')?.value || '').toLowerCase().trim();
     
     if (query === '') {
         filteredBirthdays = [...allBirthdays];
@@ -1283,6 +1344,18 @@ function handleSearch(e) {
             normalizeName(birthday.name).toLowerCase().includes(normalizeName(query))
         );
     }
+}
+
+async function handleSearch(e) {
+    // Searching matches anywhere in a name, so it needs every row
+    if (document.getElementById('search-input')?.value.trim()) {
+        try {
+            await loadAllBirthdays();
+        } catch (error) {
+            showLoadError(error);
+        }
+    }
+    filterBirthdays();
     
     currentPage = 1; // Reset to first page on search
     applyPagination(); // This handles sorting internally
@@ -1298,7 +1371,12 @@ function normalizeName(name) {
     return name.trim().replace(/\s+/g, ' ').normalize('NFD').replace(/[\u0300-\u036f]/g, '');
 }
 
-function checkDuplicate(name, excludeId = null) {
+async function checkDuplicate(name, excludeId = null) {
+    try {
+        await loadAllBirthdays(); // A duplicate may be on a page not loaded yet
+    } catch (error) {
+        console.error('Error fetching birthdays:', error); // Check the rows we have
+    }
     const normalized = normalizeName(name).toLowerCase();
     return allBirthdays.some(bday => {
         if (excludeId && bday.id === excludeId) return false;
@@ -1412,7 +1490,7 @@ async function handleAddBirthday(e) {
     const birthday = document.getElementById('birthday').value;
     
     // Duplicate detection
-    if (checkDuplicate(name)) {
+    if (await checkDuplicate(name)) {
         showToast(i18n?.t('duplicateFound') || 'A birthday with this name already exists', 'error');
         document.getElementById('name').focus();
         return;
@@ -1472,7 +1550,7 @@ async function handleUpdateBirthday(e) {
     const name = normalizeName(document.getElementById('edit-name').value);
     
     // Duplicate detection (exclude current)
-    if (checkDuplicate(name, parseInt(id))) {
+    if (await checkDuplicate(name, parseInt(id))) {
         showToast(i18n?.t('duplicateFound') || 'A birthday with this name already exists', 'error');
         return;
     }
@@ -2086,23 +2164,7 @@ async function handleImport(e) {
         formData.append('file', file);
         formData.append('replace', document.getElementById('replace-existing').checked);
         
-        const response = await fetch(`${API_BASE}/api/import`, {
-            method: 'POST',
-            body: formData
-        });
-        
-        const result = await response.json();
-        
-        if (response.ok) {
-            let message = result.message || i18n?.t('importSuccess') || 'Import completed successfully!';
-            if (result.errors && result.errors.length > 0) {
-                message += ` (${result.errors.length} ${i18n?.t('importErrors') || 'errors'})`;
-            }
-            showToast(message, 'success');
-            fetchBirthdays();
-        } else {
-            showToast(result.error || i18n?.t('failedToImport') || 'Failed to import birthdays', 'error');
-        }
+        await startImportJob(`${API_BASE}/api/import`, formData, file.name);
     } catch (error) {
         console.error('Error importing birthdays:', error);
         showToast(i18n?.t('failedToImport') || 'Failed to import birthdays', 'error');
@@ -2209,20 +2271,9 @@ async function handleCSVImport() {
         formData.append('file', window.pendingCSVFile);
         formData.append('replace', document.getElementById('replace-existing').checked);
         
-        const response = await fetch(`${API_BASE}/api/import/csv`, {
-            method: 'POST',
-            body: formData
-        });
-        
-        const result = await response.json();
-        
-        if (response.ok) {
-            showToast(result.message || i18n?.t('importSuccess') || 'Import completed successfully!', 'success');
+        if (await startImportJob(`${API_BASE}/api/import/csv`, formData, window.pendingCSVFile.name)) {
             document.getElementById('csv-preview-modal').classList.add('hidden');
             releaseFocusTrap();
-            fetchBirthdays();
-        } else {
-            showToast(result.error || i18n?.t('failedToImportCSV') || 'Failed to import CSV', 'error');
         }
     } catch (error) {
         console.error('Error importing CSV:', error);
@@ -2232,15 +2283,150 @@ async function handleCSVImport() {
     }
 }
 
+// ============================================================================
+// BACKGROUND IMPORT JOBS
+// ============================================================================
+const IMPORT_JOB_KEY = 'importJob';
+const IMPORT_POLL_INTERVAL = 1000;
+let importPollTimer = null;
+
+// Upload a file to an import endpoint, which queues a job; returns true if queued
+async function startImportJob(url, formData, filename) {
+    const response = await fetch(url, {
+        method: 'POST',
+        body: formData
+    });
+    
+    const result = await response.json();
+    
+    if (!response.ok) {
+        showToast(result.error || i18n?.t('failedToImport') || 'Failed to import birthdays', 'error');
+        return false;
+    }
+    
+    // Remember the job, so a reload keeps showing its progress
+    localStorage.setItem(IMPORT_JOB_KEY, JSON.stringify({ id: result.job_id, filename }));
+    trackImportJob(result.job_id, filename);
+    return true;
+}
+
+function resumeImportJob() {
+    try {
+        const job = JSON.parse(localStorage.getItem(IMPORT_JOB_KEY));
+        if (job && job.id) {
+            trackImportJob(job.id, job.filename);
+        }
+    } catch (error) {
+        localStorage.removeItem(IMPORT_JOB_KEY);
+    }
+}
+
+function getImportPanel() {
+    let panel = document.getElementById('import-progress');
+    if (!panel) {
+        panel = document.createElement('div');
+        panel.id = 'import-progress';
+        panel.setAttribute('role', 'status');
+        panel.className = 'fixed bottom-4 left-4 z-50 w-80 p-4 bg-white dark:bg-gray-800 text-gray-800 dark:text-white rounded-xl shadow-2xl space-y-2';
+        panel.innerHTML = `
+            <div class="font-semibold truncate" data-field="title"></div>
+            <div class="h-2 bg-gray-200 dark:bg-gray-700 rounded-full overflow-hidden">
+                <div class="h-full bg-pink-500 transition-all duration-300" data-field="bar" style="width: 0%"></div>
+            </div>
+            <div class="flex justify-between text-sm text-gray-600 dark:text-gray-400">
+                <span data-field="rows"></span>
+                <span data-field="rate"></span>
+            </div>
+            <div class="flex justify-between items-center text-sm">
+                <span class="text-gray-600 dark:text-gray-400" data-field="eta"></span>
+                <button class="text-red-500 hover:text-red-600 font-medium" data-field="cancel"></button>
+            </div>
+        `;
+        document.body.appendChild(panel);
+    }
+    return panel;
+}
+
+function renderImportJob(panel, job, filename) {
+    const field = (name) => panel.querySelector(`[data-field="${name}"]`);
+    
+    field('title').textContent = i18n?.t('importing', { file: filename || job.filename || '' }) || `Importing ${filename}…`;
+    // Unknown size: show an indeterminate (full, pulsing) bar
+    field('bar').style.width = job.progress !== null ? `${Math.round(job.progress * 100)}%` : '100%';
+    field('bar').classList.toggle('animate-pulse', job.progress === null);
+    field('rows').textContent = i18n?.t('importRows', { rows: job.rows_processed }) || `${job.rows_processed} rows`;
+    field('rate').textContent = job.throughput ? (i18n?.t('importRate', { rate: Math.round(job.throughput) }) || `${Math.round(job.throughput)} rows/s`) : '';
+    field('eta').textContent = job.eta_seconds !== null ? (i18n?.t('importEta', { seconds: Math.ceil(job.eta_seconds) }) || `about ${Math.ceil(job.eta_seconds)}s left`) : '';
+    field('cancel').textContent = i18n?.t('cancelImport') || 'Cancel import';
+    field('cancel').disabled = job.cancel_requested;
+}
+
+function finishImportJob(job) {
+    clearTimeout(importPollTimer);
+    importPollTimer = null;
+    localStorage.removeItem(IMPORT_JOB_KEY);
+    document.getElementById('import-progress')?.remove();
+    
+    if (job.status === 'completed') {
+        let message = job.message || i18n?.t('importSuccess') || 'Import completed successfully!';
+        if (job.errors && job.errors.length > 0) {
+            message += ` (${job.skipped} ${i18n?.t('importErrors') || 'errors'})`;
+        }
+        showToast(message, 'success');
+        fetchBirthdays();
+    } else if (job.status === 'cancelled') {
+        showToast(i18n?.t('importCancelled') || 'Import cancelled; no birthdays were imported', 'warning');
+    } else {
+        showToast(job.message || i18n?.t('failedToImport') || 'Failed to import birthdays', 'error');
+    }
+}
+
+function trackImportJob(jobId, filename) {
+    clearTimeout(importPollTimer);
+    const panel = getImportPanel();
+    panel.querySelector('[data-field="cancel"]').onclick = async () => {
+        try {
+            const response = await fetch(`${API_BASE}/api/jobs/${jobId}/cancel`, { method: 'POST' });
+            const job = await response.json();
+            if (response.ok) {
+                job.finished ? finishImportJob(job) : renderImportJob(panel, job, filename);
+            }
+        } catch (error) {
+            console.error('Error cancelling import:', error);
+        }
+    };
+    
+    const poll = async () => {
+        try {
+            const response = await fetch(`${API_BASE}/api/jobs/${jobId}`);
+            if (response.status === 404) {
+                // Job purged (or from another server): stop tracking it
+                localStorage.removeItem(IMPORT_JOB_KEY);
+                panel.remove();
+                return;
+            }
+            const job = await response.json();
+            if (response.ok) {
+                if (job.finished) {
+                    finishImportJob(job);
+                    return;
+                }
+                renderImportJob(panel, job, filename);
+            }
+        } catch (error) {
+            console.error('Error checking import progress:', error);
+        }
+        importPollTimer = setTimeout(poll, IMPORT_POLL_INTERVAL);
+    };
+    poll();
+}
+
 // ============================================================================
 // 30-DAY UPCOMING VIEW
 // ============================================================================
-async function render30DayView() {
+// grouped: /api/birthdays/upcoming30, birthdays by weekday
+function render30DayView(grouped) {
     try {
-        const response = await fetch(`${API_BASE}/api/birthdays/upcoming30`);
-        if (!response.ok) throw new Error('Failed to fetch 30-day view');
-        
-        const grouped = await response.json();
         const container = document.getElementById('upcoming30-content');
         if (!container) return;
         
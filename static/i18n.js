@@ -169,6 +169,12 @@ const i18n = {
             failedToImport: 'Failed to import birthdays',
             failedToPreviewCSV: 'Failed to preview CSV',
             failedToImportCSV: 'Failed to import CSV',
+            importing: 'Importing {file}…',
+            importRows: '{rows} rows',
+            importRate: '{rate} rows/s',
+            importEta: 'about {seconds}s left',
+            cancelImport: 'Cancel import',
+            importCancelled: 'Import cancelled; no birthdays were imported',
             failedToPreviewDigest: 'Failed to preview digest',
             digestSendSuccess: 'Digest sent successfully!',
             failedToSendDigest: 'Failed to send digest',
@@ -327,6 +333,12 @@ const i18n = {
             failedToImport: 'Geburtstage konnten nicht importiert werden',
             failedToPreviewCSV: 'CSV-Vorschau konnte nicht geladen werden',
             failedToImportCSV: 'CSV konnte nicht importiert werden',
+            importing: '{file} wird importiert…',
+            importRows: '{rows} Zeilen',
+            importRate: '{rate} Zeilen/s',
+            importEta: 'noch etwa {seconds} s',
+            cancelImport: 'Import abbrechen',
+            importCancelled: 'Import abgebrochen; es wurden keine Geburtstage importiert',
             failedToPreviewDigest: 'Vorschau konnte nicht geladen werden',
             digestSendSuccess: 'Zusammenfassung erfolgreich gesendet!',
             failedToSendDigest: 'Zusammenfassung konnte nicht gesendet werden',
@@ -485,6 +497,12 @@ const i18n = {
             failedToImport: 'فشل استيراد أعياد الميلاد',
             failedToPreviewCSV: 'فشل معاينة CSV',
             failedToImportCSV: 'فشل استيراد CSV',
+            importing: 'جارٍ استيراد {file}…',
+            importRows: '{rows} صف',
+            importRate: '{rate} صف/ث',
+            importEta: 'متبقٍ حوالي {seconds} ث',
+            cancelImport: 'إلغاء الاستيراد',
+            importCancelled: 'تم إلغاء الاستيراد؛ لم يتم استيراد أي أعياد ميلاد',
             failedToPreviewDigest: 'فشل معاينة الملخص',
             digestSendSuccess: 'تم إرسال الملخص بنجاح!',
             failedToSendDigest: 'فشل إرسال الملخص',
@@ -672,6 +690,12 @@ const i18n = {
             failedToImport: 'Têxistina rojbûnan bi ser neket',
             failedToPreviewCSV: 'Pêşdîtina CSV bi ser neket',
             failedToImportCSV: 'Têxistina CSV bi ser neket',
+            importing: '{file} tê têxistin…',
+            importRows: '{rows} rêz',
+            importRate: '{rate} rêz/s',
+            importEta: 'nêzîkî {seconds} s maye',
+            cancelImport: 'Têxistinê betal bike',
+            importCancelled: 'Têxistin hate betalkirin; tu rojbûn nehatin têxistin',
             failedToPreviewDigest: 'Pêşdîtina kurteyê bi ser neket',
             digestSendSuccess: 'Kurte bi serkeftî hate şandin!',
             failedToSendDigest: 'Şandina kurteyê bi ser neket',
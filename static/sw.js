@@ -2,8 +2,8 @@
 // Provides offline caching for read operations
 
 const CACHE_NAME = 'birthday-manager-v1';
-const STATIC_CACHE = 'birthday-manager-static-v1';
-const API_CACHE = 'birthday-manager-api-v1';
+const STATIC_CACHE = 'birthday-manager-static-v2';
+const API_CACHE = 'birthday-manager-api-v2';
 
 // Assets to cache on install
 const STATIC_ASSETS = [
@@ -15,6 +15,45 @@ const STATIC_ASSETS = [
     '/static/manifest.webmanifest'
 ];
 
+// Birthday views served with ETags by the server
+const REVALIDATED_API_PATHS = [
+    '/api/birthdays',
+    '/api/birthdays/today',
+    '/api/birthdays/upcoming30'
+];
+
+// Ask the server whether the cached copy is still current (If-None-Match).
+// A 304 costs the server one version lookup and reuses the cached body;
+// if the network is down the cached copy is served as-is.
+async function revalidate(request) {
+    const cache = await caches.open(API_CACHE);
+    const cachedResponse = await cache.match(request);
+    
+    const headers = new Headers(request.headers);
+    const etag = cachedResponse && cachedResponse.headers.get('ETag');
+    if (etag) {
+        headers.set('If-None-Match', etag);
+    }
+    
+    try {
+        // no-store: handle 304s here rather than in the browser HTTP cache
+        const response = await fetch(request.url, { headers, cache: 'no-store', credentials: 'same-origin' });
+        if (response.status === 304 && cachedResponse) {
+            return cachedResponse;
+        }
+        if (response.status === 200 && response.headers.get('ETag')) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        // Network failed, return cached if available
+        return cachedResponse || new Response(
+            JSON.stringify({ error: 'Offline - using cached data' }),
+            { headers: { 'Content-Type': 'application/json' } }
+        );
+    }
+}
+
 // Install event - cache static assets
 self.addEventListener('install', (event) => {
     event.waitUntil(
@@ -49,51 +88,11 @@ self.addEventListener('fetch', (event) => {
         return;
     }
     
-    // API requests - cache-first with network fallback
+    // API requests - revalidate cached birthday views with their ETag
     if (url.pathname.startsWith('/api/')) {
         // Only cache GET requests for birthdays (read operations)
-        if (url.pathname === '/api/birthdays' || url.pathname === '/api/birthdays/today') {
-            event.respondWith(
-                caches.open(API_CACHE).then((cache) => {
-                    return cache.match(request).then((cachedResponse) => {
-                        // Return cached if available and not too old (5 minutes)
-                        if (cachedResponse) {
-                            const cachedDate = cachedResponse.headers.get('sw-cached-date');
-                            if (cachedDate) {
-                                const age = Date.now() - parseInt(cachedDate);
-                                if (age < 5 * 60 * 1000) { // 5 minutes
-                                    return cachedResponse;
-                                }
-                            }
-                        }
-                        
-                        // Fetch from network
-                        return fetch(request)
-                            .then((response) => {
-                                // Clone response for caching
-                                const responseToCache = response.clone();
-                                const headers = new Headers(responseToCache.headers);
-                                headers.set('sw-cached-date', Date.now().toString());
-                                
-                                const modifiedResponse = new Response(responseToCache.body, {
-                                    status: responseToCache.status,
-                                    statusText: responseToCache.statusText,
-                                    headers: headers
-                                });
-                                
-                                cache.put(request, modifiedResponse);
-                                return response;
-                            })
-                            .catch(() => {
-                                // Network failed, return cached if available
-                                return cachedResponse || new Response(
-                                    JSON.stringify({ error: 'Offline - using cached data' }),
-                                    { headers: { 'Content-Type': 'application/json' } }
-                                );
-                            });
-                    });
-                })
-            );
+        if (REVALIDATED_API_PATHS.includes(url.pathname)) {
+            event.respondWith(revalidate(request));
         } else {
             // Other API requests - network only
             event.respondWith(fetch(request));
@@ -101,8 +100,25 @@ self.addEventListener('fetch', (event) => {
         return;
     }
     
-    // Static assets - cache-first strategy
-    if (url.pathname.startsWith('/static/') || url.pathname === '/') {
+    // Page - network first, so a rebuilt index.html picks up new asset hashes;
+    // the server answers with 304 when it hasn't changed
+    if (url.pathname === '/') {
+        event.respondWith(
+            fetch(request)
+                .then((response) => {
+                    if (response.status === 200) {
+                        const responseToCache = response.clone();
+                        caches.open(STATIC_CACHE).then((cache) => cache.put(request, responseToCache));
+                    }
+                    return response;
+                })
+                .catch(() => caches.match(request))
+        );
+        return;
+    }
+    
+    // Static assets - cache-first strategy (/assets/ URLs are content-hashed)
+    if (url.pathname.startsWith('/static/') || url.pathname.startsWith('/assets/')) {
         event.respondWith(
             caches.match(request).then((cachedResponse) => {
                 return cachedResponse || fetch(request).then((response) => {
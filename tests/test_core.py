@@ -2,8 +2,24 @@
 import unittest
 import tempfile
 import shutil
+import csv
+import gzip
+import io
+import json
+import logging
+import queue
+import os
+import re
+import smtplib
+import sqlite3
+import threading
+import time
+import unicodedata
+import zipfile
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+from unittest import mock
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -11,13 +27,58 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from core import (
     get_db_path,
     init_database,
+    get_schema_version,
+    check_database,
+    get_data_version,
+    SCHEMA_VERSION,
     add_birthday,
+    bulk_insert_birthdays,
+    iter_text_lines,
+    iter_csv_birthdays,
+    normalize_birthday,
+    update_birthday,
+    delete_birthday,
     get_all_birthdays,
     get_todays_birthdays,
+    get_birthdays_by_month_day,
+    get_upcoming_birthdays,
+    count_birthdays,
+    get_birthdays_page,
+    iter_birthdays,
+    open_birthdays_snapshot,
+    delete_all_birthdays,
+    save_oauth_state,
+    get_oauth_state,
+    update_oauth_state,
+    delete_oauth_state,
+    claim_outbox_batch,
+    get_outbox_stats,
+    retry_outbox_email,
     calculate_age,
+    compute_ages_bulk,
     export_birthdays,
+    iter_export_zip,
+    iter_csv_export,
+    iter_ics_export,
     import_birthdays,
 )
+from db import ConnectionPool, get_pool, close_pools, get_connection
+from outbox import OutboxWorker, queue_message
+from jobs import (
+    ImportJobWorker,
+    cancel_import_job,
+    claim_import_job,
+    create_import_job,
+    describe_import_job,
+    get_import_job,
+)
+from mail_oauth import SMTPSession, AccessTokenCache
+import config
+from logger import SanitizedFormatter, redact
+import logger as logger_module
+from metrics import CallbackCounter, Counter, Histogram, DB_OPERATIONS, render_metrics
+import serialization
+import server
 
 
 class TestCoreFunctions(unittest.TestCase):
@@ -33,6 +94,14 @@ class TestCoreFunctions(unittest.TestCase):
         """Clean up test database."""
         shutil.rmtree(self.test_dir, ignore_errors=True)
     
+    def test_init_database_records_schema_version(self):
+        """Test schema initialization is versioned and idempotent."""
+        self.assertEqual(get_schema_version(self.db_path), SCHEMA_VERSION)
+        add_birthday(self.db_path, "Test User", "1990-01-15", "male", None)
+        init_database(self.db_path)
+        self.assertEqual(get_schema_version(self.db_path), SCHEMA_VERSION)
+        self.assertEqual(len(get_all_birthdays(self.db_path)), 1)
+    
     def test_add_birthday(self):
         """Test adding a birthday."""
         birthday_id = add_birthday(
@@ -74,6 +143,46 @@ class TestCoreFunctions(unittest.TestCase):
         age = calculate_age(birthday)
         self.assertEqual(age, 25)
     
+    def test_compute_ages_bulk_matches_calculate_age(self):
+        """Test bulk age/days-until against the per-row functions."""
+        today = datetime.now().date()
+        birthdays = [
+            f"{today.year - 25}-{today.month:02d}-{today.day:02d}",
+            "1990-01-15",
+            "1985-12-31",
+            "2000-02-29",
+            "invalid-date",
+        ]
+        expected_ages = [calculate_age(b) for b in birthdays]
+        
+        ages, days_until = compute_ages_bulk(birthdays, use_numpy=False)
+        self.assertEqual(ages, expected_ages)
+        self.assertEqual(days_until[0], 0)
+        self.assertEqual(days_until[-1], -1)
+        
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            return
+        self.assertEqual(compute_ages_bulk(birthdays, use_numpy=True), (ages, days_until))
+    
+    def test_compute_ages_bulk_paths_agree(self):
+        """Test the NumPy and pure-Python paths agree on legacy and malformed dates."""
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+        birthdays = [
+            "1990-01-05", "1990-01-5", "1990-1-05", "1990-1-5", "2000-2-29", "1990-02-30",
+            "1990-01-1 ", " 1990-1-5", "1990-01-155", "1990-13-01", "abcd-ef-gh", "", None,
+        ]
+        today = date(2024, 6, 1)
+        python_result = compute_ages_bulk(birthdays, today=today, use_numpy=False)
+        self.assertEqual(compute_ages_bulk(birthdays, today=today, use_numpy=True), python_result)
+        self.assertEqual(python_result[0][:5], [34, 34, 34, 34, 24])
+        self.assertEqual(python_result[0][5:], [0] * 8)
+        self.assertEqual(python_result[1][5:], [-1] * 8)
+    
     def test_get_todays_birthdays(self):
         """Test getting today's birthdays."""
         today = datetime.now()
@@ -86,20 +195,1292 @@ class TestCoreFunctions(unittest.TestCase):
         self.assertEqual(len(todays), 1)
         self.assertEqual(todays[0]["name"], "Today User")
 
+    
+    def test_todays_birthdays_use_month_day_index(self):
+        """Test today's lookup is an index search, not a table scan."""
+        with get_connection(self.db_path) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM birthdays WHERE month_day = ?",
+                ("01-15",)
+            ).fetchall()
+        self.assertIn("idx_birthdays_month_day", " ".join(row[3] for row in plan))
+    
+    def test_get_birthdays_by_month_day_wraps_year_end(self):
+        """Test month-day ranges that cross December 31."""
+        add_birthday(self.db_path, "January", "1991-01-02", None, None)
+        add_birthday(self.db_path, "June", "1992-06-01", None, None)
+        add_birthday(self.db_path, "December", "1990-12-30", None, None)
+        
+        names = [b["name"] for b in get_birthdays_by_month_day(self.db_path, "12-25", "01-10")]
+        self.assertEqual(names, ["December", "January"])
+        names = [b["name"] for b in get_birthdays_by_month_day(self.db_path, "01-01", "06-30")]
+        self.assertEqual(names, ["January", "June"])
+    
+    def test_get_upcoming_birthdays_wraps_year_end(self):
+        """Test upcoming birthdays across the December/January boundary."""
+        add_birthday(self.db_path, "January", "1991-01-02", None, None)
+        add_birthday(self.db_path, "December", "1990-12-30", None, None)
+        add_birthday(self.db_path, "June", "1992-06-01", None, None)
+        
+        upcoming = get_upcoming_birthdays(self.db_path, date(2025, 12, 28), 7)
+        self.assertEqual([b["name"] for b in upcoming], ["December", "January"])
+        self.assertEqual([b["days_until"] for b in upcoming], [2, 5])
+        self.assertEqual(upcoming[1]["target_date"], "2026-01-02")
+    
+    def test_get_upcoming_birthdays_leap_day(self):
+        """Test February 29 birthdays fall on February 28 in non-leap years."""
+        add_birthday(self.db_path, "Leap", "2000-02-29", None, None)
+        
+        upcoming = get_upcoming_birthdays(self.db_path, date(2025, 2, 20), 8)
+        self.assertEqual(len(upcoming), 1)
+        self.assertEqual(upcoming[0]["target_date"], "2025-02-28")
+        
+        upcoming = get_upcoming_birthdays(self.db_path, date(2028, 2, 20), 9)
+        self.assertEqual(upcoming[0]["target_date"], "2028-02-29")
+        self.assertEqual(get_upcoming_birthdays(self.db_path, date(2028, 2, 20), 8), [])
+    
+    def test_get_birthdays_page_walks_keyset(self):
+        """Test keyset pages cover every row once, including equal birthdays."""
+        for i in range(5):
+            add_birthday(self.db_path, f"User {i}", "1990-01-15" if i < 3 else f"199{i}-03-01", None, None)
+        
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = get_birthdays_page(self.db_path, limit=2, after=cursor)
+            seen.extend(b["name"] for b in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f"User {i}" for i in range(5)])
+    
+    def test_iter_birthdays_batches(self):
+        """Test iter_birthdays yields every row in (birthday, id) order across batches."""
+        for i in range(7):
+            add_birthday(self.db_path, f"User {i}", "1990-01-15" if i < 4 else f"198{i}-03-01", None, None)
+        
+        expected = [b["id"] for b in sorted(get_all_birthdays(self.db_path), key=lambda b: (b["birthday"], b["id"]))]
+        for batch_size in (1, 3, 7, 100):
+            rows = list(iter_birthdays(self.db_path, batch_size=batch_size))
+            self.assertEqual([b["id"] for b in rows], expected)
+        self.assertIn("age", rows[0])
+        
+        delete_all_birthdays(self.db_path)
+        self.assertEqual(list(iter_birthdays(self.db_path)), [])
+    
+    def test_iter_birthdays_reads_one_snapshot(self):
+        """Test writes made while iterating don't change the rows yielded."""
+        for i in range(3):
+            add_birthday(self.db_path, f"User {i}", f"199{i}-01-15", None, None)
+        
+        version, rows = open_birthdays_snapshot(self.db_path, batch_size=1)
+        self.assertEqual(version, get_data_version(self.db_path))
+        first = next(rows)
+        add_birthday(self.db_path, "Later", "1980-01-01", None, None)
+        delete_birthday(self.db_path, first["id"] + 1)
+        names = [first["name"]] + [b["name"] for b in rows]
+        self.assertEqual(names, ["User 0", "User 1", "User 2"])
+        self.assertGreater(get_data_version(self.db_path), version)
+        self.assertEqual(len(list(iter_birthdays(self.db_path, batch_size=1))), 3)
+    
+    def test_birthdays_page_route_reports_total(self):
+        """Test the first page carries the matching row count and later pages don't."""
+        for i in range(5):
+            add_birthday(self.db_path, f"User {i}", f"199{i}-0{1 + i % 2}-15", None, None)
+        client = server.app.test_client()
+        with mock.patch.object(server, "get_app_db_path", lambda: self.db_path):
+            first = client.get("/api/birthdays?limit=2").get_json()
+            self.assertEqual((len(first["items"]), first["total"]), (2, 5))
+            self.assertEqual(client.get("/api/birthdays?limit=2&month=2").get_json()["total"], 2)
+            second = client.get(f"/api/birthdays?limit=2&after={first['next_cursor']}").get_json()
+            self.assertEqual(len(second["items"]), 2)
+            self.assertNotIn("total", second)
+    
+    def test_get_birthdays_page_filters(self):
+        """Test month, gender and name-prefix filters."""
+        add_birthday(self.db_path, "Anna", "1990-03-15", "female", None)
+        add_birthday(self.db_path, "Andreas", "1991-03-20", "male", None)
+        add_birthday(self.db_path, "Bob", "1992-03-01", "male", None)
+        add_birthday(self.db_path, "An_na", "1993-07-01", "female", None)
+        
+        page, cursor = get_birthdays_page(self.db_path, month=3, name_prefix="an")
+        self.assertEqual([b["name"] for b in page], ["Anna", "Andreas"])
+        self.assertIsNone(cursor)
+        page, _ = get_birthdays_page(self.db_path, gender="male", month=3)
+        self.assertEqual([b["name"] for b in page], ["Andreas", "Bob"])
+        page, _ = get_birthdays_page(self.db_path, name_prefix="An_")
+        self.assertEqual([b["name"] for b in page], ["An_na"])
+        self.assertEqual(count_birthdays(self.db_path), 4)
+        self.assertEqual(count_birthdays(self.db_path, month=3, name_prefix="an"), 2)
+        self.assertEqual(count_birthdays(self.db_path, gender="female"), 2)
+        
+        with self.assertRaises(ValueError):
+            get_birthdays_page(self.db_path, after="not-a-cursor")
+        with self.assertRaises(ValueError):
+            get_birthdays_page(self.db_path, limit=0)
+    
+    def test_delete_all_birthdays(self):
+        """Test clearing the table reports the deleted row count."""
+        add_birthday(self.db_path, "User 1", "1990-01-15", None, None)
+        add_birthday(self.db_path, "User 2", "1991-01-15", None, None)
+        self.assertEqual(delete_all_birthdays(self.db_path), 2)
+        self.assertEqual(get_all_birthdays(self.db_path), [])
+    
+    def test_oauth_state_round_trip(self):
+        """Test OAuth flow state is shared through the database."""
+        expires_at = datetime.now().timestamp() + 600
+        save_oauth_state(self.db_path, "abc", {"client_id": "id"}, expires_at)
+        
+        self.assertTrue(update_oauth_state(self.db_path, "abc", completed=True))
+        stored = get_oauth_state(self.db_path, "abc")
+        self.assertEqual(stored["client_id"], "id")
+        self.assertTrue(stored["completed"])
+        self.assertEqual(stored["expires_at"], expires_at)
+        
+        delete_oauth_state(self.db_path, "abc")
+        self.assertIsNone(get_oauth_state(self.db_path, "abc"))
+        self.assertFalse(update_oauth_state(self.db_path, "abc", completed=True))
+    
+    def test_migrates_legacy_database(self):
+        """Test a pre-versioning database gains the month_day column."""
+        legacy_db = self.test_dir / "legacy.db"
+        conn = sqlite3.connect(str(legacy_db))
+        conn.execute(
+            "CREATE TABLE birthdays (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "name TEXT NOT NULL, birthday TEXT NOT NULL, photo TEXT, gender TEXT)"
+        )
+        conn.execute("INSERT INTO birthdays (name, birthday) VALUES ('Old', '1980-03-04')")
+        conn.commit()
+        conn.close()
+        
+        init_database(legacy_db)
+        self.assertEqual(get_schema_version(legacy_db), SCHEMA_VERSION)
+        self.assertEqual(len(get_birthdays_by_month_day(legacy_db, "03-04", "03-04")), 1)
+        self.assertNotIn("month_day", get_all_birthdays(legacy_db)[0])
+    
+    def test_migration_pads_legacy_dates(self):
+        """Test unpadded dates from a version 1 database are found by month_day queries."""
+        legacy_db = self.test_dir / "legacy_v1.db"
+        conn = sqlite3.connect(str(legacy_db))
+        conn.execute(
+            "CREATE TABLE birthdays (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "name TEXT NOT NULL, birthday TEXT NOT NULL, photo TEXT, gender TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO birthdays (name, birthday) VALUES (?, ?)",
+            [("Padded", "1990-01-04"), ("Short", "1990-1-5"), ("Month", "1991-1-15"), ("Day", "1992-11-5")],
+        )
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        conn.close()
+        
+        init_database(legacy_db)
+        self.assertEqual(
+            [b["birthday"] for b in get_all_birthdays(legacy_db)],
+            ["1990-01-04", "1990-01-05", "1991-01-15", "1992-11-05"],
+        )
+        
+        upcoming = get_upcoming_birthdays(legacy_db, date(2025, 1, 3), 7)
+        self.assertEqual([b["name"] for b in upcoming], ["Padded", "Short"])
+        page, _ = get_birthdays_page(legacy_db, month=1)
+        self.assertEqual({b["name"] for b in page}, {"Padded", "Short", "Month"})
+        with mock.patch("core.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime(2025, 1, 5, 9, 0)
+            self.assertEqual([b["name"] for b in get_todays_birthdays(legacy_db)], ["Short"])
+    
+    def test_data_version_bumped_by_mutations(self):
+        """Test that each committed change bumps the data version and no-ops don't."""
+        version = get_data_version(self.db_path)
+        birthday_id = add_birthday(self.db_path, "Versioned", "1990-01-15", "male", None)
+        self.assertEqual(get_data_version(self.db_path), version + 1)
+        
+        update_birthday(self.db_path, birthday_id, "Versioned", "1990-01-16", "male", None)
+        self.assertEqual(get_data_version(self.db_path), version + 2)
+        
+        self.assertFalse(update_birthday(self.db_path, 9999, "Missing", "1990-01-16"))
+        self.assertFalse(delete_birthday(self.db_path, 9999)[0])
+        self.assertEqual(get_data_version(self.db_path), version + 2)
+        
+        delete_birthday(self.db_path, birthday_id)
+        self.assertEqual(get_data_version(self.db_path), version + 3)
+    
+    def test_normalize_birthday(self):
+        """Test dates are zero-padded and impossible dates rejected."""
+        self.assertEqual(normalize_birthday("1990-1-5"), "1990-01-05")
+        self.assertEqual(normalize_birthday("2000-02-29"), "2000-02-29")
+        for invalid in ("1900-02-29", "1990-04-31", "1990-13-01", "0000-01-01", "1990/01/05", " 1990-01-05", None):
+            with self.assertRaises(ValueError):
+                normalize_birthday(invalid)
+    
+    def test_bulk_insert_birthdays(self):
+        """Test bulk inserts are all-or-nothing unless partial imports are allowed."""
+        add_birthday(self.db_path, "Existing", "1980-05-05", None, None)
+        rows = [
+            {"name": "A", "birthday": "1990-1-2", "gender": "female"},
+            {"name": "B", "birthday": "1990-02-30"},
+            {"name": "", "birthday": "1990-01-01"},
+            {"name": "C", "birthday": "1991-03-04"},
+        ]
+        version = get_data_version(self.db_path)
+        
+        inserted, errors = bulk_insert_birthdays(self.db_path, iter(rows), replace_existing=True, chunk_size=2)
+        self.assertEqual(inserted, 0)
+        self.assertEqual([(e["row"], e["name"]) for e in errors], [(2, "B"), (3, "")])
+        self.assertEqual([b["name"] for b in get_all_birthdays(self.db_path)], ["Existing"])
+        self.assertEqual(get_data_version(self.db_path), version)
+        
+        inserted, errors = bulk_insert_birthdays(
+            self.db_path, iter(rows), allow_partial=True, replace_existing=True, chunk_size=2
+        )
+        self.assertEqual((inserted, len(errors)), (2, 2))
+        birthdays = get_all_birthdays(self.db_path)
+        self.assertEqual([(b["name"], b["birthday"], b["gender"]) for b in birthdays],
+                         [("A", "1990-01-02", "female"), ("C", "1991-03-04", None)])
+        self.assertEqual(get_data_version(self.db_path), version + 1)
+        
+        self.assertEqual(bulk_insert_birthdays(self.db_path, rows[:1] * 5, chunk_size=2), (5, []))
+        self.assertEqual(len(get_all_birthdays(self.db_path)), 7)
+    
+    def test_bulk_insert_reports_progress_after_invalid_row(self):
+        """Test progress keeps being reported while only validating the rest."""
+        rows = [{"name": "Bad", "birthday": "1990-13-01"}]
+        rows += [{"name": f"User {i}", "birthday": "1990-01-15"} for i in range(5000)]
+        calls = []
+        
+        inserted, errors = bulk_insert_birthdays(self.db_path, iter(rows), progress=calls.append)
+        
+        self.assertEqual((inserted, len(errors)), (0, 1))
+        self.assertEqual(calls, [1000, 2000, 3000, 4000, 5000, 5001])
+    
+    def test_iter_text_lines(self):
+        """Test incremental decoding matches universal-newline reading at any chunk size."""
+        data = "\ufeffName,Birthday\r\n\"Zoë\r\nX\",1990-01-05\rB,1991-02-03\nC,".encode("utf-8")
+        expected = list(io.StringIO(data.decode("utf-8-sig"), newline=None))
+        for chunk_size in (1, 2, 5, 1024):
+            self.assertEqual(list(iter_text_lines(io.BytesIO(data), chunk_size=chunk_size)), expected)
+        with self.assertRaises(UnicodeDecodeError):
+            list(iter_text_lines(io.BytesIO(b"\xff\xfe")))
+    
+    def test_iter_csv_birthdays_feeds_bulk_insert(self):
+        """Test parsed CSV rows go straight into bulk_insert_birthdays."""
+        data = b"Name,Birthday,Gender\n Anna ,1990-03-15,female\nBen,1991-04-20,\n"
+        rows = list(iter_csv_birthdays(io.BytesIO(data)))
+        self.assertEqual(rows[0], {"name": "Anna", "birthday": "1990-03-15", "gender": "female", "photo": None})
+        self.assertEqual(bulk_insert_birthdays(self.db_path, iter_csv_birthdays(io.BytesIO(data))), (2, []))
+        self.assertEqual([b["name"] for b in get_all_birthdays(self.db_path)], ["Anna", "Ben"])
+    
+    def test_check_database(self):
+        """Test the readiness check passes on a current schema and fails on an old one."""
+        check_database(self.db_path)
+        
+        old_db = self.test_dir / "old.db"
+        conn = sqlite3.connect(str(old_db))
+        conn.execute("CREATE TABLE birthdays (id INTEGER PRIMARY KEY, name TEXT, birthday TEXT)")
+        conn.commit()
+        conn.close()
+        with self.assertRaises(RuntimeError):
+            check_database(old_db)
+    
+    def test_check_database_reports_write_lock(self):
+        """Test the readiness check fails while another connection holds the write lock."""
+        conn = sqlite3.connect(str(self.db_path), isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            with self.assertRaisesRegex(RuntimeError, "locked"):
+                check_database(self.db_path, write_timeout=0.05)
+            conn.rollback()
+            check_database(self.db_path, write_timeout=0.05)
+        finally:
+            conn.close()
+        # The pooled connection keeps its usual busy timeout
+        with get_connection(self.db_path) as pooled:
+            self.assertEqual(pooled.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test pooled SQLite connections."""
+    
+    def setUp(self):
+        """Set up test database."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test_pool.db"
+        init_database(self.db_path)
+    
+    def tearDown(self):
+        """Close pools and clean up test database."""
+        close_pools()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_connections_are_reused(self):
+        """Test that repeated calls reuse one pooled connection."""
+        for i in range(5):
+            add_birthday(self.db_path, f"User {i}", "1990-01-15", None, None)
+        get_all_birthdays(self.db_path)
+        
+        stats = get_pool(self.db_path).stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertGreaterEqual(stats["reused"], 6)
+        self.assertEqual(stats["in_use"], 0)
+    
+    def test_pool_size_is_bounded(self):
+        """Test that the pool never opens more than its size."""
+        pool = ConnectionPool(self.db_path, size=2, timeout=0.1)
+        with pool.connection(), pool.connection():
+            with self.assertRaises(Exception):
+                with pool.connection():
+                    pass
+        self.assertEqual(pool.stats()["open"], 2)
+        self.assertTrue(pool.check_health())
+        pool.close()
+    
+    def test_update_and_delete_report_missing_rows(self):
+        """Test row counts are per statement, not per pooled connection."""
+        birthday_id = add_birthday(self.db_path, "User", "1990-01-15", None, None)
+        self.assertTrue(update_birthday(self.db_path, birthday_id, "New", "1990-01-16"))
+        self.assertFalse(update_birthday(self.db_path, 9999, "New", "1990-01-16"))
+        self.assertEqual(delete_birthday(self.db_path, 9999), (False, None))
+        self.assertEqual(delete_birthday(self.db_path, birthday_id), (True, None))
+
+
+class TestOutbox(unittest.TestCase):
+    """Test the email outbox and its background worker."""
+    
+    def setUp(self):
+        """Set up test database with one queued email."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test_outbox.db"
+        init_database(self.db_path)
+        
+        msg = EmailMessage()
+        msg["Subject"] = "Birthday Reminder: Test"
+        msg["From"] = "from@example.com"
+        msg["To"] = "to@example.com"
+        msg.set_content("Hello")
+        self.outbox_id = queue_message(self.db_path, msg)
+    
+    def tearDown(self):
+        """Close pools and clean up test database."""
+        close_pools()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_worker_sends_queued_email(self):
+        """Test a successful batch marks the email as sent."""
+        sent = []
+        
+        def send_batch(messages, before_send):
+            for index, msg in enumerate(messages):
+                before_send(index)
+                sent.append(msg)
+            return [None] * len(messages)
+        
+        worker = OutboxWorker(self.db_path, send_batch)
+        
+        self.assertEqual(worker.process_batch(), 1)
+        self.assertEqual(sent[0]["Subject"], "Birthday Reminder: Test")
+        self.assertEqual(get_outbox_stats(self.db_path)["counts"]["sent"], 1)
+        self.assertEqual(worker.process_batch(), 0)
+    
+    def test_worker_retries_then_dead_letters(self):
+        """Test failures back off and dead-letter after max_attempts."""
+        worker = OutboxWorker(
+            self.db_path,
+            lambda msgs, before_send: [Exception("password: hunter2")] * len(msgs),
+            sanitize=lambda text: text.replace("hunter2", "[REDACTED]"),
+            max_attempts=2,
+            base_delay=0
+        )
+        
+        worker.process_batch()
+        self.assertEqual(get_outbox_stats(self.db_path)["counts"]["pending"], 1)
+        worker.process_batch()
+        stats = get_outbox_stats(self.db_path)
+        self.assertEqual(stats["counts"]["dead"], 1)
+        self.assertEqual(stats["dead"][0]["attempts"], 2)
+        self.assertNotIn("hunter2", stats["dead"][0]["last_error"])
+        
+        self.assertTrue(retry_outbox_email(self.db_path, self.outbox_id))
+        self.assertEqual(get_outbox_stats(self.db_path)["counts"]["pending"], 1)
+    
+    def test_expired_leases_count_as_attempts(self):
+        """Test an email whose send never finishes is dead-lettered instead of re-leased forever."""
+        for attempt in range(3):
+            batch = claim_outbox_batch(self.db_path, 10, lease_seconds=-1, max_attempts=3)
+            self.assertEqual([(entry["id"], entry["attempts"]) for entry in batch], [(self.outbox_id, attempt)])
+        
+        self.assertEqual(claim_outbox_batch(self.db_path, 10, lease_seconds=-1, max_attempts=3), [])
+        stats = get_outbox_stats(self.db_path)
+        self.assertEqual(stats["counts"]["dead"], 1)
+        self.assertEqual(stats["dead"][0]["attempts"], 3)
+        self.assertIn("lease expired", stats["dead"][0]["last_error"])
+
+
+    def test_worker_renews_lease_before_each_send(self):
+        """Test each send renews the lease, and an email reclaimed meanwhile isn't sent twice."""
+        for i in range(2):
+            msg = EmailMessage()
+            msg["Subject"] = f"Second batch {i}"
+            msg.set_content("Hello")
+            queue_message(self.db_path, msg)
+        sent = []
+        
+        def send_batch(messages, before_send):
+            results = []
+            for index, msg in enumerate(messages):
+                if index == 2:
+                    # The lease runs out and another worker reclaims the last email
+                    with get_connection(self.db_path, write=True) as conn:
+                        conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE subject = 'Second batch 1'")
+                    self.assertEqual(len(claim_outbox_batch(self.db_path, 10)), 1)
+                try:
+                    before_send(index)
+                except Exception as e:
+                    results.append(e)
+                    continue
+                with get_connection(self.db_path) as conn:
+                    lease_until = conn.execute(
+                        "SELECT next_attempt_at FROM outbox WHERE subject = ?", (msg["Subject"],)
+                    ).fetchone()[0]
+                self.assertGreater(lease_until, time.time() + 500)
+                sent.append(msg["Subject"])
+                results.append(None)
+            return results
+        
+        worker = OutboxWorker(self.db_path, send_batch, lease_seconds=600)
+        self.assertEqual(worker.process_batch(), 3)
+        self.assertEqual(sent, ["Birthday Reminder: Test", "Second batch 0"])
+        counts = get_outbox_stats(self.db_path)["counts"]
+        self.assertEqual(counts["sent"], 2)
+        # Left to the worker that reclaimed it
+        self.assertEqual(counts["sending"], 1)
+
+
+class TestImportJobs(unittest.TestCase):
+    """Test background import jobs and their worker."""
+    
+    def setUp(self):
+        """Set up test database and a CSV upload."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test_jobs.db"
+        init_database(self.db_path)
+        self.uploads_dir = self.test_dir / "uploads"
+        self.uploads_dir.mkdir()
+        self.worker = ImportJobWorker(self.db_path, self.uploads_dir, progress_interval=0)
+        
+        self.upload = self.test_dir / "import.csv"
+        self.upload.write_text(
+            "Name,Birthday,Gender\n" + "".join(f"User {i},1990-01-15,\n" for i in range(50)) + "Bad,1990-13-01,\n"
+        )
+        self.job_id = create_import_job(
+            self.worker.jobs_db, "csv", self.upload, filename="import.csv",
+            options={"partial": True}, total_bytes=self.upload.stat().st_size
+        )
+    
+    def tearDown(self):
+        """Close pools and clean up test database."""
+        close_pools()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_worker_runs_csv_job(self):
+        """Test a claimed job imports the file and records the outcome."""
+        job = claim_import_job(self.worker.jobs_db)
+        self.assertEqual(job["id"], self.job_id)
+        self.assertIsNone(claim_import_job(self.worker.jobs_db))
+        
+        self.worker.run_job(job)
+        
+        view = describe_import_job(get_import_job(self.worker.jobs_db, self.job_id))
+        self.assertEqual(view["status"], "completed")
+        self.assertEqual((view["imported"], view["skipped"]), (50, 1))
+        self.assertEqual(view["progress"], 1.0)
+        self.assertIn("Row 51 (Bad)", view["errors"][0])
+        self.assertEqual(len(get_all_birthdays(self.db_path)), 50)
+        self.assertFalse(self.upload.exists())
+    
+    def test_jobs_run_one_at_a_time(self):
+        """Test no job is claimed while another is running, unless it went stale."""
+        second_id = create_import_job(self.worker.jobs_db, "csv", self.upload)
+        self.assertEqual(claim_import_job(self.worker.jobs_db)["id"], self.job_id)
+        self.assertIsNone(claim_import_job(self.worker.jobs_db))
+        
+        # The first job's worker stopped reporting progress: fail it, run the next
+        self.assertEqual(claim_import_job(self.worker.jobs_db, stale_seconds=-1)["id"], second_id)
+        first = get_import_job(self.worker.jobs_db, self.job_id)
+        self.assertEqual(first["status"], "failed")
+        self.assertIn("interrupted", first["message"])
+    
+    def test_cancel_rolls_back_running_job(self):
+        """Test cancelling a running job leaves the birthdays untouched."""
+        add_birthday(self.db_path, "Existing", "1980-05-05", None, None)
+        job = claim_import_job(self.worker.jobs_db)
+        job["options"]["replace"] = True
+        self.assertTrue(cancel_import_job(self.worker.jobs_db, self.job_id))
+        
+        self.worker.run_job(job)
+        
+        self.assertEqual(get_import_job(self.worker.jobs_db, self.job_id)["status"], "cancelled")
+        self.assertEqual([b["name"] for b in get_all_birthdays(self.db_path)], ["Existing"])
+        self.assertFalse(cancel_import_job(self.worker.jobs_db, self.job_id))
+    
+    def test_cancel_all_or_nothing_job_after_invalid_row(self):
+        """Test a partial=false job still honors cancel after its first invalid row."""
+        upload = self.test_dir / "strict.csv"
+        upload.write_text(
+            "Name,Birthday,Gender\nBad,1990-13-01,\n" + "".join(f"User {i},1990-01-15,\n" for i in range(5000))
+        )
+        cancel_import_job(self.worker.jobs_db, self.job_id)
+        job_id = create_import_job(self.worker.jobs_db, "csv", upload, options={"partial": False})
+        job = claim_import_job(self.worker.jobs_db)
+        self.assertTrue(cancel_import_job(self.worker.jobs_db, job_id))
+        
+        self.worker.run_job(job)
+        
+        self.assertEqual(get_import_job(self.worker.jobs_db, job_id)["status"], "cancelled")
+
+    
+    def make_zip_upload(self, count: int) -> Path:
+        """Export count birthdays with photos from another database as a ZIP upload."""
+        source_dir = self.test_dir / "source"
+        (source_dir / "uploads").mkdir(parents=True)
+        source_db = source_dir / "source.db"
+        init_database(source_db)
+        for i in range(count):
+            (source_dir / "uploads" / f"{i}.jpg").write_bytes(os.urandom(100))
+            add_birthday(source_db, f"Photo {i}", "1990-01-15", None, f"/uploads/{i}.jpg")
+        upload = self.test_dir / "import.zip"
+        upload.write_bytes(b"".join(iter_export_zip(source_db, source_dir / "uploads")))
+        cancel_import_job(self.worker.jobs_db, self.job_id)
+        return upload
+    
+    def test_worker_runs_zip_job(self):
+        """Test a ZIP job imports entries with their photos and reports entry progress."""
+        upload = self.make_zip_upload(3)
+        job_id = create_import_job(self.worker.jobs_db, "zip", upload)
+        
+        self.worker.run_job(claim_import_job(self.worker.jobs_db))
+        
+        view = describe_import_job(get_import_job(self.worker.jobs_db, job_id))
+        self.assertEqual((view["status"], view["imported"], view["total_rows"]), ("completed", 3, 3))
+        self.assertEqual(len(list(self.uploads_dir.iterdir())), 3)
+        self.assertFalse(upload.exists())
+    
+    def test_cancel_zip_job_removes_copied_photos(self):
+        """Test a cancelled ZIP job imports nothing and deletes the photos it copied."""
+        upload = self.make_zip_upload(3)
+        job_id = create_import_job(self.worker.jobs_db, "zip", upload, options={"replace": True})
+        add_birthday(self.db_path, "Existing", "1980-05-05", None, None)
+        job = claim_import_job(self.worker.jobs_db)
+        cancel_import_job(self.worker.jobs_db, job_id)
+        
+        self.worker.run_job(job)
+        
+        self.assertEqual(get_import_job(self.worker.jobs_db, job_id)["status"], "cancelled")
+        self.assertEqual([b["name"] for b in get_all_birthdays(self.db_path)], ["Existing"])
+        self.assertEqual(list(self.uploads_dir.iterdir()), [])
+    
+    def test_describe_import_job(self):
+        """Test progress, throughput and ETA for ZIP (entries) and CSV (bytes) jobs."""
+        job = {
+            "id": "x", "kind": "zip", "filename": "a.zip", "status": "running", "cancel_requested": False,
+            "rows_processed": 250, "total_rows": 1000, "bytes_processed": 0, "total_bytes": 4000,
+            "imported": 0, "skipped": 0, "errors": [], "message": None,
+            "created_at": 90.0, "started_at": 100.0, "finished_at": None,
+        }
+        view = describe_import_job(job, now=110.0)
+        self.assertEqual((view["progress"], view["throughput"], view["eta_seconds"]), (0.25, 25.0, 30.0))
+        
+        job.update(kind="csv", total_rows=None, bytes_processed=1000)
+        self.assertEqual(describe_import_job(job, now=110.0)["progress"], 0.25)
+        
+        job.update(status="pending", started_at=None, rows_processed=0, bytes_processed=0)
+        view = describe_import_job(job, now=110.0)
+        self.assertEqual((view["progress"], view["throughput"], view["eta_seconds"]), (0.0, None, None))
+        
+        job.update(status="completed", started_at=100.0, finished_at=104.0, rows_processed=1000)
+        view = describe_import_job(job, now=500.0)
+        self.assertEqual((view["progress"], view["throughput"], view["eta_seconds"]), (1.0, 250.0, None))
+        self.assertTrue(view["finished"])
+
+
+class TestImportRoutes(unittest.TestCase):
+    """Test the import endpoints queue jobs and the job endpoints."""
+    
+    def setUp(self):
+        """Point the app at a test database and an unstarted import worker."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test_routes.db"
+        init_database(self.db_path)
+        self.worker = ImportJobWorker(self.db_path, self.test_dir, progress_interval=0)
+        patched = (
+            ("get_app_db_path", lambda: self.db_path),
+            ("get_import_worker", lambda: self.worker),
+            ("IMPORTS_DIR", self.test_dir / "imports"),
+        )
+        for target, value in patched:
+            patcher = mock.patch.object(server, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = server.app.test_client()
+    
+    def tearDown(self):
+        """Run queued jobs (deleting their uploads), close pools and clean up."""
+        while (job := claim_import_job(self.worker.jobs_db)) is not None:
+            self.worker.run_job(job)
+        close_pools()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def post_file(self, url: str, name: str, data: bytes, **form):
+        return self.client.post(url, data={"file": (io.BytesIO(data), name), **form})
+    
+    def test_csv_import_returns_job(self):
+        """Test /api/import/csv answers 202 with a pending job that imports the file."""
+        response = self.post_file("/api/import/csv", "a.csv", b"Name,Birthday\nAnna,1990-03-15\n", partial="false")
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+        
+        job = self.client.get(f"/api/jobs/{job_id}").get_json()
+        self.assertEqual((job["status"], job["kind"], job["filename"]), ("pending", "csv", "a.csv"))
+        
+        self.worker.run_job(claim_import_job(self.worker.jobs_db))
+        job = self.client.get(f"/api/jobs/{job_id}").get_json()
+        self.assertEqual((job["status"], job["imported"]), ("completed", 1))
+        self.assertEqual([b["name"] for b in get_all_birthdays(self.db_path)], ["Anna"])
+    
+    def test_zip_import_returns_job(self):
+        """Test /api/import answers 202 and rejects non-ZIP files."""
+        zip_data = b"".join(iter_export_zip(self.db_path, self.test_dir))
+        response = self.post_file("/api/import", "a.zip", zip_data, replace="true")
+        self.assertEqual(response.status_code, 202)
+        job = get_import_job(self.worker.jobs_db, response.get_json()["job_id"])
+        self.assertEqual((job["kind"], job["options"]), ("zip", {"replace": True}))
+        
+        self.assertEqual(self.post_file("/api/import", "a.txt", b"x").status_code, 400)
+    
+    def test_cancel_job(self):
+        """Test cancelling a pending job, a finished job and an unknown job."""
+        job_id = self.post_file("/api/import/csv", "a.csv", b"Name,Birthday\n").get_json()["job_id"]
+        
+        response = self.client.post(f"/api/jobs/{job_id}/cancel")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["status"], "cancelled")
+        self.assertEqual(list((self.test_dir / "imports").iterdir()), [])
+        self.assertEqual(self.client.post(f"/api/jobs/{job_id}/cancel").status_code, 409)
+        self.assertEqual(self.client.post("/api/jobs/missing/cancel").status_code, 404)
+        self.assertEqual(self.client.get("/api/jobs/missing").status_code, 404)
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test the LRU of rendered response bodies."""
+    
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted at capacity."""
+        cache = server.ResponseCache(max_entries=2)
+        generation = (1, date(2024, 1, 1))
+        for key in ("a", "b"):
+            cache.get_or_render(generation, key, lambda key=key: key.encode())
+        cache.get_or_render(generation, "a", lambda: self.fail("a should be cached"))
+        cache.get_or_render(generation, "c", lambda: b"c")
+        
+        self.assertEqual(cache.get_or_render(generation, "b", lambda: b"b2"), b"b2")
+        self.assertEqual(cache.stats()["evictions"], 2)
+        self.assertEqual(cache.stats()["entries"], 2)
+    
+    def test_new_generation_drops_entries(self):
+        """Test a data version or date change re-renders instead of serving the old body."""
+        cache = server.ResponseCache(max_entries=8)
+        self.assertEqual(cache.get_or_render((1, date(2024, 1, 1)), "a", lambda: b"old"), b"old")
+        self.assertEqual(cache.get_or_render((1, date(2024, 1, 1)), "a", lambda: b"new"), b"old")
+        self.assertEqual(cache.get_or_render((2, date(2024, 1, 1)), "a", lambda: b"new"), b"new")
+        self.assertEqual(cache.get_or_render((2, date(2024, 1, 2)), "a", lambda: b"newer"), b"newer")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["invalidations"]), (1, 3, 2))
+    
+    def test_render_for_passed_generation_is_not_stored(self):
+        """Test a body rendered while the generation moved on is returned but not cached."""
+        cache = server.ResponseCache(max_entries=8)
+        
+        def render_during_write():
+            # Another request sees the next data version while this one renders
+            cache.get_or_render((2, date(2024, 1, 1)), "other", lambda: b"other")
+            return b"stale"
+        
+        self.assertEqual(cache.get_or_render((1, date(2024, 1, 1)), "a", render_during_write), b"stale")
+        self.assertEqual(cache.get_or_render((2, date(2024, 1, 1)), "a", lambda: b"fresh"), b"fresh")
+    
+    def test_write_invalidates_cached_view(self):
+        """Test a cached view reflects a birthday added after it was rendered."""
+        test_dir = Path(tempfile.mkdtemp())
+        try:
+            db_path = test_dir / "test_cache.db"
+            init_database(db_path)
+            client = server.app.test_client()
+            soon = (datetime.now() + timedelta(days=2)).date()
+            with mock.patch.object(server, "get_app_db_path", lambda: db_path):
+                self.assertEqual(client.get("/api/digest/preview?days=7").get_json()["count"], 0)
+                hits = server.response_cache.stats()["hits"]
+                self.assertEqual(client.get("/api/digest/preview?days=7").get_json()["count"], 0)
+                self.assertEqual(server.response_cache.stats()["hits"], hits + 1)
+                
+                # The ETag and the cache generation share one version lookup
+                client.get("/api/birthdays/upcoming30")
+                with mock.patch.object(server, "get_data_version", wraps=get_data_version) as lookup:
+                    self.assertEqual(client.get("/api/birthdays/upcoming30").status_code, 200)
+                self.assertEqual(lookup.call_count, 1)
+                self.assertEqual(server.response_cache.stats()["hits"], hits + 2)
+                add_birthday(db_path, "Soon", f"2000-{soon:%m-%d}", None, None)
+                self.assertEqual(client.get("/api/digest/preview?days=7").get_json()["count"], 1)
+        finally:
+            close_pools()
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+class TestCompression(unittest.TestCase):
+    """Test compressed JSON responses and precompressed static assets."""
+    
+    def setUp(self):
+        """Set up a test database with enough birthdays for a compressible page."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test_compression.db"
+        init_database(self.db_path)
+        bulk_insert_birthdays(
+            self.db_path, ({"name": f"User {i}", "birthday": "1990-01-15"} for i in range(40))
+        )
+        patcher = mock.patch.object(server, "get_app_db_path", lambda: self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = server.app.test_client()
+    
+    def tearDown(self):
+        """Close pools and clean up."""
+        close_pools()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def get(self, url: str, encoding: str = "", **headers):
+        if encoding:
+            headers["Accept-Encoding"] = encoding
+        return self.client.get(url, headers=headers)
+    
+    def test_negotiates_encoding(self):
+        """Test gzip and br bodies decode to the identity body, with Vary set."""
+        plain = self.get("/api/birthdays?limit=100")
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertIn("Accept-Encoding", plain.headers["Vary"])
+        
+        response = self.get("/api/birthdays?limit=100", "gzip")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(gzip.decompress(response.get_data()), plain.get_data())
+        
+        if server.brotli is not None:
+            response = self.get("/api/birthdays?limit=100", "gzip, br")
+            self.assertEqual(response.headers["Content-Encoding"], "br")
+            self.assertEqual(server.brotli.decompress(response.get_data()), plain.get_data())
+    
+    def test_small_bodies_are_not_compressed(self):
+        """Test bodies under COMPRESS_MIN_SIZE are sent as-is."""
+        response = self.get("/api/birthdays?limit=1", "gzip")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        
+        with mock.patch.dict(os.environ, {"COMPRESS_MIN_SIZE": "10"}):
+            self.assertEqual(self.get("/api/birthdays?limit=1", "gzip").headers["Content-Encoding"], "gzip")
+    
+    def test_streamed_list_is_compressed(self):
+        """Test the streamed full list is compressed on the fly."""
+        response = self.get("/api/birthdays", "gzip")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(len(json.loads(gzip.decompress(response.get_data()))), 40)
+    
+    def test_streamed_list_etag_matches_body(self):
+        """Test the streamed list's ETag describes the snapshot it sent."""
+        stale_etag = self.get("/api/birthdays").headers["ETag"]
+        real_open = server.open_birthdays_snapshot
+        
+        def open_after_write(db_path):
+            # A write lands after conditional_get computed its ETag
+            add_birthday(self.db_path, "New", "1991-02-03", None, None)
+            return real_open(db_path)
+        
+        with mock.patch.object(server, "open_birthdays_snapshot", open_after_write):
+            response = self.get("/api/birthdays")
+        self.assertEqual(len(json.loads(response.get_data())), 41)
+        self.assertNotEqual(response.headers["ETag"], stale_etag)
+        
+        response = self.get("/api/birthdays", **{"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(response.status_code, 304)
+    
+    def test_compressed_etag_revalidates(self):
+        """Test each encoding gets its own ETag and either one answers 304."""
+        plain_etag = self.get("/api/birthdays?limit=100").headers["ETag"]
+        gzip_etag = self.get("/api/birthdays?limit=100", "gzip").headers["ETag"]
+        self.assertEqual(gzip_etag, plain_etag[:-1] + '-gzip"')
+        
+        response = self.get("/api/birthdays?limit=100", "gzip", **{"If-None-Match": gzip_etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], gzip_etag)
+        self.assertEqual(self.get("/api/birthdays?limit=100", **{"If-None-Match": plain_etag}).status_code, 304)
+        
+        add_birthday(self.db_path, "New", "1991-02-03", None, None)
+        response = self.get("/api/birthdays?limit=100", "gzip", **{"If-None-Match": gzip_etag})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_precompressed_assets(self):
+        """Test hashed assets use the .br/.gz sibling and are cached as immutable."""
+        dist = self.test_dir / "dist"
+        dist.mkdir()
+        (dist / "app.abc123.js").write_bytes(b"plain")
+        (dist / "app.abc123.js.gz").write_bytes(b"gzipped")
+        (dist / "app.abc123.js.br").write_bytes(b"brotli")
+        (dist / "index.html").write_bytes(b"<html></html>")
+        
+        with mock.patch.object(server, "STATIC_DIST_DIR", dist):
+            response = self.get("/assets/app.abc123.js", "gzip, br")
+            self.assertEqual((response.headers["Content-Encoding"], response.get_data()), ("br", b"brotli"))
+            self.assertEqual(self.get("/assets/app.abc123.js", "gzip").get_data(), b"gzipped")
+            
+            response = self.get("/assets/app.abc123.js")
+            self.assertEqual(response.get_data(), b"plain")
+            self.assertNotIn("Content-Encoding", response.headers)
+            self.assertIn("Accept-Encoding", response.headers["Vary"])
+            self.assertTrue(response.cache_control.immutable)
+            self.assertEqual(response.cache_control.max_age, 365 * 24 * 3600)
+            
+            response = self.get("/")
+            self.assertFalse(response.cache_control.immutable)
+            self.assertTrue(response.cache_control.no_cache)
+            self.assertEqual(self.get("/assets/missing.js").status_code, 404)
+
+class FakeSMTP:
+    """In-memory stand-in for smtplib.SMTP that records logins and sends."""
+    
+    instances = []
+    
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        self.drop_next_send = False
+        FakeSMTP.instances.append(self)
+    
+    def ehlo(self):
+        pass
+    
+    def starttls(self):
+        pass
+    
+    def login(self, user, password):
+        self.logins += 1
+    
+    def send_message(self, msg):
+        if self.drop_next_send:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(msg)
+    
+    def quit(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+class TestSMTPSession(unittest.TestCase):
+    """Test SMTP session reuse."""
+    
+    def setUp(self):
+        FakeSMTP.instances = []
+        patcher = mock.patch("mail_oauth.smtplib.SMTP", FakeSMTP)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def make_message(self, subject):
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg.set_content("Hello")
+        return msg
+    
+    def test_one_login_for_many_messages(self):
+        """Test that a session authenticates once and sends every message."""
+        with SMTPSession("smtp.example.com", 587, "me@example.com", password="secret") as session:
+            for i in range(3):
+                session.send_message(self.make_message(f"Message {i}"))
+        
+        self.assertEqual(len(FakeSMTP.instances), 1)
+        self.assertEqual(FakeSMTP.instances[0].logins, 1)
+        self.assertEqual(len(FakeSMTP.instances[0].sent), 3)
+        self.assertEqual(session.messages_sent, 3)
+    
+    def test_reconnects_after_disconnect(self):
+        """Test that a dropped connection is reopened and the message retried."""
+        with SMTPSession("smtp.example.com", 587, "me@example.com", password="secret") as session:
+            session.send_message(self.make_message("First"))
+            FakeSMTP.instances[0].drop_next_send = True
+            session.send_message(self.make_message("Second"))
+        
+        self.assertEqual(session.connections, 2)
+        self.assertEqual(len(FakeSMTP.instances[1].sent), 1)
+        self.assertEqual(FakeSMTP.instances[1].sent[0]["Subject"], "Second")
+
+
+class TestAccessTokenCache(unittest.TestCase):
+    """Test OAuth2 access token caching."""
+    
+    def setUp(self):
+        self.cache = AccessTokenCache(margin=60)
+        self.calls = 0
+        self.expires_in = 3600
+        patcher = mock.patch("mail_oauth.request_access_token", side_effect=self.fake_request)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def fake_request(self, client_id, client_secret, refresh_token):
+        self.calls += 1
+        time.sleep(0.05)
+        return f"token-{self.calls}", self.expires_in
+    
+    def test_reuses_token_until_expiry(self):
+        """Test that a token is reused and refreshed once it nears expiry."""
+        self.assertEqual(self.cache.get("client", "secret", "refresh"), "token-1")
+        self.assertEqual(self.cache.get("client", "secret", "refresh"), "token-1")
+        self.assertEqual(self.calls, 1)
+        
+        # Different refresh token is a different cache entry
+        self.assertEqual(self.cache.get("client", "secret", "other"), "token-2")
+        
+        # Tokens inside the safety margin are treated as expired
+        self.expires_in = 30
+        self.cache.get("client", "secret", "short", force_refresh=True)
+        self.assertEqual(self.cache.get("client", "secret", "short"), "token-4")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+    
+    def test_concurrent_callers_share_one_refresh(self):
+        """Test that simultaneous misses trigger a single token request."""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get("client", "secret", "refresh")))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ["token-1"] * 5)
+    
+    def test_force_refresh_replaces_token(self):
+        """Test that force_refresh fetches a new token."""
+        self.cache.get("client", "secret", "refresh")
+        self.assertEqual(self.cache.get("client", "secret", "refresh", force_refresh=True), "token-2")
+        self.assertEqual(self.cache.get("client", "secret", "refresh"), "token-2")
+    
+    def test_expired_entries_and_locks_are_pruned(self):
+        """Test rotated credentials don't leave tokens or refresh locks behind."""
+        self.expires_in = 60  # Expires at once with the 60 second margin
+        for i in range(5):
+            self.cache.get("client", "secret", f"rotated-{i}")
+        self.expires_in = 3600
+        self.cache.get("client", "secret", "current")
+        stats = self.cache.stats()
+        self.assertEqual((stats["cached"], stats["refresh_locks"]), (1, 1))
+        
+        self.cache.invalidate("client", "current")
+        self.assertEqual(self.cache.stats()["refresh_locks"], 0)
+    
+    def test_test_email_retries_rejected_token(self):
+        """Test /api/test-email refreshes a rejected cached token and retries once."""
+        settings = {
+            "authType": "oauth2", "smtpServer": "smtp.example.com", "smtpPort": "587",
+            "smtpEmail": "from@example.com", "recipientEmail": "to@example.com",
+            "googleClientId": "retry-client", "googleClientSecret": "secret",
+            "googleRefreshToken": "refresh",
+        }
+        tokens = []
+        accepted = {"token-2"}
+        
+        def fake_open(session):
+            tokens.append(session.access_token)
+            if session.access_token not in accepted:
+                raise smtplib.SMTPAuthenticationError(535, b"Invalid credentials")
+            session._smtp = mock.Mock()
+        
+        client = server.app.test_client()
+        with mock.patch.object(server, "get_smtp_settings", return_value=settings), \
+                mock.patch.object(SMTPSession, "_open", fake_open):
+            response = client.post("/api/test-email")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(tokens, ["token-1", "token-2"])
+            
+            # The refreshed token is cached; a second rejection is reported
+            accepted.clear()
+            response = client.post("/api/test-email")
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(tokens[2:], ["token-2", "token-3"])
+        server.invalidate_access_token("retry-client", "refresh")
+
+
+class TestSettingsCache(unittest.TestCase):
+    """Test the in-process SMTP settings cache."""
+    
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.config_path = self.test_dir / "birthday_reminder_config.json"
+        patcher = mock.patch("config.get_config_path", return_value=self.config_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        config.invalidate_settings_cache()
+        config.save_smtp_settings({"smtpServer": "smtp.example.com", "smtpPassword": "first"})
+    
+    def tearDown(self):
+        config.invalidate_settings_cache()
+        shutil.rmtree(self.test_dir)
+    
+    def test_repeated_reads_hit_cache(self):
+        """Test that unchanged config is served from memory."""
+        before = config.get_settings_cache_stats()
+        first = config.get_smtp_settings()
+        first["smtpPassword"] = "mutated"
+        second = config.get_smtp_settings()
+        after = config.get_settings_cache_stats()
+        
+        self.assertEqual(second["smtpPassword"], "first")
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+    
+    def test_save_and_reset_invalidate(self):
+        """Test that saving or resetting settings drops the cached copy."""
+        config.get_smtp_settings()
+        config.save_smtp_settings({"smtpServer": "smtp.example.com", "smtpPassword": "second"})
+        self.assertEqual(config.get_smtp_settings()["smtpPassword"], "second")
+        
+        config.reset_config()
+        self.assertEqual(config.get_smtp_settings(), {})
+    
+    def test_external_write_detected(self):
+        """Test that a config file rewritten by another process is re-read."""
+        config.get_smtp_settings()
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            f.write('{"smtp": {"smtpServer": "smtp.other.com", "smtpPassword": "external"}}')
+        stat = self.config_path.stat()
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        
+        self.assertEqual(config.get_smtp_settings()["smtpPassword"], "external")
+    
+    def test_check_config_detects_undecryptable_token(self):
+        """Test that the readiness check fails if the refresh token can't be decrypted."""
+        config.check_config()
+        config.save_config({"smtp": {"googleRefreshTokenEncrypted": "not-a-fernet-token"}})
+        with self.assertRaises(ValueError):
+            config.check_config()
+
+
+class TestRedaction(unittest.TestCase):
+    """Test credential redaction for logs and API errors."""
+    
+    def test_redacts_each_secret_kind(self):
+        """Test that every secret key is redacted in one pass."""
+        text = "client_secret=abc refresh_token: 1//xyz password=hunter2 api_key=k1"
+        result = redact(text)
+        for secret in ("abc", "1//xyz", "hunter2", "k1"):
+            self.assertNotIn(secret, result)
+        self.assertEqual(result.count("[REDACTED]"), 4)
+    
+    def test_redacts_quoted_values(self):
+        """Test that quoted JSON values, including spaces, are redacted."""
+        result = redact('{"smtpPassword": "abcd efgh ijkl mnop", "smtpPort": 587}')
+        self.assertNotIn("abcd", result)
+        self.assertIn('"smtpPort": 587', result)
+    
+    def test_leaves_plain_text_alone(self):
+        """Test that text without secrets is returned unchanged."""
+        for text in ("Added birthday for Alice", "Outbox batch sent: 20", "tokens: 5"):
+            self.assertEqual(redact(text), text)
+    
+    def test_formatter_uses_redact(self):
+        """Test that SanitizedFormatter redacts the formatted record."""
+        formatter = SanitizedFormatter("%(message)s")
+        record = logging.LogRecord("test", logging.INFO, __file__, 0, "token=%s", ("secret",), None)
+        self.assertEqual(formatter.format(record), "token: [REDACTED]")
+
+
+class TestAsyncLogging(unittest.TestCase):
+    """Test the queue-based logging mode."""
+    
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        patcher = mock.patch.dict(os.environ, {"LOG_ASYNC": "true", "LOG_DIR": str(self.test_dir)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        logger_module.shutdown_logging()
+        logging.getLogger("test_async_logging").handlers = []
+        logger_module._queue_handler = None
+        shutil.rmtree(self.test_dir)
+    
+    def test_records_written_by_background_thread(self):
+        """Test that queued records reach the file and are sanitized on shutdown."""
+        log = logger_module.setup_logger("test_async_logging")
+        self.assertIsInstance(log.handlers[0], logger_module.BoundedQueueHandler)
+        
+        for i in range(100):
+            log.info("record %d password=hunter2", i)
+        logger_module.shutdown_logging()
+        
+        content = (self.test_dir / "app.log").read_text(encoding="utf-8")
+        self.assertIn("record 99", content)
+        self.assertNotIn("hunter2", content)
+    
+    def test_full_queue_drops_instead_of_blocking_forever(self):
+        """Test that a full queue drops records after the backpressure timeout."""
+        handler = logger_module.BoundedQueueHandler(queue.Queue(maxsize=1), block_timeout=0.01)
+        log = logging.getLogger("test_async_logging")
+        log.addHandler(handler)
+        log.warning("first")
+        log.warning("second")
+        self.assertEqual(handler.dropped, 1)
+
+
+class TestJsonLogging(unittest.TestCase):
+    """Test JSON log output with per-request fields."""
+    
+    def tearDown(self):
+        logger_module.end_log_context()
+    
+    def make_record(self, message):
+        record = logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+        logger_module.RequestContextFilter().filter(record)
+        return record
+    
+    def test_request_fields_attached(self):
+        """Test that context fields and accumulated timings appear in the JSON line."""
+        context = logger_module.start_log_context(request_id="r1", route="/api/birthdays", method="GET")
+        logger_module.add_log_timing("db_ms", 0.002)
+        logger_module.add_log_timing("db_ms", 0.001)
+        context["status"] = 200
+        
+        entry = json.loads(logger_module.JsonFormatter().format(self.make_record("done password=x")))
+        self.assertEqual(entry["request_id"], "r1")
+        self.assertEqual(entry["route"], "/api/birthdays")
+        self.assertEqual(entry["status"], 200)
+        self.assertAlmostEqual(entry["db_ms"], 3.0, places=1)
+        self.assertEqual(entry["message"], "done password: [REDACTED]")
+    
+    def test_no_fields_outside_request(self):
+        """Test that records outside a request carry no request fields."""
+        logger_module.add_log_timing("db_ms", 1.0)
+        entry = json.loads(logger_module.JsonFormatter().format(self.make_record("startup")))
+        self.assertNotIn("request_id", entry)
+        self.assertNotIn("db_ms", entry)
+
+
+class TestMetrics(unittest.TestCase):
+    """Test in-process metrics and their text rendering."""
+    
+    def test_counter_by_labels(self):
+        """Test that counters are kept per label values and rendered with labels."""
+        counter = Counter("test_events_total", "Test events", ("kind",))
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        counter.inc('quote"d')
+        
+        self.assertEqual(counter.value("a"), 3)
+        lines = counter.render()
+        self.assertIn('birthday_test_events_total{kind="a"} 3', lines)
+        self.assertIn('birthday_test_events_total{kind="quote\\"d"} 1', lines)
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets, sum and count are rendered correctly."""
+        histogram = Histogram("test_latency_seconds", "Test latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+        
+        lines = histogram.render()
+        self.assertIn('birthday_test_latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('birthday_test_latency_seconds_bucket{le="1.0"} 3', lines)
+        self.assertIn('birthday_test_latency_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("birthday_test_latency_seconds_sum 6.05", lines)
+        self.assertIn("birthday_test_latency_seconds_count 4", lines)
+    
+    def test_db_operations_observed(self):
+        """Test that pooled connection use is recorded."""
+        test_dir = Path(tempfile.mkdtemp())
+        try:
+            before = DB_OPERATIONS.count("write")
+            pool = ConnectionPool(test_dir / "metrics.db", size=1)
+            with pool.connection(write=True) as conn:
+                conn.execute("CREATE TABLE t (x)")
+            pool.close()
+            self.assertEqual(DB_OPERATIONS.count("write"), before + 1)
+            self.assertIn("birthday_db_operation_duration_seconds_count", render_metrics())
+        finally:
+            shutil.rmtree(test_dir)
+    
+    def test_render_metrics_labels_series_with_pid(self):
+        """Test every rendered series carries the process ID and callback counters are counters."""
+        counter = CallbackCounter("test_cache_events_total", "Test cache events", lambda: {("hits",): 5}, ("event",))
+        
+        output = render_metrics()
+        pid = f'pid="{os.getpid()}"'
+        self.assertIn("# TYPE birthday_test_cache_events_total counter", output)
+        self.assertIn(f'birthday_test_cache_events_total{{event="hits",{pid}}} 5', output)
+        self.assertIn(f'birthday_db_operation_duration_seconds_bucket{{mode="write",{pid},le="0.001"}}', output)
+        samples = [line for line in output.splitlines() if line and not line.startswith("#")]
+        self.assertTrue(all(pid in line for line in samples))
+        self.assertEqual(counter.render(), ["# HELP birthday_test_cache_events_total Test cache events",
+                                            "# TYPE birthday_test_cache_events_total counter",
+                                            'birthday_test_cache_events_total{event="hits"} 5'])
+
+
+class TestSerialization(unittest.TestCase):
+    """Test the pluggable JSON serializer."""
+    
+    def setUp(self):
+        self.backend = serialization._backend
+    
+    def tearDown(self):
+        serialization._backend = self.backend
+    
+    def backends(self):
+        return ["json"] + (["orjson"] if serialization.orjson is not None else [])
+    
+    def test_backends_produce_same_output(self):
+        """Test each backend encodes API data to identical compact UTF-8."""
+        data = [{"id": 1, "name": "Zoë", "photo": None, "age": 35, "ok": True}, {"date": date(2024, 2, 29)}]
+        outputs = set()
+        for backend in self.backends():
+            serialization._backend = backend
+            outputs.add(serialization.dumps(data))
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(json.loads(outputs.pop())[1], {"date": "2024-02-29"})
+    
+    def test_iter_json_array(self):
+        """Test streamed arrays are valid JSON at batch boundaries."""
+        for backend in self.backends():
+            serialization._backend = backend
+            for count in (0, 1, 2, 3, 4, 7):
+                chunks = list(serialization.iter_json_array(iter(range(count)), batch_size=2))
+                self.assertEqual(json.loads(b"".join(chunks)), list(range(count)))
+                self.assertEqual(len(chunks), count // 2 + 1)
+    
+    def test_get_json_backend(self):
+        """Test JSON_BACKEND=json forces the standard library encoder."""
+        with mock.patch.dict(os.environ, {"JSON_BACKEND": "json"}):
+            self.assertEqual(serialization.get_json_backend(), "json")
+
 
 class TestNameNormalization(unittest.TestCase):
     """Test name normalization and duplicate detection."""
     
     def test_name_normalization_logic(self):
         """Test name normalization logic (client-side)."""
-        # This tests the concept - actual normalization is in JS
+        # Mirrors normalizeName in static/app.js, which does the real work
         def normalize_name(name):
             if not name:
                 return ''
-            return name.strip().replace(/\s+/g, ' ').normalize('NFD').replace(/[\u0300-\u036f]/g, '')
+            name = re.sub(r'\s+', ' ', name.strip())
+            return re.sub('[\u0300-\u036f]', '', unicodedata.normalize('NFD', name))
         
-        # Note: This is a conceptual test - actual implementation is in app.js
-        self.assertTrue(True)  # Placeholder
+        self.assertEqual(normalize_name(''), '')
+        self.assertEqual(normalize_name('  Anna   Maria '), 'Anna Maria')
+        self.assertEqual(normalize_name('José Müller'), 'Jose Muller')
+        self.assertEqual(normalize_name('Zoë').lower(), normalize_name('zoe'))
 
 
 class TestExportImport(unittest.TestCase):
@@ -125,6 +1506,52 @@ class TestExportImport(unittest.TestCase):
         export_birthdays(self.db_path, self.uploads_dir, self.export_path)
         self.assertTrue(self.export_path.exists())
     
+    def test_iter_export_zip_streams_entries(self):
+        """Test the streamed archive stores JPEGs, deflates other files and keeps the JSON format."""
+        (self.uploads_dir / "a.jpg").write_bytes(os.urandom(50000))
+        (self.uploads_dir / "b.txt").write_bytes(b"hello " * 10000)
+        add_birthday(self.db_path, "Zoë", "1991-02-03", "female", "/uploads/a.jpg")
+        add_birthday(self.db_path, "Other", "1992-02-03", None, "/uploads/b.txt")
+        
+        chunks = list(iter_export_zip(self.db_path, self.uploads_dir, chunk_size=4096))
+        self.assertGreater(len(chunks), 10)
+        self.assertLess(max(len(chunk) for chunk in chunks), 3 * 4096)
+        
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual(zipf.getinfo("images/a.jpg").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zipf.getinfo("images/b.txt").compress_type, zipfile.ZIP_DEFLATED)
+            expected = [
+                {"name": b["name"], "birthday": b["birthday"], "gender": b["gender"], "photo": b["photo"]}
+                for b in get_all_birthdays(self.db_path)
+            ]
+            self.assertEqual(
+                zipf.read("birthdays.json").decode("utf-8"),
+                json.dumps(expected, indent=2, ensure_ascii=False)
+            )
+    
+    def test_iter_csv_and_ics_export(self):
+        """Test CSV and ICS exports stream in chunks and cover every birthday."""
+        for i in range(50):
+            add_birthday(self.db_path, f"User, {i}", f"19{50 + i}-01-15", None, None)
+        with get_connection(self.db_path, write=True) as conn:
+            conn.execute("INSERT INTO birthdays (name, birthday) VALUES ('Legacy', 'unknown')")
+        
+        chunks = list(iter_csv_export(self.db_path, chunk_size=512))
+        self.assertGreater(len(chunks), 1)
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        self.assertEqual(rows[0], ["Name", "Birthday", "Age", "Gender", "Photo"])
+        self.assertEqual(len(rows), 53)
+        self.assertIn(["User, 0", "1950-01-15", str(calculate_age("1950-01-15")), "", ""], rows)
+        
+        chunks = list(iter_ics_export(self.db_path, chunk_size=512))
+        self.assertGreater(len(chunks), 1)
+        ics = b"".join(chunks).decode("utf-8")
+        self.assertTrue(ics.startswith("BEGIN:VCALENDAR\n"))
+        self.assertTrue(ics.endswith("END:VCALENDAR\n"))
+        # The unparseable legacy date is skipped
+        self.assertEqual(ics.count("BEGIN:VEVENT"), 51)
+    
     def test_import_birthdays(self):
         """Test importing birthdays."""
         # First export
@@ -145,6 +1572,29 @@ class TestExportImport(unittest.TestCase):
         self.assertEqual(imported, 1)
         self.assertEqual(skipped, 0)
         self.assertEqual(len(errors), 0)
+    
+    def test_import_skips_malformed_entries(self):
+        """Test a malformed entry is reported and the other entries still import."""
+        entries = [
+            {"name": "First", "birthday": "1990-01-15"},
+            ["x"],
+            "not an entry",
+            {"name": "Second", "birthday": "1991-02-16"},
+        ]
+        with zipfile.ZipFile(self.export_path, "w") as zipf:
+            zipf.writestr("birthdays.json", json.dumps(entries))
+        
+        imported, skipped, errors = import_birthdays(self.db_path, self.uploads_dir, self.export_path, True)
+        self.assertEqual((imported, skipped), (2, 2))
+        self.assertEqual(errors, ["Row 2: invalid entry", "Row 3: invalid entry"])
+        self.assertEqual(sorted(b["name"] for b in get_all_birthdays(self.db_path)), ["First", "Second"])
+        
+        with zipfile.ZipFile(self.export_path, "w") as zipf:
+            zipf.writestr("birthdays.json", json.dumps({"name": "First"}))
+        imported, skipped, errors = import_birthdays(self.db_path, self.uploads_dir, self.export_path, True)
+        self.assertEqual((imported, skipped), (0, 0))
+        self.assertEqual(errors, ["birthdays.json must contain a list of birthdays"])
+        self.assertEqual(len(get_all_birthdays(self.db_path)), 2)
 
 
 if __name__ == '__main__':